@@ -1,35 +1,66 @@
+import json
 from asyncpg import Pool
-from typing import List
+from typing import List, Optional
+
+# Headline salary ordering; offers without a parsed salary go last either way
+SALARY_SORTS = {
+    "salary_desc": "o.salary_max DESC NULLS LAST",
+    "salary_asc": "o.salary_min ASC NULLS LAST",
+}
 
 class OffersRepository:
     def __init__(self, pool: Pool):
         self.pool = pool
 
-    async def get_all_offers(self) -> List[dict]:
-        query = """
+    async def get_all_offers(
+        self,
+        min_salary: Optional[float] = None,
+        max_salary: Optional[float] = None,
+        currency: Optional[str] = None,
+        period: Optional[str] = None,
+        sort: Optional[str] = None,
+    ) -> List[dict]:
+        # Salary filters use the typed headline columns parsed at ingest (indexed)
+        conditions = ["o.is_active"]
+        params: list = []
+        for condition, value in (
+            ("o.salary_max >= ${}", min_salary),
+            ("o.salary_min <= ${}", max_salary),
+            ("o.salary_currency = ${}", currency),
+            ("o.salary_period = ${}", period),
+        ):
+            if value is not None:
+                params.append(value)
+                conditions.append(condition.format(len(params)))
+        order_by = SALARY_SORTS.get(sort or "", "o.job_url")
+
+        query = f"""
             SELECT 
                 o.job_url, o.job_title, o.company,
                 o.location, o.operating_mode, o.employment_type,
                 o.experience, o.work_schedule, 
                 o.salary_any, o.salary_b2b, o.salary_permanent,
                 o.salary_mandate, o.salary_internship, o.salary_specific_task,
-                array_agg(COALESCE(s.canonical_skill_name, s.original_skill_name)) as skills
+                o.salary_min, o.salary_max, o.salary_currency, o.salary_period,
+                array_agg(COALESCE(s.canonical_skill_name, s.original_skill_name)) as skills,
+                jsonb_object_agg(COALESCE(s.canonical_skill_name, s.original_skill_name), os.level_rank)
+                    FILTER (WHERE os.level_rank IS NOT NULL) as skill_levels
             FROM offers o
             LEFT JOIN offer_skills os ON o.job_url = os.job_url
             LEFT JOIN skills s ON os.skill_id = s.uuid
-            GROUP BY o.job_url, o.job_title, o.company,
-                     o.location, o.operating_mode, o.employment_type,
-                     o.experience, o.work_schedule, 
-                     o.salary_any, o.salary_b2b, o.salary_permanent,
-                     o.salary_mandate, o.salary_internship, o.salary_specific_task
+            WHERE {" AND ".join(conditions)}
+            GROUP BY o.job_url
+            ORDER BY {order_by}
         """
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query)
+            rows = await conn.fetch(query, *params)
             
             results = []
             for row in rows:
                 # Filter out None values from skills array if any
                 skills_list = [s for s in row["skills"] if s] if row["skills"] else []
+                # Required level per skill (1 = nice to have ... 5 = master), for weighted matching
+                skill_levels = json.loads(row["skill_levels"]) if row["skill_levels"] else {}
                 # Salary choosing logic: B2B > Permanent > Any > Mandate > Task > Internship
                 salary = (
                     row["salary_b2b"] or 
@@ -50,12 +81,17 @@ class OffersRepository:
                     "experience": row["experience"],
                     "workSchedule": row["work_schedule"],
                     "salary": salary,
+                    "salaryMin": float(row["salary_min"]) if row["salary_min"] is not None else None,
+                    "salaryMax": float(row["salary_max"]) if row["salary_max"] is not None else None,
+                    "salaryCurrency": row["salary_currency"],
+                    "salaryPeriod": row["salary_period"],
                     "requiredSkills": skills_list,
+                    "requiredSkillLevels": skill_levels,
                 })
             return results
 
     async def get_offers_count(self) -> int:
-        query = "SELECT COUNT(*) FROM offers"
+        query = "SELECT COUNT(*) FROM offers WHERE is_active"
         async with self.pool.acquire() as conn:
             count = await conn.fetchval(query)
             return count or 0
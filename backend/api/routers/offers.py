@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Literal, Optional
 from backend.database import get_db_pool
 from backend.api.repository.offers_repo import OffersRepository
 
@@ -9,5 +10,18 @@ def get_offers_repo() -> OffersRepository:
     return OffersRepository(pool)
 
 @router.get("")
-async def get_offers(repo: OffersRepository = Depends(get_offers_repo)):
-    return await repo.get_all_offers()
+async def get_offers(
+    min_salary: Optional[float] = Query(None, ge=0, description="Only offers whose salary range reaches at least this amount"),
+    max_salary: Optional[float] = Query(None, ge=0, description="Only offers whose salary range starts at or below this amount"),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3, description="Salary currency, e.g. PLN"),
+    period: Optional[str] = Query(None, max_length=20, description="Salary period, e.g. month or hour"),
+    sort: Optional[Literal["salary_desc", "salary_asc"]] = Query(None, description="Sort by headline salary"),
+    repo: OffersRepository = Depends(get_offers_repo)
+):
+    return await repo.get_all_offers(
+        min_salary=min_salary,
+        max_salary=max_salary,
+        currency=currency.upper() if currency else None,
+        period=period.lower() if period else None,
+        sort=sort,
+    )
@@ -0,0 +1,17 @@
+-- Migration 010: Change detection for scraped offers
+-- content_hash: hash of the scraped fields; upserts only write when it changes.
+-- listing_hash: hash of the offer's listing payload (cheap change signal).
+-- first_seen_at / last_seen_at: when Scout first and last saw the offer listed.
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS listing_hash TEXT;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+-- Existing rows were first seen when they were inserted
+UPDATE offers
+SET first_seen_at = created_at
+WHERE created_at IS NOT NULL
+    AND first_seen_at > created_at;
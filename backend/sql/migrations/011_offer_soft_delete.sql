@@ -0,0 +1,10 @@
+-- Migration 011: Soft delete for stale offers
+-- is_active: false once an offer is no longer listed (with SOFT_DELETE_STALE).
+-- deactivated_at: when it was deactivated; inactive offers are hard-deleted
+-- (cascading into offer_skills) after INACTIVE_RETENTION_DAYS.
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT true;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS deactivated_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS idx_offers_inactive ON offers(deactivated_at)
+WHERE NOT is_active;
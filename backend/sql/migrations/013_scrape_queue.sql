@@ -0,0 +1,23 @@
+-- Migration 013: Shared work queue for distributed Scout runs
+-- A coordinator enqueues offer URLs; worker tasks claim batches with
+-- FOR UPDATE SKIP LOCKED, heartbeat while scraping and mark them done or failed.
+-- Offer URLs shared out to distributed Scout workers (state: pending, claimed, done, failed)
+CREATE TABLE IF NOT EXISTS scrape_queue (
+    id BIGSERIAL PRIMARY KEY,
+    run_id INTEGER REFERENCES scrape_runs(id) ON DELETE CASCADE,
+    job_url TEXT NOT NULL,
+    listing_row JSONB,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    claimed_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (run_id, job_url)
+);
+
+-- Index for claiming the next pending URLs in order
+CREATE INDEX IF NOT EXISTS idx_scrape_queue_pending ON scrape_queue(id) WHERE state = 'pending';
+
+-- Index for finding claims whose worker stopped heartbeating
+CREATE INDEX IF NOT EXISTS idx_scrape_queue_claimed ON scrape_queue(heartbeat_at) WHERE state = 'claimed';
@@ -0,0 +1,88 @@
+-- Migration 014: Salaries parsed at ingest
+-- salary_min / salary_max / salary_currency / salary_is_gross / salary_period:
+--   the headline salary (contract chosen B2B > Permanent > Any > Mandate >
+--   Specific Task > Internship, recorded in salary_contract), indexed for API
+--   filters and sorting.
+-- salaries: every contract's parsed salary as JSONB; offers_parsed reads it
+--   instead of running six regexp_match calls per row.
+-- Existing rows are filled by: python scripts/backfill_salaries.py
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salary_min NUMERIC;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salary_max NUMERIC;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salary_currency TEXT;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salary_is_gross BOOLEAN;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salary_period TEXT;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salary_contract TEXT;
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS salaries JSONB;
+CREATE INDEX IF NOT EXISTS idx_offers_salary_min ON offers(salary_min)
+WHERE salary_min IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_offers_salary_max ON offers(salary_max)
+WHERE salary_max IS NOT NULL;
+
+CREATE OR REPLACE VIEW offers_parsed AS
+SELECT job_url,
+    job_title,
+    category,
+    company,
+    location,
+    experience,
+    employment_type,
+    operating_mode,
+    work_schedule,
+    tech_stack,
+    salary_any as salary_any_raw,
+    salary_b2b as salary_b2b_raw,
+    salary_permanent as salary_permanent_raw,
+    salary_internship as salary_internship_raw,
+    salary_mandate as salary_mandate_raw,
+    salary_specific_task as salary_specific_task_raw,
+    -- Parsed Any
+    (salaries -> 'any' ->> 'min')::NUMERIC as salary_any_min,
+    (salaries -> 'any' ->> 'max')::NUMERIC as salary_any_max,
+    salaries -> 'any' ->> 'currency' as salary_any_currency,
+    (salaries -> 'any' ->> 'is_gross')::BOOLEAN as salary_any_is_gross,
+    salaries -> 'any' ->> 'period' as salary_any_period,
+    -- Parsed B2B
+    (salaries -> 'b2b' ->> 'min')::NUMERIC as salary_b2b_min,
+    (salaries -> 'b2b' ->> 'max')::NUMERIC as salary_b2b_max,
+    salaries -> 'b2b' ->> 'currency' as salary_b2b_currency,
+    (salaries -> 'b2b' ->> 'is_gross')::BOOLEAN as salary_b2b_is_gross,
+    salaries -> 'b2b' ->> 'period' as salary_b2b_period,
+    -- Parsed Permanent
+    (salaries -> 'permanent' ->> 'min')::NUMERIC as salary_permanent_min,
+    (salaries -> 'permanent' ->> 'max')::NUMERIC as salary_permanent_max,
+    salaries -> 'permanent' ->> 'currency' as salary_permanent_currency,
+    (salaries -> 'permanent' ->> 'is_gross')::BOOLEAN as salary_permanent_is_gross,
+    salaries -> 'permanent' ->> 'period' as salary_permanent_period,
+    -- Parsed Internship
+    (salaries -> 'internship' ->> 'min')::NUMERIC as salary_internship_min,
+    (salaries -> 'internship' ->> 'max')::NUMERIC as salary_internship_max,
+    salaries -> 'internship' ->> 'currency' as salary_internship_currency,
+    (salaries -> 'internship' ->> 'is_gross')::BOOLEAN as salary_internship_is_gross,
+    salaries -> 'internship' ->> 'period' as salary_internship_period,
+    -- Parsed Mandate
+    (salaries -> 'mandate' ->> 'min')::NUMERIC as salary_mandate_min,
+    (salaries -> 'mandate' ->> 'max')::NUMERIC as salary_mandate_max,
+    salaries -> 'mandate' ->> 'currency' as salary_mandate_currency,
+    (salaries -> 'mandate' ->> 'is_gross')::BOOLEAN as salary_mandate_is_gross,
+    salaries -> 'mandate' ->> 'period' as salary_mandate_period,
+    -- Parsed Specific Task
+    (salaries -> 'specific_task' ->> 'min')::NUMERIC as salary_specific_task_min,
+    (salaries -> 'specific_task' ->> 'max')::NUMERIC as salary_specific_task_max,
+    salaries -> 'specific_task' ->> 'currency' as salary_specific_task_currency,
+    (salaries -> 'specific_task' ->> 'is_gross')::BOOLEAN as salary_specific_task_is_gross,
+    salaries -> 'specific_task' ->> 'period' as salary_specific_task_period,
+    -- Headline salary (B2B > Permanent > Any > Mandate > Specific Task > Internship)
+    salary_min,
+    salary_max,
+    salary_currency,
+    salary_is_gross,
+    salary_period,
+    salary_contract
+FROM public.offers;
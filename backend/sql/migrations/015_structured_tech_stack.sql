@@ -0,0 +1,12 @@
+-- Migration 015: Structured tech stack with proficiency levels
+-- offers.tech_stack_items: the tech stack as a JSONB array of {"name", "level"},
+--   written once by Scout; Atlas reads it instead of re-parsing tech_stack text.
+-- offer_skills.skill_level: the level the offer asks for (e.g. "Advanced").
+-- offer_skills.level_rank: that level as 1 (nice to have) .. 5 (master), for
+--   weighting match scores.
+ALTER TABLE offers
+ADD COLUMN IF NOT EXISTS tech_stack_items JSONB;
+ALTER TABLE offer_skills
+ADD COLUMN IF NOT EXISTS skill_level TEXT;
+ALTER TABLE offer_skills
+ADD COLUMN IF NOT EXISTS level_rank SMALLINT;
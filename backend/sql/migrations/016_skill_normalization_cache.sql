@@ -0,0 +1,12 @@
+-- Migration 016: Persistent skill normalization cache
+-- skill_normalization_cache: lower-cased raw skill -> canonical names (JSONB list)
+--   from the model, with the model id and prompt version that produced them.
+--   Survives `--clear` (no foreign key to skills), so re-normalizing costs no
+--   AI calls until the prompt or model changes.
+CREATE TABLE IF NOT EXISTS skill_normalization_cache (
+    raw_key TEXT PRIMARY KEY,
+    canonical_names JSONB NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,5 @@
+-- Migration 017: Mark when a distributed run's queue is ready
+-- scrape_runs.queued_at: set by the coordinator once it has enqueued the
+--   run's offers; workers wait for it and only claim URLs of that run.
+ALTER TABLE scrape_runs
+ADD COLUMN IF NOT EXISTS queued_at TIMESTAMP;
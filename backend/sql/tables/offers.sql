@@ -15,7 +15,34 @@ CREATE TABLE IF NOT EXISTS offers (
     employment_type TEXT,
     operating_mode TEXT,
     tech_stack TEXT,
+    tech_stack_items JSONB,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    content_hash TEXT,
+    listing_hash TEXT,
+    salary_min NUMERIC,
+    salary_max NUMERIC,
+    salary_currency TEXT,
+    salary_is_gross BOOLEAN,
+    salary_period TEXT,
+    salary_contract TEXT,
+    salaries JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN NOT NULL DEFAULT true,
+    deactivated_at TIMESTAMP
 );
 
+-- Columns the indexes below need; on a table created before migrations
+-- 011/014 they may be missing, and this file runs on every Scout start
+ALTER TABLE offers ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT true;
+ALTER TABLE offers ADD COLUMN IF NOT EXISTS deactivated_at TIMESTAMP;
+ALTER TABLE offers ADD COLUMN IF NOT EXISTS salary_min NUMERIC;
+ALTER TABLE offers ADD COLUMN IF NOT EXISTS salary_max NUMERIC;
+
+-- Soft-deleted offers awaiting the hard purge
+CREATE INDEX IF NOT EXISTS idx_offers_inactive ON offers(deactivated_at) WHERE NOT is_active;
+
+-- Salary filters and sorting in the API (headline salary parsed at ingest)
+CREATE INDEX IF NOT EXISTS idx_offers_salary_min ON offers(salary_min) WHERE salary_min IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_offers_salary_max ON offers(salary_max) WHERE salary_max IS NOT NULL;
@@ -0,0 +1,23 @@
+CREATE TABLE IF NOT EXISTS scrape_runs (
+    id SERIAL PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'running',
+    url_count INTEGER NOT NULL DEFAULT 0,
+    done_count INTEGER,
+    failed_count INTEGER,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    queued_at TIMESTAMP  -- Distributed runs: when the coordinator finished enqueueing
+);
+
+-- Collected URLs per run and their processing state (pending, done, failed)
+CREATE TABLE IF NOT EXISTS scrape_run_urls (
+    run_id INTEGER REFERENCES scrape_runs(id) ON DELETE CASCADE,
+    job_url TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    listing_row JSONB,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, job_url)
+);
+
+-- Index for finding the run to resume
+CREATE INDEX IF NOT EXISTS idx_scrape_runs_status ON scrape_runs(status, started_at);
@@ -0,0 +1,10 @@
+-- Durable cache of AI skill normalizations, keyed by the lower-cased raw skill.
+-- Rows are only used while model and prompt_version match the current
+-- normalizer, and are overwritten when a newer normalization is cached.
+CREATE TABLE IF NOT EXISTS skill_normalization_cache (
+    raw_key TEXT PRIMARY KEY,
+    canonical_names JSONB NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -52,6 +52,36 @@ case "$1" in
             --region $AWS_REGION
         echo "✅ Task started manually"
         ;;
+    "run-sharded")
+        WORKERS="${2:-4}"
+        echo "🚀 Running a distributed scrape: 1 coordinator + $WORKERS workers..."
+        VPC_ID=$(aws ec2 describe-vpcs --filters "Name=is-default,Values=true" --region $AWS_REGION --query 'Vpcs[0].VpcId' --output text 2>/dev/null || \
+                 aws ec2 describe-vpcs --region $AWS_REGION --query 'Vpcs[0].VpcId' --output text)
+        SUBNET_ID=$(aws ec2 describe-subnets --filters "Name=vpc-id,Values=$VPC_ID" --region $AWS_REGION --query 'Subnets[0].SubnetId' --output text)
+        SECURITY_GROUP_ID=$(aws ec2 describe-security-groups --filters "Name=group-name,Values=scout-sg" "Name=vpc-id,Values=$VPC_ID" --region $AWS_REGION --query 'SecurityGroups[0].GroupId' --output text)
+        NETWORK_CONFIG="awsvpcConfiguration={subnets=[$SUBNET_ID],securityGroups=[$SECURITY_GROUP_ID],assignPublicIp=ENABLED}"
+
+        run_role() {
+            aws ecs run-task \
+                --cluster $ECS_CLUSTER \
+                --task-definition $TASK_DEFINITION \
+                --launch-type FARGATE \
+                --count "$2" \
+                --network-configuration "$NETWORK_CONFIG" \
+                --overrides "{\"containerOverrides\":[{\"name\":\"scout\",\"environment\":[{\"name\":\"SCOUT_ROLE\",\"value\":\"$1\"}]}]}" \
+                --region $AWS_REGION > /dev/null
+        }
+
+        run_role coordinator 1
+        # run-task starts at most 10 tasks per call
+        REMAINING=$WORKERS
+        while [ "$REMAINING" -gt 0 ]; do
+            BATCH=$(( REMAINING > 10 ? 10 : REMAINING ))
+            run_role worker $BATCH
+            REMAINING=$(( REMAINING - BATCH ))
+        done
+        echo "✅ Coordinator and $WORKERS workers started"
+        ;;
     "disable-schedule")
         echo "🛑 Disabling scheduled runs..."
         aws events disable-rule --name $SCHEDULE_RULE --region $AWS_REGION
@@ -101,6 +131,7 @@ case "$1" in
         echo "  tasks             - List recently run tasks"
         echo "  task-status       - Show details of latest task"
         echo "  run-now           - Run task manually (outside schedule)"
+        echo "  run-sharded [N]   - Run 1 coordinator + N workers (default 4)"
         echo "  disable-schedule  - Disable automatic daily runs"
         echo "  enable-schedule   - Enable automatic daily runs"
         echo "  stop-running      - Stop currently running tasks"
@@ -109,6 +140,7 @@ case "$1" in
         echo "Examples:"
         echo "  ./management-commands.sh logs"
         echo "  ./management-commands.sh run-now"
+        echo "  ./management-commands.sh run-sharded 8"
         echo "  ./management-commands.sh disable-schedule"
         echo "  ./management-commands.sh update-schedule 'cron(0 3 * * ? *)'"
         echo ""
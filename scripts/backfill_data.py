@@ -1,4 +1,23 @@
+"""
+Backfill offer fields that are NULL (or, for location, wrongly equal to the
+category) by re-visiting the offer pages.
+
+Usage from repo root:
+    python3 scripts/backfill_data.py [--fields company,location] [--workers 4] [--restart]
+
+Incomplete offers are read in keyset-paginated batches. A bounded pool of
+browser contexts re-extracts only each row's missing fields with Scout's
+shared single-round-trip extractor, paced by the adaptive rate limiter. Each
+batch is written with one `UPDATE ... FROM (VALUES ...)` that only fills
+columns that are still NULL, and the `content_hash` of the updated rows is
+recomputed from their merged content so the next scrape does not see them as
+changed. After every batch the last processed URL is
+checkpointed to a state file, so an interrupted backfill continues where it
+stopped (offers that could not be filled are not visited again).
+"""
+import argparse
 import asyncio
+import json
 import logging
 import os
 import sys
@@ -10,204 +29,230 @@ load_dotenv()
 # Add services to path to allow importing scout modules
 sys.path.append(os.path.join(os.getcwd(), 'services'))
 
-# Now we can import from scout
-from scout.db import init_db_connection
-from scout.selectors import SELECTORS, get_selector
-from scout.scrape_core import init_browser, sanitize_string
+from scout.db import CONTENT_COLUMNS, init_db_connection
 from scout.config import ScrapingConfig
+from scout.extractor import TEXT_FIELDS
+from scout.memory import MemoryWatchdog
+from scout.ratelimit import AdaptiveRateLimiter
+from scout.scrape_core import close_http_fetcher, init_browser, new_context, offer_content_hash, reopen_page, scrape_offer_with_retry
 
-# Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-async def main():
-    conn = await init_db_connection()
-    
-    # Fetch offers with any missing data OR bad data (e.g. location = category)
-    rows = await conn.fetch("""
-        SELECT job_url 
-        FROM offers 
-        WHERE category IS NULL 
-           OR company IS NULL
-           OR location IS NULL
-           OR work_schedule IS NULL
-           OR experience IS NULL
-           OR employment_type IS NULL
-           OR operating_mode IS NULL
-           OR location = category
-    """)
-    
-    logging.info(f"Found {len(rows)} offers with missing data (Category, Company, Location, Schedule, Experience, Employment, Mode).")
-    
+DEFAULT_FIELDS = ("category", "company", "location", "work_schedule", "experience", "employment_type", "operating_mode")
+BATCH_SIZE = 200  # Offers read (and written back) per keyset batch
+DEFAULT_WORKERS = 4
+STATE_FILE = ".backfill_state.json"
+
+
+def missing_condition(fields) -> str:
+    """SQL condition matching offers with at least one of `fields` to backfill."""
+    conditions = [f"{field} IS NULL" for field in fields]
+    if "location" in fields:
+        conditions.append("location = category")
+    return " OR ".join(conditions)
+
+
+def missing_fields(row, fields) -> list[str]:
+    """The fields of one offer row that need re-extracting."""
+    return [
+        field for field in fields
+        if row[field] is None or (field == "location" and row["location"] == row["category"])
+    ]
+
+
+def update_sql(fields, row_count: int) -> str:
+    """
+    One set-based UPDATE for `row_count` offers.
+
+    Values are only written into columns that are still NULL (location also
+    when it equals the category), so concurrent scrapes are never overwritten.
+    The updated rows' content columns are returned for `refresh_content_hashes`.
+    """
+    width = len(fields) + 1
+    values = ",\n        ".join(
+        "(" + ", ".join(f"${row * width + col + 1}::text" for col in range(width)) + ")"
+        for row in range(row_count)
+    )
+    assignments = []
+    for field in fields:
+        if field == "location":
+            assignments.append(
+                "location = CASE WHEN o.location IS NULL OR o.location = o.category "
+                "THEN COALESCE(v.location, o.location) ELSE o.location END"
+            )
+        else:
+            assignments.append(f"{field} = COALESCE(o.{field}, v.{field})")
+    return f"""
+        UPDATE offers o
+        SET {", ".join(assignments)}
+        FROM (VALUES
+        {values}
+        ) AS v(job_url, {", ".join(fields)})
+        WHERE o.job_url = v.job_url
+        RETURNING o.job_url, {", ".join(f"o.{column}" for column in CONTENT_COLUMNS)}
+    """
+
+
+async def refresh_content_hashes(conn, rows) -> None:
+    """Recompute `content_hash` of backfilled rows the same way Scout hashes scraped offers."""
     if not rows:
-        logging.info("Nothing to backfill.")
         return
+    await conn.execute("""
+        UPDATE offers o
+        SET content_hash = v.content_hash
+        FROM unnest($1::text[], $2::text[]) AS v(job_url, content_hash)
+        WHERE o.job_url = v.job_url
+    """, [row["job_url"] for row in rows], [offer_content_hash(dict(row)) for row in rows])
 
-    playwright, browser, page = await init_browser(headless=True)
-    
+
+def new_state(fields) -> dict:
+    """Checkpoint of a backfill that has not processed anything yet."""
+    return {"fields": list(fields), "last_url": "", "visited": 0, "updated": 0, "filled": 0}
+
+
+def load_state(path: str, fields) -> dict:
+    """Read the checkpoint for this field set, or start from scratch."""
     try:
-        for i, row in enumerate(rows, 1):
-            url = row['job_url']
-            logging.info(f"[{i}/{len(rows)}] Processing: {url}")
-            
-            try:
-                await page.goto(url, wait_until='networkidle', timeout=30000)
-            except Exception as e:
-                logging.error(f"Failed to load {url}: {e}")
-                continue
+        with open(path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return new_state(fields)
+    if state.get("fields") != list(fields):
+        logging.info(f"Checkpoint in {path} is for other fields ({state.get('fields')}); starting over")
+        return new_state(fields)
+    return state
 
-            # -------------------------------------------------------------
-            # EXTRACT DATA
-            # -------------------------------------------------------------
-            
-            # 1. Company
-            company = None
-            try:
-                company_elem = page.locator(get_selector(SELECTORS.COMPANY)).first
-                if await company_elem.count() > 0:
-                    company = await company_elem.inner_text()
-            except Exception as e:
-                logging.warning(f"Error extracting company: {e}")
 
-            # 2. Category - try Pill first (Red), then Breadcrumb (Yellow)
-            category = None
-            try:
-                # Try Pill
-                category_elem = page.locator(get_selector(SELECTORS.CATEGORY_PILL)).first
-                if await category_elem.count() > 0:
-                    category = await category_elem.inner_text()
-                
-                # Fallback to Breadcrumb
-                if not category:
-                    category_elem = page.locator(get_selector(SELECTORS.CATEGORY_BREADCRUMB)).first
-                    if await category_elem.count() > 0:
-                        category = await category_elem.inner_text()
-            except Exception as e:
-                logging.warning(f"Error extracting category: {e}")
-            
-            # 3. Location - try Pin Icon (Container) first, then Breadcrumb Fallback
-            location = None
-            try:
-                location_element = page.locator(get_selector(SELECTORS.LOCATION)).first
-                if await location_element.count() > 0:
-                    location = await location_element.inner_text()
-                
-                if not location:
-                    location_element = page.locator(SELECTORS.LOCATION.fallback).first
-                    if await location_element.count() > 0:
-                        location = await location_element.inner_text()
-            except Exception as e:
-                logging.warning(f"Error extracting location: {e}")
-            
-            # 4. Work schedule
-            work_schedule = None
+def save_state(path: str, state: dict):
+    """Atomically write the checkpoint."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+async def extract_batch(browser, pages: list, rows, fields, limiter: AdaptiveRateLimiter, memory: MemoryWatchdog) -> list[tuple]:
+    """
+    Re-extract the missing fields of a batch of offers with a bounded worker pool.
+
+    Each worker owns one page (and its browser context) from `pages`; a worker
+    whose context runs over the memory limits gets a fresh one. A failed
+    recycle only reopens that worker's page, so the batch keeps its results.
+
+    Returns:
+        list[tuple]: `(job_url, value per field)` for offers that yielded anything
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for row in rows:
+        wanted = missing_fields(row, fields)
+        if wanted:
+            queue.put_nowait((row["job_url"], wanted))
+    results = []
+
+    async def worker(slot: int):
+        handled = 0
+        while True:
             try:
-                work_schedule_element = page.locator(get_selector(SELECTORS.WORK_SCHEDULE)).first
-                if await work_schedule_element.count() > 0:
-                    work_schedule = await work_schedule_element.inner_text()
-            except Exception as e:
-                logging.warning(f"Error extracting work schedule: {e}")
-            
-            # 5. Employment type
-            employment_type = None
+                url, wanted = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
             try:
-                employment_element = page.locator(get_selector(SELECTORS.EMPLOYMENT_TYPE)).first
-                if await employment_element.count() > 0:
-                    employment_type = await employment_element.inner_text()
+                if await memory.check(pages[slot], handled):
+                    await pages[slot].context.close()
+                    pages[slot] = await (await new_context(browser)).new_page()
+                    handled = 0
             except Exception as e:
-                logging.warning(f"Error extracting employment type: {e}")
-            
-            # 6. Experience
-            experience = None
+                logging.warning(f"⚠️ Worker {slot}: context recycle failed ({e}), reopening its page")
+                pages[slot], _ = await reopen_page(pages[slot], browser)
+                handled = 0
+            handled += 1
             try:
-                experience_element = page.locator(get_selector(SELECTORS.EXPERIENCE)).first
-                if await experience_element.count() > 0:
-                    experience = await experience_element.inner_text()
+                found = await scrape_offer_with_retry(pages[slot], url, limiter, fields=wanted)
             except Exception as e:
-                logging.warning(f"Error extracting experience: {e}")
-            
-            # 7. Operating mode
-            operating_mode = None
-            try:
-                operating_mode_element = page.locator(get_selector(SELECTORS.OPERATING_MODE)).first
-                if await operating_mode_element.count() > 0:
-                    operating_mode = await operating_mode_element.inner_text()
-            except Exception as e:
-                logging.warning(f"Error extracting operating mode: {e}")
-
-            # -------------------------------------------------------------
-            # SANITIZE
-            # -------------------------------------------------------------
-            company = sanitize_string(company)
-            category = sanitize_string(category)
-            location = sanitize_string(location)
-            work_schedule = sanitize_string(work_schedule)
-            experience = sanitize_string(experience)
-            employment_type = sanitize_string(employment_type)
-            operating_mode = sanitize_string(operating_mode)
-
-            # -------------------------------------------------------------
-            # UPDATE DB
-            # -------------------------------------------------------------
-            if any([company, category, location, work_schedule, experience, employment_type, operating_mode]):
-                
-                fields_map = {
-                    'company': company,
-                    'category': category,
-                    'location': location,
-                    'work_schedule': work_schedule,
-                    'experience': experience,
-                    'employment_type': employment_type,
-                    'operating_mode': operating_mode
-                }
-                
-                found_info = ", ".join([f"{k}: {v}" for k,v in fields_map.items() if v])
-                logging.info(f"   -> Found: {found_info}")
-                
-                update_fields = []
-                values = []
-                idx = 1
-                
-                for field, value in fields_map.items():
-                    if value:
-                        update_fields.append(f"{field} = ${idx}")
-                        values.append(value)
-                        idx += 1
-                
-                if update_fields:
-                    values.append(url)
-                    query = f"UPDATE offers SET {', '.join(update_fields)} WHERE job_url = ${idx}"
-                    
-                    # Retry logic for DB update
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        try:
-                            if conn.is_closed():
-                                logging.warning("   -> Connection closed, reconnecting...")
-                                conn = await init_db_connection()
-                                
-                            await conn.execute(query, *values)
-                            logging.info("   -> Database updated.")
-                            break
-                        except Exception as e:
-                            logging.error(f"   -> DB Update failed (attempt {attempt+1}/{max_retries}): {e}")
-                            if attempt == max_retries - 1:
-                                logging.error("   -> Skipping this update due to repeated DB errors.")
-                            else:
-                                await asyncio.sleep(2)
-                                try:
-                                    await conn.close()
-                                except: 
-                                    pass
-            else:
-                logging.warning("   -> No data found to update.")
-            
-            # Rate limiting
-            await asyncio.sleep(1)
+                logging.error(f"Failed to backfill {url}: {e}")
+                continue
+            found = {field: value for field, value in found.items() if value}
+            if found:
+                logging.info(f"   -> {url}: {', '.join(f'{k}: {v}' for k, v in found.items())}")
+                results.append((url, *(found.get(field) for field in fields)))
+
+    await asyncio.gather(*(worker(slot) for slot in range(len(pages))))
+    return results
+
+
+async def main(fields=DEFAULT_FIELDS, workers: int = DEFAULT_WORKERS, state_path: str = STATE_FILE, restart: bool = False):
+    conn = await init_db_connection()
+    fields = tuple(fields)
+    state = new_state(fields) if restart else load_state(state_path, fields)
+    condition = missing_condition(fields)
 
+    remaining = await conn.fetchval(f"SELECT COUNT(*) FROM offers WHERE job_url > $1 AND ({condition})", state["last_url"])
+    logging.info(f"Found {remaining} offers with missing {', '.join(fields)}" + (f" (resuming after {state['last_url']})" if state["last_url"] else ""))
+    if not remaining:
+        logging.info("Nothing to backfill.")
+        await conn.close()
+        return
+
+    playwright, browser, page = await init_browser(headless=ScrapingConfig.HEADLESS)
+    pages = [page] + [await (await new_context(browser)).new_page() for _ in range(workers - 1)]
+    limiter = AdaptiveRateLimiter()
+    memory = MemoryWatchdog()
+    logging.info(f"👷 Starting {workers} backfill workers ({limiter.rate:.1f} req/s, max {limiter.max_rate})")
+
+    try:
+        while True:
+            rows = await conn.fetch(f"""
+                SELECT job_url, {", ".join(sorted(set(fields) | {"category", "location"}))}
+                FROM offers
+                WHERE job_url > $1 AND ({condition})
+                ORDER BY job_url
+                LIMIT $2
+            """, state["last_url"], BATCH_SIZE)
+            if not rows:
+                break
+
+            results = await extract_batch(browser, pages, rows, fields, limiter, memory)
+            if results:
+                async with conn.transaction():
+                    updated = await conn.fetch(update_sql(fields, len(results)), *(value for result in results for value in result))
+                    await refresh_content_hashes(conn, updated)
+
+            state["last_url"] = rows[-1]["job_url"]
+            state["visited"] += len(rows)
+            state["updated"] += len(results)
+            state["filled"] += sum(1 for result in results for value in result[1:] if value)
+            save_state(state_path, state)
+            logging.info(f"✅ Checkpoint: {state['visited']} offers visited, {state['updated']} updated "
+                         f"({state['filled']} fields filled)")
     finally:
+        limiter.log_summary()
+        memory.log_summary()
+        for worker_page in pages:
+            try:
+                await worker_page.context.close()
+            except Exception:
+                pass
         await browser.close()
         await playwright.stop()
+        await close_http_fetcher()
         await conn.close()
 
+    logging.info(f"Done: {state['updated']} of {state['visited']} offers updated, {state['filled']} fields filled.")
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Re-extract missing offer fields from the offer pages")
+    parser.add_argument("--fields", default=",".join(DEFAULT_FIELDS),
+                        help=f"Comma-separated columns to backfill (any of: {', '.join(TEXT_FIELDS)})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel browser contexts")
+    parser.add_argument("--state", default=STATE_FILE, help="Checkpoint file used to resume an interrupted backfill")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first offer")
+    args = parser.parse_args()
+
+    selected = tuple(field.strip() for field in args.fields.split(",") if field.strip())
+    unknown = [field for field in selected if field not in TEXT_FIELDS]
+    if unknown:
+        parser.error(f"Unknown fields: {', '.join(unknown)}")
+    asyncio.run(main(fields=selected, workers=max(1, args.workers), state_path=args.state, restart=args.restart))
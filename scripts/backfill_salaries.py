@@ -0,0 +1,86 @@
+"""
+One-off backfill of the parsed salary columns (migration 014) for offers
+scraped before Scout parsed salaries at ingest.
+
+Usage from repo root:
+    python3 scripts/backfill_salaries.py [--all]
+
+By default only rows without parsed salaries are touched; --all re-parses
+every offer (e.g. after a parser change). Rows are read in keyset-paginated
+batches and written with one set-based UPDATE per batch.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load env vars first
+load_dotenv()
+
+# Add services to path to allow importing scout modules
+sys.path.append(os.path.join(os.getcwd(), 'services'))
+
+from scout.db import init_db_connection
+from scout.salary import PARSED_SALARY_COLUMNS, SALARY_CONTRACTS, parse_salaries
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BATCH_SIZE = 1000
+
+UPDATE_SQL = """
+    UPDATE offers o
+    SET salary_min = s.salary_min,
+        salary_max = s.salary_max,
+        salary_currency = s.salary_currency,
+        salary_is_gross = s.salary_is_gross,
+        salary_period = s.salary_period,
+        salary_contract = s.salary_contract,
+        salaries = s.salaries::jsonb
+    FROM unnest($1::text[], $2::numeric[], $3::numeric[], $4::text[], $5::boolean[], $6::text[], $7::text[], $8::text[])
+        AS s(job_url, salary_min, salary_max, salary_currency, salary_is_gross, salary_period, salary_contract, salaries)
+    WHERE o.job_url = s.job_url
+"""
+
+
+async def main(reparse_all: bool = False):
+    conn = await init_db_connection()
+    salary_columns = ", ".join(SALARY_CONTRACTS)
+    has_salary = " OR ".join(f"{column} IS NOT NULL" for column in SALARY_CONTRACTS)
+    only_missing = "" if reparse_all else "AND salaries IS NULL"
+
+    last_url = ""
+    updated = parsed = 0
+    try:
+        while True:
+            rows = await conn.fetch(f"""
+                SELECT job_url, {salary_columns}
+                FROM offers
+                WHERE job_url > $1 AND ({has_salary}) {only_missing}
+                ORDER BY job_url
+                LIMIT $2
+            """, last_url, BATCH_SIZE)
+            if not rows:
+                break
+            last_url = rows[-1]["job_url"]
+
+            results = [parse_salaries(dict(row)) for row in rows]
+            parsed += sum(1 for result in results if result["salaries"])
+            columns = [[row["job_url"] for row in rows]] + [
+                [result[column] for result in results] for column in PARSED_SALARY_COLUMNS
+            ]
+            await conn.execute(UPDATE_SQL, *columns)
+            updated += len(rows)
+            logging.info(f"Backfilled {updated} offers so far ({parsed} with a parseable salary)")
+    finally:
+        await conn.close()
+
+    logging.info(f"Done: {updated} offers updated, {updated - parsed} had no parseable salary.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill parsed salary columns for existing offers")
+    parser.add_argument("--all", action="store_true", help="Re-parse every offer, not only rows without parsed salaries")
+    args = parser.parse_args()
+    asyncio.run(main(reparse_all=args.all))
@@ -17,12 +17,17 @@ import asyncpg
 import logging
 import sys
 import os
+import hashlib
 import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 import re
 from dotenv import load_dotenv
 import boto3
+from botocore.config import Config
 
 # Load environment variables
 env_path = Path(__file__).parent.parent.parent / '.env'
@@ -67,9 +72,147 @@ _HARDCODED_RULES: Dict[str, str] = {
 }
 
 
-def parse_tech_stack(tech_stack: str) -> List[str]:
-    """Parse a tech stack string into a list of raw skills."""
-    skills_list = []
+# Parallel AI normalization: batches go to Bedrock from a thread pool under a
+# concurrency limit that halves on throttling and grows back on success
+NORMALIZE_BATCH_SIZE = 50          # Skills per Bedrock call
+NORMALIZE_MAX_BATCHES = 200        # Runaway-cost guard: batches dispatched per run
+NORMALIZE_CONCURRENCY = 4          # Concurrent Bedrock calls at start
+NORMALIZE_MAX_CONCURRENCY = 8      # Ceiling the limit grows back to (also the thread pool size)
+NORMALIZE_RETRIES = 5              # Attempts per batch while Bedrock throttles
+NORMALIZE_BACKOFF_BASE = 1.0       # Backoff cap (s) after the first throttle; doubles per attempt, full jitter
+NORMALIZE_BACKOFF_MAX = 30.0       # Longest backoff (s)
+NORMALIZE_TIME_BUDGET = 600        # Stop starting new batches after this many seconds (Lambda timeout is 900s)
+
+# Model used for normalization (Inference Profile)
+NORMALIZE_MODEL_ID = "eu.anthropic.claude-sonnet-4-6"
+
+_NORMALIZE_PROMPT = """You are a technical data cleaner. Normalize raw technical skills scraped from job postings.
+
+Input is a JSON object: {{ "Raw Name": "Category" }}
+Output must be a JSON object where each value is either a STRING or a LIST OF STRINGS:
+  {{ "Raw Name": "Canonical Name" }}         -- single canonical name
+  {{ "Raw Name": ["Name1", "Name2", ...] }}  -- multiple canonical names (when splitting)
+
+Rules:
+1. **Single skills**: Return a single string.
+   - "React.js" -> "React"
+   - "NodeJS" -> "Node.js"
+   - "Amazon Web Services" -> "AWS"
+2. **Multi-skill strings** (joined by `/`, `OR`, `or`, `,`):
+   - If they are DISTINCT technologies -> return a LIST of individual canonical names.
+     e.g. "Python/TypeScript/C#" -> ["Python", "TypeScript", "C#"]
+     e.g. "Go/Ruby/Python" -> ["Go", "Ruby", "Python"]
+   - If they are SYNONYMS of ONE concept -> return a SINGLE generalized name.
+     e.g. "AWS/Azure/Google Cloud" -> "Cloud Platforms"
+     e.g. "MySQL/PostgreSQL/Oracle" -> "SQL Databases"
+3. **Formatting**: Standard capitalization (e.g. "iOS", "PostgreSQL", "Node.js").
+4. **Context**: Use Category to disambiguate when needed.
+5. **DO NOT over-generalize specific tools into broad categories**:
+   - "YAML" -> "YAML"  (NOT "Infrastructure as Code")
+   - "OpenSearch" -> "OpenSearch"  (NOT "Search")
+   - "Elasticsearch" -> "Elasticsearch"  (NOT "Search")
+   - "ModelSim" -> "ModelSim"  (NOT "Hardware Design")
+   - "Prometheus" -> "Prometheus"  (NOT "Monitoring")
+   - Only generalize when the raw input is ALREADY a category description, not a specific tool name.
+6. **Ambiguous acronyms must map to exactly ONE consistent canonical name**:
+   - "OT" -> "Operational Technology"
+   - "IaC" -> "Infrastructure as Code"
+   - Do NOT invent a new canonical for a known acronym.
+
+Input:
+{input_json}
+"""
+
+# Cached normalizations are only reused while the prompt is unchanged
+NORMALIZE_PROMPT_VERSION = hashlib.sha256(_NORMALIZE_PROMPT.encode()).hexdigest()[:12]
+
+# Local resolver (runs before the model; see SkillResolver)
+RESOLVER_MIN_FUZZY_LENGTH = 5      # Shorter keys ("go", "c++", "sql") only resolve exactly
+RESOLVER_MIN_SIMILARITY = 0.8      # Trigram Dice similarity a fuzzy match needs...
+RESOLVER_MIN_MARGIN = 0.1          # ...and its lead over the next best canonical name
+RESOLVER_JS_DENYLIST = {"angularjs"}  # Keys whose "js" names a different technology (AngularJS is not Angular)
+
+# Bedrock error codes that mean "slow down" rather than "this request is broken"
+_THROTTLING_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException", "ModelNotReadyException"}
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """True if a Bedrock call failed because of throttling or temporary unavailability."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") in _THROTTLING_CODES
+
+
+class AdaptiveConcurrency:
+    """
+    Async limit on concurrent Bedrock calls that adapts to throttling (AIMD).
+
+    The limit halves whenever a call is throttled and grows by one after
+    `limit` consecutive successful calls, up to `maximum`.
+
+    Usage:
+        concurrency = AdaptiveConcurrency()
+        async with concurrency:
+            ...  # one Bedrock call
+        concurrency.record_success()   # or record_throttle()
+    """
+
+    def __init__(self, initial: int = NORMALIZE_CONCURRENCY, maximum: int = NORMALIZE_MAX_CONCURRENCY):
+        self.maximum = maximum
+        self.limit = max(1, min(initial, maximum))
+        self.active = 0
+        self.throttled = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def record_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def record_throttle(self):
+        self.throttled += 1
+        self._successes = 0
+        if self.limit > 1:
+            self.limit = max(1, self.limit // 2)
+            logging.warning(f"🐢 Bedrock is throttling; concurrency limit lowered to {self.limit}")
+
+
+# Offer proficiency levels -> rank used to weight matches (listing API levels come as 1..5)
+LEVEL_RANKS: Dict[str, int] = {
+    "nice to have": 1,
+    "junior": 2,
+    "regular": 3,
+    "advanced": 4,
+    "master": 5,
+}
+
+
+def level_rank(level: Optional[str]) -> Optional[int]:
+    """Map a proficiency level ("Advanced", "4", ...) to its 1-5 rank, or None if unknown."""
+    if not level:
+        return None
+    level = str(level).strip().lower()
+    if level.isdigit():
+        return min(max(int(level), 1), 5)
+    return LEVEL_RANKS.get(level)
+
+
+def parse_tech_stack_items(tech_stack: str) -> List[Tuple[str, Optional[str]]]:
+    """Parse a legacy tech stack string into (raw skill, level) pairs."""
+    items: List[Tuple[str, Optional[str]]] = []
     ts_str = tech_stack.strip()
     
     # 1. Try JSON
@@ -77,37 +220,64 @@ def parse_tech_stack(tech_stack: str) -> List[str]:
         try:
             parsed = json.loads(ts_str)
             if isinstance(parsed, list):
-                return [str(s) for s in parsed]
+                return [(str(s), None) for s in parsed]
             elif isinstance(parsed, dict):
-                return [str(s) for s in parsed.keys()]
+                return [(str(s), str(level) if level is not None else None) for s, level in parsed.items()]
         except json.JSONDecodeError:
             pass
             
-    # 2. Text Parsing
+    # 2. Text Parsing ("name: level; name: level")
     delimiter = ';' if ';' in ts_str else ','
     parts = ts_str.split(delimiter)
     
     for p in parts:
         if ':' in p:
-            s_name = p.split(':', 1)[0].strip()
+            s_name, s_level = (part.strip() for part in p.split(':', 1))
         else:
-            s_name = p.strip()
+            s_name, s_level = p.strip(), ''
         
         if s_name:
-            skills_list.append(s_name)
+            items.append((s_name, s_level or None))
             
-    return skills_list
+    return items
+
+
+def parse_tech_stack(tech_stack: str) -> List[str]:
+    """Parse a tech stack string into a list of raw skills."""
+    return [name for name, _ in parse_tech_stack_items(tech_stack)]
+
+
+def offer_tech_stack(row) -> List[Tuple[str, Optional[str]]]:
+    """
+    Raw (skill, level) pairs of an offer row.
+
+    Reads the structured `tech_stack_items` Scout writes at scrape time and
+    only falls back to parsing the `tech_stack` text for offers scraped
+    before it existed.
+    """
+    items = row['tech_stack_items']
+    if items:
+        if isinstance(items, str):
+            items = json.loads(items)
+        return [(str(item['name']), item.get('level')) for item in items if item.get('name')]
+    tech_stack = row['tech_stack']
+    if isinstance(tech_stack, str):
+        return parse_tech_stack_items(tech_stack)
+    if isinstance(tech_stack, list):
+        return [(str(s), None) for s in tech_stack]
+    return []
 
 
 
 
 async def init_tables(conn: asyncpg.Connection):
     """Initialize necessary tables."""
-    # Ensure offer_skills exists
+    # Ensure offer_skills and the normalization cache exist
     project_root = Path(__file__).resolve().parent.parent.parent
-    schema_path = project_root / "backend" / "sql" / "tables" / "offer_skills.sql"
-    if schema_path.exists():
-        await conn.execute(schema_path.read_text())
+    for table in ("offer_skills", "skill_normalization_cache"):
+        schema_path = project_root / "backend" / "sql" / "tables" / f"{table}.sql"
+        if schema_path.exists():
+            await conn.execute(schema_path.read_text())
     
     # Ensure skills table has necessary columns/constraints (handled by schema)
     logging.info("✅ Tables initialized.")
@@ -121,9 +291,9 @@ async def extract_distinct_skills(conn: asyncpg.Connection):
     
     # Fetch all offers with tech_stack
     query = """
-        SELECT job_url, tech_stack, category
+        SELECT job_url, tech_stack, tech_stack_items, category
         FROM offers 
-        WHERE tech_stack IS NOT NULL
+        WHERE tech_stack IS NOT NULL OR tech_stack_items IS NOT NULL
     """
     rows = await conn.fetch(query)
     
@@ -143,10 +313,9 @@ async def extract_distinct_skills(conn: asyncpg.Connection):
     skill_category_map = {} # Keep one category sample for context
     
     for row in rows:
-        tech_stack = row['tech_stack']
         category = row['category']
         try:
-            skills_list = parse_tech_stack(str(tech_stack)) if tech_stack else []
+            skills_list = [name for name, _ in offer_tech_stack(row)]
 
             for skill in skills_list:
                 skill_clean = str(skill).strip()
@@ -184,8 +353,8 @@ async def extract_distinct_skills(conn: asyncpg.Connection):
         
     return distinct_skills, skill_category_map
 
-async def get_unnormalized_skills(conn: asyncpg.Connection, limit: int = 50) -> List[Dict]:
-    """Fetch skills that don't have a canonical name yet."""
+async def get_unnormalized_skills(conn: asyncpg.Connection, limit: Optional[int] = 50) -> List[Dict]:
+    """Fetch skills that don't have a canonical name yet (all of them if `limit` is None)."""
     query = """
         SELECT original_skill_name, category
         FROM skills
@@ -196,9 +365,184 @@ async def get_unnormalized_skills(conn: asyncpg.Connection, limit: int = 50) ->
     rows = await conn.fetch(query, limit)
     return [dict(row) for row in rows]
 
-def normalize_batch_with_ai(skills_data: List[Dict], bedrock_client) -> Dict[str, object]:
+def cache_key(raw_skill: str) -> str:
+    """Key of a raw skill in `skill_normalization_cache`."""
+    return raw_skill.strip().lower()
+
+
+async def load_cached_normalizations(conn: asyncpg.Connection, skills_data: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Look up pending skills in `skill_normalization_cache`.
+    Only entries written by the current model and prompt version count.
+    Returns: { "raw_skill": ["Canonical Name", ...] } for the cache hits.
+    """
+    keys = list({cache_key(s['original_skill_name']) for s in skills_data})
+    try:
+        rows = await conn.fetch("""
+            SELECT raw_key, canonical_names
+            FROM skill_normalization_cache
+            WHERE raw_key = ANY($1) AND model = $2 AND prompt_version = $3
+        """, keys, NORMALIZE_MODEL_ID, NORMALIZE_PROMPT_VERSION)
+    except asyncpg.exceptions.UndefinedTableError:
+        logging.warning("⚠️ skill_normalization_cache is missing (run migration 016); normalizing without cache.")
+        return {}
+    cached = {r['raw_key']: json.loads(r['canonical_names']) for r in rows}
+    return {
+        s['original_skill_name']: cached[cache_key(s['original_skill_name'])]
+        for s in skills_data
+        if cached.get(cache_key(s['original_skill_name']))
+    }
+
+
+async def store_cached_normalizations(conn: asyncpg.Connection, answers: Dict[str, object]):
+    """Write model answers into `skill_normalization_cache`, replacing older entries."""
+    rows = []
+    for raw, canonical in answers.items():
+        names = canonical if isinstance(canonical, list) else [canonical]
+        names = [str(name) for name in names if name]
+        if names:
+            rows.append((cache_key(raw), json.dumps(names), NORMALIZE_MODEL_ID, NORMALIZE_PROMPT_VERSION))
+    if not rows:
+        return
+    try:
+        await conn.executemany("""
+            INSERT INTO skill_normalization_cache (raw_key, canonical_names, model, prompt_version)
+            VALUES ($1, $2::jsonb, $3, $4)
+            ON CONFLICT (raw_key) DO UPDATE
+            SET canonical_names = EXCLUDED.canonical_names, model = EXCLUDED.model,
+                prompt_version = EXCLUDED.prompt_version, cached_at = CURRENT_TIMESTAMP
+        """, rows)
+    except asyncpg.exceptions.UndefinedTableError:
+        pass
+
+
+def skill_key(name: str) -> str:
+    """Normalized lookup key: lower-cased, without whitespace, dots, dashes and underscores."""
+    return re.sub(r'[\s.\-_]', '', name).lower()
+
+
+def _tokens(name: str) -> Set[str]:
+    return {token for token in re.split(r'[\s.\-_]+', name.lower()) if token}
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillResolver:
+    """
+    In-memory index of already normalized skills, used to resolve trivial
+    variants ("ReactJS", "React.js", "postgres") without an AI call.
+
+    A raw skill resolves when its key exactly matches a canonical name or a
+    previously normalized raw name (a trailing "js" is only dropped to reach a
+    canonical name that itself ends in ".js"/"JS"), or when one canonical
+    name is clearly the most similar by character trigrams and neither name
+    adds a whole token to the other ("Jenkins X" is not "Jenkins").
+    Multi-skill strings and ambiguous matches are left to the model.
+    """
+
+    def __init__(self, normalized_rows):
+        # Raw name -> all of its canonical names (a split raw skill has several rows)
+        by_original: Dict[str, Set[str]] = {}
+        for r in normalized_rows:
+            by_original.setdefault(r['original_skill_name'], set()).add(r['canonical_skill_name'])
+
+        candidates: Dict[str, Set[Tuple[str, ...]]] = {}
+        for original, canonicals in by_original.items():
+            candidates.setdefault(skill_key(original), set()).add(tuple(sorted(canonicals)))
+        self.canonicals: Dict[str, str] = {}
+        for canonicals in by_original.values():
+            for canonical in canonicals:
+                key = skill_key(canonical)
+                self.canonicals.setdefault(key, canonical)
+                candidates.setdefault(key, set()).add((canonical,))
+        # Keys claimed by different canonical names are ambiguous and never auto-resolved
+        self.exact = {key: options.pop() for key, options in candidates.items() if len(options) == 1}
+        self.ambiguous = {key for key, options in candidates.items() if len(options) > 1}
+
+        self.trigram_index: Dict[str, Set[str]] = {}
+        self.trigram_sets: Dict[str, Set[str]] = {}
+        for key in self.canonicals:
+            if len(key) >= RESOLVER_MIN_FUZZY_LENGTH and key not in self.ambiguous:
+                grams = _trigrams(key)
+                self.trigram_sets[key] = grams
+                for gram in grams:
+                    self.trigram_index.setdefault(gram, set()).add(key)
+
+    def resolve(self, raw: str) -> Tuple[Optional[List[str]], Optional[str]]:
+        """
+        Resolve a raw skill locally.
+        Returns: (canonical names, "exact" | "fuzzy"), or (None, None) if the model should decide.
+        """
+        if re.search(r'[/,]|\sor\s', raw, re.IGNORECASE):
+            return None, None
+        key = skill_key(raw)
+        if key in self.ambiguous:
+            return None, None
+        if key in self.exact:
+            return list(self.exact[key]), "exact"
+        if key.endswith('js') and len(key) > 4 and key not in RESOLVER_JS_DENYLIST:
+            stripped = key[:-2]
+            if stripped in self.ambiguous:
+                return None, None
+            canonicals = self.exact.get(stripped)
+            if canonicals and all(name.endswith(('.js', 'JS')) for name in canonicals):
+                return list(canonicals), "exact"
+
+        if len(key) < RESOLVER_MIN_FUZZY_LENGTH:
+            return None, None
+        grams = _trigrams(key)
+        scores = []
+        for candidate in {c for gram in grams for c in self.trigram_index.get(gram, ())}:
+            other = self.trigram_sets[candidate]
+            scores.append((2 * len(grams & other) / (len(grams) + len(other)), candidate))
+        if not scores:
+            return None, None
+        scores.sort(reverse=True)
+        best_score, best = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        if best_score >= RESOLVER_MIN_SIMILARITY and best_score - runner_up >= RESOLVER_MIN_MARGIN:
+            raw_tokens, canonical_tokens = _tokens(raw), _tokens(self.canonicals[best])
+            if raw_tokens < canonical_tokens or canonical_tokens < raw_tokens:
+                # A whole extra token ("Jenkins X" vs "Jenkins") makes it a different skill
+                return None, None
+            return [self.canonicals[best]], "fuzzy"
+        return None, None
+
+
+async def resolve_locally(conn: asyncpg.Connection, skills_data: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Resolve pending skills against the existing canonical names with `SkillResolver`.
+    Returns: { "raw_skill": ["Canonical Name", ...] } for the resolved skills.
+    """
+    rows = await conn.fetch(
+        "SELECT original_skill_name, canonical_skill_name FROM skills WHERE canonical_skill_name IS NOT NULL"
+    )
+    resolver = SkillResolver(rows)
+    resolved: Dict[str, List[str]] = {}
+    methods = {"exact": 0, "fuzzy": 0}
+    for skill in skills_data:
+        raw = skill['original_skill_name']
+        canonicals, method = resolver.resolve(raw)
+        if canonicals:
+            resolved[raw] = canonicals
+            methods[method] += 1
+            if method == "fuzzy":
+                logging.info(f"🔎 Fuzzy match: '{raw}' -> '{canonicals[0]}'")
+
+    rate = len(resolved) / len(skills_data) if skills_data else 0.0
+    logging.info(f"🔎 Local resolver: {len(resolved)}/{len(skills_data)} skills resolved ({rate:.1%}; "
+                 f"{methods['exact']} exact, {methods['fuzzy']} fuzzy) against {len(resolver.canonicals)} canonical names")
+    return resolved
+
+
+def normalize_batch_with_ai(skills_data: List[Dict], bedrock_client, answers: Optional[Dict[str, object]] = None) -> Dict[str, object]:
     """
     Step 3: Normalize a batch of skills using Bedrock.
+    If `answers` is given, it is filled with the normalizations that came from
+    the model itself (not hardcoded rules or identity fallbacks), for caching.
     Returns: { "raw_skill": "Canonical Name" }
             OR { "raw_skill": ["Name1", "Name2", ...] }  (when AI splits a multi-skill string)
     """
@@ -224,42 +568,7 @@ def normalize_batch_with_ai(skills_data: List[Dict], bedrock_client) -> Dict[str
     input_map = {s['original_skill_name']: s['category'] for s in remaining}
     input_json = json.dumps(input_map, indent=2)
     
-    prompt = f"""You are a technical data cleaner. Normalize raw technical skills scraped from job postings.
-
-Input is a JSON object: {{ "Raw Name": "Category" }}
-Output must be a JSON object where each value is either a STRING or a LIST OF STRINGS:
-  {{ "Raw Name": "Canonical Name" }}         -- single canonical name
-  {{ "Raw Name": ["Name1", "Name2", ...] }}  -- multiple canonical names (when splitting)
-
-Rules:
-1. **Single skills**: Return a single string.
-   - "React.js" -> "React"
-   - "NodeJS" -> "Node.js"
-   - "Amazon Web Services" -> "AWS"
-2. **Multi-skill strings** (joined by `/`, `OR`, `or`, `,`):
-   - If they are DISTINCT technologies -> return a LIST of individual canonical names.
-     e.g. "Python/TypeScript/C#" -> ["Python", "TypeScript", "C#"]
-     e.g. "Go/Ruby/Python" -> ["Go", "Ruby", "Python"]
-   - If they are SYNONYMS of ONE concept -> return a SINGLE generalized name.
-     e.g. "AWS/Azure/Google Cloud" -> "Cloud Platforms"
-     e.g. "MySQL/PostgreSQL/Oracle" -> "SQL Databases"
-3. **Formatting**: Standard capitalization (e.g. "iOS", "PostgreSQL", "Node.js").
-4. **Context**: Use Category to disambiguate when needed.
-5. **DO NOT over-generalize specific tools into broad categories**:
-   - "YAML" -> "YAML"  (NOT "Infrastructure as Code")
-   - "OpenSearch" -> "OpenSearch"  (NOT "Search")
-   - "Elasticsearch" -> "Elasticsearch"  (NOT "Search")
-   - "ModelSim" -> "ModelSim"  (NOT "Hardware Design")
-   - "Prometheus" -> "Prometheus"  (NOT "Monitoring")
-   - Only generalize when the raw input is ALREADY a category description, not a specific tool name.
-6. **Ambiguous acronyms must map to exactly ONE consistent canonical name**:
-   - "OT" -> "Operational Technology"
-   - "IaC" -> "Infrastructure as Code"
-   - Do NOT invent a new canonical for a known acronym.
-
-Input:
-{input_json}
-"""
+    prompt = _NORMALIZE_PROMPT.format(input_json=input_json)
 
     try:
         request_body = {
@@ -269,10 +578,7 @@ Input:
             "messages": [{"role": "user", "content": prompt}]
         }
         
-        model_id = "eu.anthropic.claude-sonnet-4-6" # Latest (Inference Profile)
-        # Fallback list if needed, similar to before
-        
-        response = bedrock_client.invoke_model(modelId=model_id, body=json.dumps(request_body))
+        response = bedrock_client.invoke_model(modelId=NORMALIZE_MODEL_ID, body=json.dumps(request_body))
         response_body = json.loads(response['body'].read())
         text = response_body['content'][0]['text'].strip()
         
@@ -301,6 +607,9 @@ Input:
                 logging.error(f"❌ JSON is too mangled: {e}")
                 return {}
         
+        if answers is not None:
+            answers.update({raw: result_map[raw] for raw in input_map if raw in result_map})
+
         input_keys = {s['original_skill_name'] for s in skills_data}
         missing = input_keys - set(result_map.keys())
 
@@ -313,9 +622,128 @@ Input:
         return result
 
     except Exception as e:
+        if is_throttling_error(e):
+            # Let the caller back off and retry the whole batch
+            raise
         logging.error(f"❌ AI Normalization failed: {e}")
         return result
 
+
+async def normalize_batch_with_retry(skills_data: List[Dict], bedrock_client, concurrency: AdaptiveConcurrency,
+                                     executor: ThreadPoolExecutor, deadline: float,
+                                     answers: Optional[Dict[str, object]] = None) -> Optional[Dict[str, object]]:
+    """
+    Run `normalize_batch_with_ai` in the thread pool, retrying throttled calls.
+    `answers` is passed through to collect the model's own answers.
+
+    Throttled attempts lower the concurrency limit and are retried after a
+    full-jitter exponential backoff (slept outside the concurrency slot).
+
+    Returns:
+        The normalization map ({} if the batch failed), or None if the batch
+        was not started because the time budget ran out.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(NORMALIZE_RETRIES):
+        async with concurrency:
+            if time.monotonic() > deadline:
+                return None
+            try:
+                result = await loop.run_in_executor(executor, normalize_batch_with_ai, skills_data, bedrock_client, answers)
+            except Exception as e:
+                if not is_throttling_error(e):
+                    logging.error(f"❌ AI Normalization failed: {e}")
+                    return {}
+                concurrency.record_throttle()
+                error = e
+            else:
+                concurrency.record_success()
+                return result
+        delay = random.uniform(0, min(NORMALIZE_BACKOFF_MAX, NORMALIZE_BACKOFF_BASE * 2 ** attempt))
+        logging.warning(f"⏳ Batch throttled ({error}); retry {attempt + 1}/{NORMALIZE_RETRIES - 1} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+    logging.error(f"❌ Batch still throttled after {NORMALIZE_RETRIES} attempts; {len(skills_data)} skills stay pending")
+    return {}
+
+
+async def normalize_pending_skills(conn: asyncpg.Connection, bedrock_client) -> int:
+    """
+    Steps 2 & 3: Normalize every pending skill with concurrent Bedrock calls.
+
+    Skills found in `skill_normalization_cache`, or that `SkillResolver`
+    matches to an existing canonical name, are resolved without a call.
+    The rest are split into batches up front and dispatched
+    through an `AdaptiveConcurrency` limit; each batch's canonical names are
+    written (and cached) as soon as it returns. Batches that fail or do not start within
+    `NORMALIZE_TIME_BUDGET` stay NULL for the next run.
+
+    Returns:
+        Number of skills normalized.
+    """
+    pending = await get_unnormalized_skills(conn, limit=None)
+    if not pending:
+        logging.info("No more un-normalized skills.")
+        return 0
+
+    normalized_count = 0
+    cached = await load_cached_normalizations(conn, pending)
+    if cached:
+        await update_canonical_names(conn, cached)
+        normalized_count += len(cached)
+        pending = [s for s in pending if s['original_skill_name'] not in cached]
+    logging.info(f"💾 Normalization cache: {len(cached)} hits, {len(pending)} skills left "
+                 f"(prompt version {NORMALIZE_PROMPT_VERSION})")
+    if not pending:
+        return normalized_count
+
+    resolved = await resolve_locally(conn, pending)
+    if resolved:
+        await update_canonical_names(conn, resolved)
+        normalized_count += len(resolved)
+        pending = [s for s in pending if s['original_skill_name'] not in resolved]
+    if not pending:
+        return normalized_count
+
+    cap = NORMALIZE_BATCH_SIZE * NORMALIZE_MAX_BATCHES
+    if len(pending) > cap:
+        logging.error(f"🛑 More than {cap} un-normalized skills; normalizing the first {NORMALIZE_MAX_BATCHES} "
+                      f"batches only to prevent runaway costs.")
+        pending = pending[:cap]
+
+    batches = [pending[i:i + NORMALIZE_BATCH_SIZE] for i in range(0, len(pending), NORMALIZE_BATCH_SIZE)]
+    concurrency = AdaptiveConcurrency()
+    started = time.monotonic()
+    deadline = started + NORMALIZE_TIME_BUDGET
+    logging.info(f"Normalizing {len(pending)} skills in {len(batches)} batches "
+                 f"({concurrency.limit} concurrent calls, max {concurrency.maximum})...")
+
+    async def run_batch(batch: List[Dict]):
+        answers: Dict[str, object] = {}
+        normalized_map = await normalize_batch_with_retry(batch, bedrock_client, concurrency, executor, deadline, answers)
+        return normalized_map, answers
+
+    failed = skipped = 0
+    with ThreadPoolExecutor(max_workers=NORMALIZE_MAX_CONCURRENCY) as executor:
+        tasks = [asyncio.create_task(run_batch(batch)) for batch in batches]
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            normalized_map, answers = await task
+            if normalized_map is None:
+                skipped += 1
+                continue
+            if normalized_map:
+                await update_canonical_names(conn, normalized_map)
+                await store_cached_normalizations(conn, answers)
+                normalized_count += len(normalized_map)
+            else:
+                failed += 1
+                logging.warning("Empty response from AI; its skills stay pending.")
+            logging.info(f"Batch {done}/{len(batches)} done ({normalized_count} skills normalized, "
+                         f"concurrency limit {concurrency.limit})")
+
+    logging.info(f"✅ Normalized {normalized_count} skills in {time.monotonic() - started:.1f}s: "
+                 f"{failed} batches failed, {skipped} not started (time budget), {concurrency.throttled} throttled calls")
+    return normalized_count
+
 async def update_canonical_names(conn: asyncpg.Connection, mapping: Dict[str, object]):
     """
     Update the skills table with normalized names.
@@ -623,38 +1051,42 @@ async def link_offers_to_skills(conn: asyncpg.Connection):
 
     logging.info(f"Loaded {len(skill_map)} distinct raw skills for linking.")
 
-    query = "SELECT job_url, tech_stack FROM offers WHERE tech_stack IS NOT NULL"
+    query = """
+        SELECT job_url, tech_stack, tech_stack_items
+        FROM offers
+        WHERE tech_stack IS NOT NULL OR tech_stack_items IS NOT NULL
+    """
 
     async with conn.transaction():
         async for row in conn.cursor(query):
             job_url = row['job_url']
-            tech_stack = row['tech_stack']
 
             # Parse stack
             try:
-                if isinstance(tech_stack, str):
-                    skills_list = parse_tech_stack(tech_stack)
-                elif isinstance(tech_stack, list):
-                    skills_list = [str(s) for s in tech_stack]
-                else:
-                    skills_list = []
+                skills_list = offer_tech_stack(row)
             except Exception:
                 skills_list = []
 
-            # Link offer to ALL canonical rows for each raw skill
-            to_link = []
-            for s in skills_list:
-                s_clean = s.strip() if isinstance(s, str) else str(s)
+            # Link offer to ALL canonical rows for each raw skill, carrying the
+            # required level (the highest one if several raw skills share a row)
+            to_link: Dict[object, Tuple[Optional[str], Optional[int]]] = {}
+            for s, level in skills_list:
+                s_clean = s.strip()
+                rank = level_rank(level)
                 for uid in skill_map.get(s_clean, []):
-                    to_link.append((job_url, uid))
+                    if uid not in to_link or (rank or 0) > (to_link[uid][1] or 0):
+                        to_link[uid] = (level, rank)
 
             if to_link:
                 try:
                     await conn.executemany("""
-                        INSERT INTO offer_skills (job_url, skill_id)
-                        VALUES ($1, $2::uuid)
-                        ON CONFLICT (job_url, skill_id) DO NOTHING
-                    """, to_link)
+                        INSERT INTO offer_skills (job_url, skill_id, skill_level, level_rank)
+                        VALUES ($1, $2::uuid, $3, $4)
+                        ON CONFLICT (job_url, skill_id) DO UPDATE
+                        SET skill_level = EXCLUDED.skill_level, level_rank = EXCLUDED.level_rank
+                        WHERE offer_skills.level_rank IS DISTINCT FROM EXCLUDED.level_rank
+                           OR offer_skills.skill_level IS DISTINCT FROM EXCLUDED.skill_level
+                    """, [(job_url, uid, level, rank) for uid, (level, rank) in to_link.items()])
                 except Exception as e:
                     logging.error(f"Link error {job_url}: {e}")
                      
@@ -675,7 +1107,8 @@ async def run_normalization_process(stage: str = 'all', clear_first: bool = Fals
         if clear_first:
             await clear_skills_tables(conn)
 
-        bedrock = boto3.client('bedrock-runtime', region_name=os.getenv('AWS_REGION', 'eu-central-1'))
+        region = os.getenv('AWS_REGION', 'eu-central-1')
+        bedrock = boto3.client('bedrock-runtime', region_name=region)
 
         if stage in ['all', 'extract']:
             # 1. Extract Distinct (only if not skipping)
@@ -684,28 +1117,13 @@ async def run_normalization_process(stage: str = 'all', clear_first: bool = Fals
 
         normalized_count = 0
         if stage in ['all', 'normalize']:
-            # 2 & 3. Normalize Loop
-            MAX_ITERATIONS = 200
-            iteration = 0
-            while iteration < MAX_ITERATIONS:
-                batch = await get_unnormalized_skills(conn, limit=50)
-                if not batch:
-                    logging.info("No more un-normalized skills.")
-                    break
-                
-                iteration += 1
-                logging.info(f"Normalizing batch of {len(batch)} skills... (iteration {iteration}/{MAX_ITERATIONS})")
-                normalized_map = normalize_batch_with_ai(batch, bedrock)
-                
-                if normalized_map:
-                    await update_canonical_names(conn, normalized_map)
-                    normalized_count += len(normalized_map)
-                else:
-                    logging.warning("Empty response from AI, stopping or skipping.")
-                    break
-            else:
-                logging.error(f"🛑 Normalization loop hit {MAX_ITERATIONS} iteration limit. "
-                              f"Stopping to prevent runaway costs.")
+            # 2 & 3. Normalize; throttling is retried by normalize_batch_with_retry, not botocore,
+            # so the concurrency limit sees it
+            normalize_client = boto3.client('bedrock-runtime', region_name=region, config=Config(
+                retries={'mode': 'standard', 'max_attempts': 1},
+                max_pool_connections=NORMALIZE_MAX_CONCURRENCY,
+            ))
+            normalized_count = await normalize_pending_skills(conn, normalize_client)
 
         if stage in ['all', 'deduplicate']:
             if stage == 'deduplicate' or normalized_count > 0:
@@ -0,0 +1,268 @@
+# archive.py
+"""
+Raw HTML archive of offer pages, and re-extraction from it.
+
+With `ARCHIVE_HTML = True` every offer page Scout extracts is stored
+gzip-compressed and content-addressed (by the SHA-256 of its HTML) under
+`ARCHIVE_DIR`, laid out like an object-store bucket:
+
+    objects/<sha[:2]>/<sha>.html.gz     one object per distinct page
+    index/<host>-<pid>.ndjson           {"job_url", "sha256", "source", "archived_at"} per archived page
+
+Identical pages are stored once, and each process appends to its own index
+file, so concurrent workers never write the same key. When selectors break or
+a field is added, the whole corpus can be re-extracted without any network
+traffic:
+
+    PYTHONPATH=services python -m scout.archive reextract [--workers 8] [--dry-run]
+
+`reextract` takes the latest archived page of every offer, parses the pages
+in a process pool with the static extractor (`http_fetch.parse_offer_page`,
+which resolves the same compiled selector config as the in-page script),
+merges each result with the stored row and updates the changed offers in
+batches.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from dotenv import load_dotenv
+
+from .config import ScrapingConfig
+from .db import CONTENT_COLUMNS, init_db_connection
+from .salary import PARSED_SALARY_COLUMNS, parse_salaries
+
+# Columns re-extraction refreshes (listing_hash and timestamps are left alone)
+REEXTRACT_COLUMNS = ("job_url",) + CONTENT_COLUMNS + ("content_hash",) + PARSED_SALARY_COLUMNS + ("tech_stack_items",)
+
+_STAGING_DDL = """
+    CREATE TEMP TABLE offers_reextract (LIKE offers INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+
+_STORED_SQL = f"""
+    SELECT job_url, content_hash, tech_stack_items, {", ".join(CONTENT_COLUMNS)}
+    FROM offers
+    WHERE job_url = ANY($1::text[])
+"""
+
+# Records are already merged with the stored rows (see `_merge`)
+_UPDATE_SQL = f"""
+    UPDATE offers o
+    SET {", ".join(f"{column} = r.{column}" for column in REEXTRACT_COLUMNS[1:])}
+    FROM offers_reextract r
+    WHERE o.job_url = r.job_url
+      AND o.content_hash IS DISTINCT FROM r.content_hash
+"""
+
+
+class HtmlArchive:
+    """
+    Content-addressed, gzip-compressed store of offer page HTML.
+
+    Args:
+        root: Archive directory (defaults to `ARCHIVE_DIR`)
+    """
+
+    def __init__(self, root: str | Path = None):
+        self.root = Path(root or ScrapingConfig.ARCHIVE_DIR)
+        self.index_path = self.root / "index" / f"{socket.gethostname()}-{os.getpid()}.ndjson"
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_stored = 0
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.html.gz"
+
+    def _write(self, job_url: str, html: str, source: str):
+        data = html.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.object_path(sha256)
+        if path.exists():
+            self.deduplicated += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            compressed = gzip.compress(data, compresslevel=ScrapingConfig.ARCHIVE_COMPRESS_LEVEL)
+            # Write under a temporary name first so readers never see a partial object
+            tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, path)
+            self.stored += 1
+            self.bytes_stored += len(compressed)
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "job_url": job_url,
+            "sha256": sha256,
+            "source": source,
+            "archived_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    async def put(self, job_url: str, html: str, source: str = "http"):
+        """Archive one page (hashing and compression run in a thread); failures are only logged."""
+        try:
+            await asyncio.to_thread(self._write, job_url, html, source)
+        except OSError as e:
+            logging.warning(f"⚠️ Could not archive {job_url}: {e}")
+
+    def latest(self) -> dict[str, str]:
+        """Latest archived page per offer URL, read from every index file."""
+        entries = []
+        for index_file in sorted((self.root / "index").glob("*.ndjson")):
+            with open(index_file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        entries.sort(key=lambda entry: entry["archived_at"])
+        return {entry["job_url"]: entry["sha256"] for entry in entries}
+
+    def log_summary(self):
+        if self.stored or self.deduplicated:
+            logging.info(
+                f"🗄️ Archive: {self.stored} pages stored ({self.bytes_stored / 1024 / 1024:.1f} MB compressed), "
+                f"{self.deduplicated} unchanged pages deduplicated"
+            )
+
+
+def _reextract_one(task: tuple[str, str]) -> dict | None:
+    """Process pool worker: parse one archived page into an `offers` row."""
+    # Imported here so the parent process does not need the parser until the pool starts
+    from .http_fetch import parse_offer_page
+    from .scrape_core import build_offer_data
+
+    job_url, path = task
+    try:
+        html = gzip.decompress(Path(path).read_bytes()).decode("utf-8")
+        offer_data = build_offer_data(job_url, parse_offer_page(html, job_url))
+    except Exception as e:
+        logging.warning(f"⚠️ Could not re-extract {job_url}: {e}")
+        return None
+    if not offer_data.get("job_title"):
+        # Not an offer page (e.g. an error page); never overwrite good data with it
+        return None
+    return offer_data
+
+
+def _merge(offer_data: dict, stored) -> tuple | None:
+    """
+    Merge a re-extracted offer with its stored row into a `REEXTRACT_COLUMNS` record.
+
+    Fields the archived page did not yield keep their stored value (e.g. ones
+    that came from listing data). The content hash and parsed salaries are
+    recomputed from the merged values, so a partial extraction of an unchanged
+    offer hashes like the stored row.
+
+    Returns:
+        tuple | None: Record for the staging table, or None if the offer is unchanged
+    """
+    # scrape_core imports this module for the archive it writes
+    from .scrape_core import offer_content_hash
+
+    merged = dict(offer_data)
+    for column in CONTENT_COLUMNS + ("tech_stack_items",):
+        if merged.get(column) is None:
+            merged[column] = stored[column]
+    merged["content_hash"] = offer_content_hash(merged)
+    if merged["content_hash"] == stored["content_hash"]:
+        return None
+    merged.update(parse_salaries(merged))
+    return tuple(merged.get(column) for column in REEXTRACT_COLUMNS)
+
+
+async def reextract(conn, archive: HtmlArchive, workers: int = None, batch_size: int = None, dry_run: bool = False) -> int:
+    """
+    Re-extract every archived offer that is still in the database and update changed rows.
+
+    Args:
+        conn: Database connection
+        archive: Archive to read pages from
+        workers: Parser processes (defaults to `REEXTRACT_WORKERS`, else the CPU count)
+        batch_size: Offers parsed and written per batch (defaults to `REEXTRACT_BATCH_SIZE`)
+        dry_run: Parse and count, but do not write
+
+    Returns:
+        int: Number of offers updated (or that would be, with `dry_run`)
+    """
+    workers = workers or ScrapingConfig.REEXTRACT_WORKERS or os.cpu_count() or 1
+    batch_size = batch_size or ScrapingConfig.REEXTRACT_BATCH_SIZE
+    latest = archive.latest()
+    current = {record["job_url"] for record in await conn.fetch("SELECT job_url FROM offers")}
+    tasks = [(url, str(archive.object_path(sha256))) for url, sha256 in latest.items() if url in current]
+    logging.info(f"🗄️ Re-extracting {len(tasks)} archived offers ({len(latest) - len(tasks)} no longer in the database) with {workers} processes")
+
+    started = time.monotonic()
+    loop = asyncio.get_running_loop()
+    parsed = failed = updated = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(tasks), batch_size):
+            batch = tasks[start:start + batch_size]
+            results = await asyncio.gather(*(loop.run_in_executor(pool, _reextract_one, task) for task in batch))
+            offers = [offer_data for offer_data in results if offer_data is not None]
+            parsed += len(offers)
+            failed += len(batch) - len(offers)
+            records = []
+            if offers:
+                stored = {
+                    row["job_url"]: row
+                    for row in await conn.fetch(_STORED_SQL, [offer_data["job_url"] for offer_data in offers])
+                }
+                for offer_data in offers:
+                    if offer_data["job_url"] in stored:
+                        record = _merge(offer_data, stored[offer_data["job_url"]])
+                        if record is not None:
+                            records.append(record)
+            if records and not dry_run:
+                async with conn.transaction():
+                    await conn.execute(_STAGING_DDL)
+                    await conn.copy_records_to_table("offers_reextract", records=records, columns=list(REEXTRACT_COLUMNS))
+                    result = await conn.execute(_UPDATE_SQL)
+                updated += int(result.split()[-1])
+            elif dry_run:
+                updated += len(records)
+            logging.info(f"🗄️ {start + len(batch)}/{len(tasks)} pages parsed, {updated} offers changed so far")
+
+    elapsed = time.monotonic() - started
+    logging.info(
+        f"✅ Re-extracted {parsed} offers in {elapsed:.1f}s ({parsed / elapsed if elapsed > 0 else 0:.0f} pages/sec), "
+        f"{failed} pages unusable, {f'{updated} offers would change (dry run, nothing written)' if dry_run else f'{updated} offers updated'}"
+    )
+    return updated
+
+
+async def _reextract(args):
+    conn = await init_db_connection()
+    try:
+        await reextract(conn, HtmlArchive(args.archive), args.workers, args.batch_size, args.dry_run)
+    finally:
+        await conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scout HTML archive tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("reextract", help="Re-run extraction over the archived pages and update the database")
+    command.add_argument("--archive", type=Path, help=f"Archive directory (default {ScrapingConfig.ARCHIVE_DIR})")
+    command.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+    command.add_argument("--batch-size", type=int, help=f"Offers per parse/write batch (default {ScrapingConfig.REEXTRACT_BATCH_SIZE})")
+    command.add_argument("--dry-run", action="store_true", help="Parse every page but write nothing")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    asyncio.run(_reextract(args))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
@@ -0,0 +1,285 @@
+# bench.py
+"""
+Offline extraction benchmark for Scout.
+
+Serves the saved-page corpus in `fixtures/` (a listing page and offer pages)
+from a local HTTP server, then runs `collect_offer_links` and `scrape_offer`
+against it. Reports offer pages/sec, per-field latency and field-level
+accuracy against the golden JSON files. No network or database is needed,
+so scraper performance changes can be measured in CI:
+
+    PYTHONPATH=services python -m scout.bench --repeat 3 --json bench.json --min-accuracy 1.0
+
+It also checks that the static HTTP-first extraction (`http_fetch.parse_offer_page`)
+yields the same `content_hash` as the golden values and as the browser, so
+the two fetch tiers never rewrite an unchanged offer; `--parity-only` runs
+just that check, without a browser.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .config import ScrapingConfig
+from .db import CONTENT_COLUMNS
+from .http_fetch import parse_offer_page
+from .listing import OFFER_URL_PREFIX
+from . import scrape_core
+from .scrape_core import init_browser, close_http_fetcher, build_offer_data, collect_offer_links, offer_content_hash, scrape_offer
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serve fixtures under the site's extension-less paths (/job-offers, /job-offer/<slug>)."""
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if not Path(path).suffix:
+            self.path = f"{path.rstrip('/')}.html"
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory: Path) -> tuple[ThreadingHTTPServer, str]:
+    """Serve `directory` on a free localhost port; returns the server and its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def load_golden(directory: Path) -> dict[str, dict]:
+    """Expected `offers` values per offer slug."""
+    return {path.stem: json.loads(path.read_text()) for path in sorted((directory / "golden").glob("*.json"))}
+
+
+def static_offers(directory: Path, golden: dict[str, dict]) -> dict[str, dict]:
+    """Offer rows the HTTP-first tier builds from the saved pages, per offer slug."""
+    offers = {}
+    for slug in golden:
+        url = f"{OFFER_URL_PREFIX}{slug}"
+        html = (directory / "job-offer" / f"{slug}.html").read_text()
+        offers[slug] = build_offer_data(url, parse_offer_page(html, url))
+    return offers
+
+
+def hash_parity(expected: dict[str, dict], actual: dict[str, dict]) -> dict:
+    """Compare `content_hash` per offer; mismatches list the columns that differ."""
+    mismatches = []
+    for slug, offer in actual.items():
+        if offer_content_hash(offer) != offer_content_hash(expected[slug]):
+            columns = [column for column in CONTENT_COLUMNS if _normalize(offer.get(column)) != _normalize(expected[slug].get(column))]
+            mismatches.append({"offer": slug, "columns": columns})
+    return {"offers": len(actual), "matching": len(actual) - len(mismatches), "mismatches": mismatches}
+
+
+def _normalize(value) -> str | None:
+    """Collapse whitespace so layout-dependent line breaks in innerText do not count as errors."""
+    if value is None:
+        return None
+    return " ".join(str(value).split()) or None
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+async def bench_links(page, base_url: str, expected: set[str]) -> dict:
+    """Collect links from the fixture listing and compare them with the golden offers."""
+    await page.goto(f"{base_url}/job-offers", timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
+    started = time.monotonic()
+    urls = await collect_offer_links(page)
+    elapsed = time.monotonic() - started
+    found = {url.rsplit("/", 1)[-1] for url in urls}
+    return {
+        "seconds": round(elapsed, 2),
+        "expected": len(expected),
+        "found": len(found),
+        "missing": sorted(expected - found),
+        "unexpected": sorted(found - expected),
+    }
+
+
+async def bench_offers(page, base_url: str, golden: dict[str, dict], repeat: int, static: dict[str, dict] | None = None) -> dict:
+    """
+    Scrape every fixture offer `repeat` times, timing fields and checking them against golden values.
+
+    With `static` (see `static_offers`), the first pass's offers are also
+    hash-compared with the HTTP-first results (`hash_parity`).
+    """
+    timings: dict[str, list[float]] = {}
+    scraped = {}
+    correct = {column: 0 for column in CONTENT_COLUMNS}
+    mismatches = []
+    pages = 0
+
+    started = time.monotonic()
+    for run in range(repeat):
+        for slug, expected in golden.items():
+            page_timings = {}
+            offer = await scrape_offer(page, f"{base_url}/job-offer/{slug}", timings=page_timings)
+            pages += 1
+            if run == 0:
+                scraped[slug] = offer
+            for field, ms in page_timings.items():
+                timings.setdefault(field, []).append(ms)
+            for column in CONTENT_COLUMNS:
+                if _normalize(offer.get(column)) == _normalize(expected.get(column)):
+                    correct[column] += 1
+                elif run == 0:
+                    mismatches.append({"offer": slug, "field": column, "expected": expected.get(column), "actual": offer.get(column)})
+    elapsed = time.monotonic() - started
+
+    fields = {}
+    for column in CONTENT_COLUMNS:
+        # Salary columns share one in-page timing
+        samples = timings.get("salary" if column.startswith("salary_") else column, [])
+        fields[column] = {
+            "accuracy": round(correct[column] / pages, 4) if pages else 0.0,
+            "extract_p50_ms": _percentile(samples, 50),
+            "extract_p95_ms": _percentile(samples, 95),
+        }
+    readiness = {
+        field: {"wait_p50_ms": scrape_core._readiness.percentile(field, 50), "wait_p95_ms": scrape_core._readiness.percentile(field, 95)}
+        for field in scrape_core._readiness.fields
+    }
+    report = {
+        "pages": pages,
+        "seconds": round(elapsed, 2),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed > 0 else 0.0,
+        "accuracy": round(sum(correct.values()) / (pages * len(CONTENT_COLUMNS)), 4) if pages else 0.0,
+        "fields": fields,
+        "readiness": readiness,
+        "mismatches": mismatches,
+    }
+    if scrape_core._http_fetcher is not None:
+        report["http_hit_rate"] = round(scrape_core._http_fetcher.hit_rate, 4)
+    if static is not None:
+        report["hash_parity"] = hash_parity(static, scraped)
+    return report
+
+
+def _log_parity(label: str, parity: dict):
+    logging.info(f"#️⃣ {label} content hashes: {parity['matching']}/{parity['offers']} match")
+    for mismatch in parity["mismatches"]:
+        logging.warning(f"❌ {mismatch['offer']} hashes differ on {', '.join(mismatch['columns']) or 'whitespace only'}")
+
+
+def _parity_failed(report: dict) -> bool:
+    sections = [report.get("parity"), report.get("offers", {}).get("hash_parity")]
+    return any(section and section["mismatches"] for section in sections)
+
+
+def log_report(report: dict):
+    """Log a human-readable summary of a benchmark report."""
+    links = report.get("links")
+    if links:
+        logging.info(
+            f"🔗 Links: {links['found']}/{links['expected']} collected in {links['seconds']}s "
+            f"(missing {links['missing'] or 'none'}, unexpected {links['unexpected'] or 'none'})"
+        )
+    parity = report.get("parity")
+    if parity:
+        _log_parity("HTTP-first vs golden", parity)
+    offers = report.get("offers")
+    if not offers:
+        return
+    if "hash_parity" in offers:
+        _log_parity("Browser vs HTTP-first", offers["hash_parity"])
+    logging.info(f"⏱️ Offers: {offers['pages']} pages in {offers['seconds']}s ({offers['pages_per_sec']} pages/sec)")
+    if "http_hit_rate" in offers:
+        logging.info(f"🌐 HTTP-first hit rate: {offers['http_hit_rate']:.0%}")
+    for field, stats in offers["readiness"].items():
+        logging.info(f"⏳ Ready {field}: p50 {stats['wait_p50_ms'] or 0:.1f} ms, p95 {stats['wait_p95_ms'] or 0:.1f} ms")
+    for column, stats in offers["fields"].items():
+        logging.info(
+            f"📐 {column:<22} accuracy {stats['accuracy']:.0%}  "
+            f"extract p50 {stats['extract_p50_ms'] or 0:.2f} ms, p95 {stats['extract_p95_ms'] or 0:.2f} ms"
+        )
+    for mismatch in offers["mismatches"]:
+        logging.warning(f"❌ {mismatch['offer']} {mismatch['field']}: expected {mismatch['expected']!r}, got {mismatch['actual']!r}")
+    logging.info(f"🎯 Field accuracy: {offers['accuracy']:.2%}")
+
+
+async def run_benchmark(fixtures: Path = FIXTURES_DIR, repeat: int = 1, links: bool = True, lean: bool = False, http_first: bool = False) -> dict:
+    """
+    Run the link and offer benchmarks against a fixture corpus.
+
+    Args:
+        fixtures: Directory with `job-offers.html`, `job-offer/<slug>.html` and `golden/<slug>.json`
+        repeat: Passes over the offer pages
+        links: Also benchmark `collect_offer_links` on the listing page
+        lean: Run with lean mode request blocking
+        http_first: Fetch offers over plain HTTP first, rendering only misses
+
+    Returns:
+        dict: Report with `parity`, `links` (optional) and `offers` sections
+    """
+    golden = load_golden(fixtures)
+    static = static_offers(fixtures, golden)
+    report = {"parity": hash_parity(golden, static)}
+    server, base_url = start_server(fixtures)
+    if lean:
+        # The fixture server is the only host the pages need
+        ScrapingConfig.ALLOWED_HOSTS = tuple(ScrapingConfig.ALLOWED_HOSTS) + ("127.0.0.1",)
+    playwright, browser, page = await init_browser(headless=ScrapingConfig.HEADLESS, lean=lean, http_first=http_first)
+    try:
+        if links:
+            # collect_offer_links exposes a page-scoped binding, so it gets its own page
+            listing_page = await page.context.new_page()
+            report["links"] = await bench_links(listing_page, base_url, set(golden))
+            await listing_page.close()
+        report["offers"] = await bench_offers(page, base_url, golden, repeat, static)
+    finally:
+        await browser.close()
+        await playwright.stop()
+        await close_http_fetcher()
+        server.shutdown()
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Scout extraction against the offline fixture corpus.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Fixture corpus directory")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the offer pages")
+    parser.add_argument("--no-links", action="store_true", help="Skip the listing / link collection benchmark")
+    parser.add_argument("--lean", action="store_true", help="Enable lean mode request blocking")
+    parser.add_argument("--http-first", action="store_true", help="Fetch offers over plain HTTP first (browser only for misses)")
+    parser.add_argument("--parity-only", action="store_true", help="Only check HTTP-first content hashes against the golden values (no browser)")
+    parser.add_argument("--json", type=Path, help="Write the report as JSON to this path")
+    parser.add_argument("--min-accuracy", type=float, help="Exit non-zero below this field accuracy (0-1), on missing links or on content hash mismatches")
+    args = parser.parse_args(argv)
+
+    if args.parity_only:
+        golden = load_golden(args.fixtures)
+        report = {"parity": hash_parity(golden, static_offers(args.fixtures, golden))}
+    else:
+        report = asyncio.run(run_benchmark(args.fixtures, args.repeat, links=not args.no_links, lean=args.lean, http_first=args.http_first))
+    log_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        logging.info(f"💾 Report written to {args.json}")
+
+    if args.parity_only:
+        return 1 if _parity_failed(report) else 0
+    if args.min_accuracy is not None:
+        if report["offers"]["accuracy"] < args.min_accuracy or report.get("links", {}).get("missing") or _parity_failed(report):
+            logging.error("❌ Benchmark below the required accuracy")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
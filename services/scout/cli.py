@@ -1,10 +1,17 @@
 # cli.py
 import asyncio, logging
 import os
+import time
 from dotenv import load_dotenv
 
-from .db import init_db_connection, check_connection, reconnect_db, cleanup_empty_offers, purge_stale_offers
-from .scrape_core import init_browser, collect_offer_links, process_offers
+from .db import init_db_connection, init_db_pool, check_connection, reconnect_db, cleanup_empty_offers, purge_stale_offers, purge_inactive_offers
+from .scrape_core import init_browser, close_http_fetcher, build_offer_data, collect_offer_links, collect_offer_links_faceted, log_throughput, process_offers, scrape_offers, work_queue
+from .listing import ListingCapture, needs_detail_page
+from .writer import OfferWriter
+from .sink import NdjsonSink
+from .journal import RunJournal
+from .scrape_queue import ScrapeQueue
+from .metrics import RUN_SECONDS, phase, write_reports
 from .config import ScrapingConfig
 from .aws_secrets import setup_database_credentials_from_secrets
 from .invoke_normalize import invoke_normalize_lambda
@@ -28,23 +35,81 @@ async def main():
 
     This function orchestrates the entire scraping process:
     - Initializes browser and navigates to JustJoin.it.
-    - Collects job offer links and determines new offers.
+    - Collects job offer links (or resumes an interrupted run from its journal)
+      and determines new offers.
     - Processes new offers and inserts them into the database.
-    - Closes all resources and logs completion.
+    - Closes all resources, writes the run's metrics reports and logs completion.
+
+    With SCOUT_SINK=ndjson (default `ScrapingConfig.SINK`) the run needs no
+    database at all (see `run_export`).
+
+    The role comes from the SCOUT_ROLE env var (default `ScrapingConfig.ROLE`):
+    "standalone" does all of the above in one process; "coordinator" queues
+    the offers that need a detail visit in `scrape_queue` and waits for the
+    workers before purging; "worker" only scrapes claimed offers (see `run_worker`).
     """
+    role = os.getenv("SCOUT_ROLE", ScrapingConfig.ROLE)
+    sink = os.getenv("SCOUT_SINK", ScrapingConfig.SINK)
+    if sink == "ndjson":
+        await run_export()
+        return
+    if sink != "postgres":
+        raise ValueError(f"Unknown SCOUT_SINK: {sink!r} (expected postgres or ndjson)")
+    if role == "worker":
+        await run_worker()
+        return
+    if role not in ("standalone", "coordinator"):
+        raise ValueError(f"Unknown SCOUT_ROLE: {role!r} (expected standalone, coordinator or worker)")
+    logging.info(f"🧭 Running as {role}")
+
+    run_started = time.monotonic()
 
     conn = await init_db_connection()
+    pool = await init_db_pool(max_size=ScrapingConfig.DB_POOL_SIZE)
+    journal = RunJournal(pool)
+    # Offers count as done in the journal only once the writer has flushed them
+    writer = OfferWriter(pool, on_written=journal.record)
+    writer.start()
+    queue = ScrapeQueue(pool) if role == "coordinator" else None
+    resumed = ScrapingConfig.RESUME_RUNS and await journal.resume()
+    if queue is not None and not resumed:
+        # Workers must not pick up an older run's queue while this one collects links
+        await journal.abandon_running()
     playwright, browser, page = await init_browser(headless=ScrapingConfig.HEADLESS)
 
-    await page.goto("https://justjoin.it/job-offers", timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
+    # In listing mode, capture the offer data the listing page fetches while we scroll
+    capture = None
+    if ScrapingConfig.SCRAPE_MODE == "listing" and not resumed:
+        capture = ListingCapture()
+        capture.attach(page)
+
+    if not resumed:
+        await page.goto(ScrapingConfig.LISTING_URL, timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
 
     try:
-        # Collect job offer links
-        offer_urls = await collect_offer_links(page)
- 
-        if not offer_urls:
-            logging.warning("⚠️ No job offer links found")
-            return
+        if resumed:
+            # The interrupted run already collected (and checkpointed) the links
+            offer_urls = journal.urls
+            listing_rows = journal.listing_rows
+        else:
+            # Collect job offer links
+            with phase("collect_links"):
+                if ScrapingConfig.LINK_COLLECTION == "faceted":
+                    offer_urls = await collect_offer_links_faceted(page, capture=capture)
+                else:
+                    offer_urls = await collect_offer_links(page)
+
+            listing_rows = None
+            if capture is not None:
+                await capture.drain()
+                listing_rows = capture.rows
+                offer_urls = list(set(offer_urls) | set(listing_rows))
+
+            if not offer_urls:
+                logging.warning("⚠️ No job offer links found")
+                return
+
+            await journal.start(offer_urls, listing_rows)
 
         # Check connection before processing
         if not await check_connection(conn):
@@ -52,13 +117,32 @@ async def main():
             conn = await reconnect_db()
 
         # Process offers and save to database (with browser restart for memory management)
-        processed_count, page = await process_offers(page, conn, offer_urls, browser, playwright)
+        with phase("process_offers"):
+            processed_count, page = await process_offers(page, conn, offer_urls, browser, playwright, listing_rows=listing_rows, writer=writer, journal=journal, queue=queue)
+        # The browser may have been relaunched by the memory watchdog
+        browser = page.context.browser or browser
+
+        # Coordinator: detail visits are done by the workers; purge only once they finished
+        if queue is not None:
+            with phase("wait_for_workers"):
+                drained = await queue.wait_until_drained(journal.run_id)
+            await queue.sync_journal(journal.run_id)
+            if not drained:
+                # Keep the run resumable; the next coordinator picks up the same queue
+                logging.warning("⚠️ Workers did not finish; skipping purge until the run is resumed")
+                return
         
         # Remove stale offers that are no longer on the website
-        await purge_stale_offers(conn, set(offer_urls))
+        with phase("purge"):
+            await purge_stale_offers(conn, set(offer_urls))
+            if ScrapingConfig.SOFT_DELETE_STALE:
+                await purge_inactive_offers(conn)
         
         # Clean up offers with empty data (only job_url, all other fields NULL)
-        await cleanup_empty_offers(conn)
+        with phase("cleanup"):
+            await cleanup_empty_offers(conn)
+
+        await journal.finish()
         
         logging.info(f"🎉 Scraping completed successfully!")
 
@@ -66,14 +150,131 @@ async def main():
         invoke_normalize_lambda()
 
     except Exception as e:
+        # The run stays "running" in the journal so the next start resumes it
         logging.error(f"❌ Error during scraping: {e}")
         raise
     finally:
         # Clean up resources
+        await writer.close()
+        await journal.flush()
+        await pool.close()
         await conn.close()
         await browser.close()
         await playwright.stop()
+        await close_http_fetcher()
+        logging.info("🔒 Resources cleaned up successfully")
+
+        # Written for failed runs too, so regressions and crashes show up run over run
+        RUN_SECONDS.set(round(time.monotonic() - run_started, 3))
+        try:
+            write_reports()
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write run metrics: {e}")
+
+async def run_worker():
+    """
+    Worker role: claim offer batches from `scrape_queue`, scrape and save them.
+
+    Needs no listing page or link collection; any number of workers can run
+    next to one coordinator (as Fargate tasks or local processes).
+    """
+    run_started = time.monotonic()
+    pool = await init_db_pool(max_size=ScrapingConfig.DB_POOL_SIZE)
+    queue = ScrapeQueue(pool)
+    writer = OfferWriter(pool, on_written=queue.record)
+    writer.start()
+    logging.info(f"🧭 Running as worker {queue.worker_id}")
+    playwright, browser, page = await init_browser(headless=ScrapingConfig.HEADLESS)
+
+    try:
+        with phase("process_offers"):
+            processed_count, page = await work_queue(page, queue, writer, browser, playwright)
+        browser = page.context.browser or browser
+    except Exception as e:
+        logging.error(f"❌ Error in worker: {e}")
+        raise
+    finally:
+        await writer.close()
+        await pool.close()
+        await browser.close()
+        await playwright.stop()
+        await close_http_fetcher()
+        logging.info("🔒 Resources cleaned up successfully")
+
+        RUN_SECONDS.set(round(time.monotonic() - run_started, 3))
+        try:
+            write_reports()
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write run metrics: {e}")
+
+async def run_export():
+    """
+    File-sink run: scrape every listed offer into an NDJSON file without a database.
+
+    There is no journal, no existing-offer check and no purge; the file and
+    its manifest of collected URLs are loaded later with `python -m scout.sink`
+    (`--purge-stale` applies the purge then).
+    """
+    run_started = time.monotonic()
+    sink = NdjsonSink()
+    sink.start()
+    playwright, browser, page = await init_browser(headless=ScrapingConfig.HEADLESS)
+
+    capture = None
+    if ScrapingConfig.SCRAPE_MODE == "listing":
+        capture = ListingCapture()
+        capture.attach(page)
+    await page.goto(ScrapingConfig.LISTING_URL, timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
+
+    try:
+        with phase("collect_links"):
+            if ScrapingConfig.LINK_COLLECTION == "faceted":
+                offer_urls = await collect_offer_links_faceted(page, capture=capture)
+            else:
+                offer_urls = await collect_offer_links(page)
+
+        listing_rows = None
+        if capture is not None:
+            await capture.drain()
+            listing_rows = capture.rows
+            offer_urls = list(set(offer_urls) | set(listing_rows))
+        if not offer_urls:
+            logging.warning("⚠️ No job offer links found")
+            return
+        sink.write_manifest(offer_urls)
+
+        async def store(offer_data: dict) -> bool:
+            await sink.put(offer_data)
+            return True
+
+        with phase("process_offers"):
+            detail_urls = offer_urls
+            if listing_rows:
+                detail_urls = [url for url in offer_urls if needs_detail_page(listing_rows.get(url))]
+                for url in set(offer_urls) - set(detail_urls):
+                    await sink.put(build_offer_data(url, listing_rows[url]))
+                logging.info(f"📦 Exported {sink.written} offers from listing data; {len(detail_urls)} need detail pages")
+            started_at = time.monotonic()
+            _, page = await scrape_offers(page, store, detail_urls, listing_rows, browser, playwright)
+            log_throughput(len(detail_urls), started_at)
+        browser = page.context.browser or browser
+        await sink.drain()
+        logging.info(f"🎉 Export completed: load it with `python -m scout.sink {sink.path}`")
+    except Exception as e:
+        logging.error(f"❌ Error during export: {e}")
+        raise
+    finally:
+        await sink.close()
+        await browser.close()
+        await playwright.stop()
+        await close_http_fetcher()
         logging.info("🔒 Resources cleaned up successfully")
 
+        RUN_SECONDS.set(round(time.monotonic() - run_started, 3))
+        try:
+            write_reports()
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write run metrics: {e}")
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
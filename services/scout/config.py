@@ -7,15 +7,121 @@ This module contains all configurable parameters used throughout the scraping pr
 class ScrapingConfig:
     """Configuration constants for scraping behavior."""
     
+    # Scrape mode ("full": visit every new offer, "listing": build rows from intercepted listing API responses)
+    SCRAPE_MODE = "full"
+    LISTING_API_PATTERN = r"api\.justjoin\.it/.*offers"  # Listing responses to intercept (regex on URL)
+    LISTING_DETAIL_FIELDS = ("job_title", "company", "tech_stack")  # Visit the detail page if any is missing; add "description" to always fetch it
+
     # Browser configuration
     HEADLESS = True
-    RESTART_BROWSER_EVERY = 500  # Restart browser every N offers for memory cleanup
+
+    # Memory watchdog: recycle contexts / the browser only when thresholds are crossed
+    BROWSER_RSS_LIMIT_MB = 2500  # Restart the browser (concurrent workers drain first) above this process-tree RSS
+    JS_HEAP_LIMIT_MB = 300  # Recycle a context when its page's used JS heap exceeds this
+    MEMORY_CHECK_EVERY = 10  # Sample memory every N offers per page
+
+    # Lean mode: block non-essential requests in every browser context
+    LEAN_MODE = False
+    BLOCKED_RESOURCE_TYPES = ("image", "media", "font")  # Stylesheets stay: innerText depends on layout
+    ALLOWED_HOSTS = ("justjoin.it",)  # Hosts (incl. subdomains) allowed to serve requests; others are blocked
     
     # Scraping limits
     SCROLL_PAUSE_TIME = 0.05
-    MAX_IDLE_SCROLLS = 100
+    MAX_IDLE_SCROLLS = 100  # Safety cap: stop after N scrolls without new links or page growth
+    END_OF_LIST_SETTLE = 3.0  # Stop once at the bottom with no new links/growth for this many seconds
+
+    # Link collection ("single": scroll the all-offers page, "faceted": scroll facet pages in parallel)
+    LINK_COLLECTION = "single"
+    LISTING_URL = "https://justjoin.it/job-offers"
+    LINK_FACETS = (  # Facet paths under LISTING_URL (location/category); together they should cover every offer
+        "all-locations/javascript", "all-locations/html", "all-locations/php", "all-locations/ruby",
+        "all-locations/python", "all-locations/java", "all-locations/net", "all-locations/scala",
+        "all-locations/c", "all-locations/mobile", "all-locations/testing", "all-locations/devops",
+        "all-locations/admin", "all-locations/ux", "all-locations/pm", "all-locations/game",
+        "all-locations/analytics", "all-locations/security", "all-locations/data", "all-locations/go",
+        "all-locations/support", "all-locations/erp", "all-locations/architecture", "all-locations/ai",
+        "all-locations/other",
+    )
+    FACET_CONCURRENCY = 4  # Facet pages scrolled at the same time
+    FACET_MIN_COVERAGE = 0.98  # Also scroll the unfaceted page if facets found less than this share of its offer count
     
     # Timeouts
-    LINK_TIMEOUT = 2000  # 2 seconds
     PAGE_LOAD_TIMEOUT = 60000  # 60 seconds
-    REQUEST_DELAY = 0.5  # 0.5 seconds between requests
+
+    # HTTP-first fetch (plain GET + static parse; Playwright only for offers still missing required fields)
+    HTTP_FIRST = False  # Opt-in; compare both tiers with `bench.py --http-first` before enabling
+    HTTP_REQUIRED_FIELDS = ("job_title", "company", "location", "tech_stack", "description")  # An HTTP result missing any of these goes to the browser
+    HTTP_MAX_CONNECTIONS = 10  # Pooled keep-alive connections
+    HTTP_TIMEOUT = 20.0  # Seconds per request
+    HTTP_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+    # Adaptive rate limiter (token bucket shared by all workers, AIMD-controlled rate)
+    INITIAL_REQUESTS_PER_SECOND = 2.0  # Starting rate
+    MIN_REQUESTS_PER_SECOND = 0.2  # Floor the rate never drops below
+    MAX_REQUESTS_PER_SECOND = 6.0  # Politeness ceiling the rate never exceeds
+    RATE_BURST = 2  # Token bucket capacity (requests that may go out back to back)
+    RATE_INCREASE_STEP = 0.1  # Additive increase per fast response (scaled down at higher rates)
+    RATE_DECREASE_FACTOR = 0.5  # Multiplicative decrease on throttling or an error spike
+    SLOW_RESPONSE_SECONDS = 3.0  # Responses slower than this do not raise the rate...
+    SLOW_RESPONSE_FACTOR = 0.9  # ...and shrink it by this factor instead
+    BACKOFF_BASE = 2.0  # First backoff pause (seconds); doubles on consecutive backoffs
+    BACKOFF_MAX = 120.0  # Longest backoff pause (seconds)
+    ERROR_WINDOW = 20  # Recent requests considered for error spikes
+    ERROR_SPIKE_RATIO = 0.3  # Back off when this share of recent requests failed
+    THROTTLE_RETRIES = 3  # Retries for an offer answered with 429/5xx
+
+    # Database writer (batched, runs alongside page processing)
+    DB_POOL_SIZE = 4  # Connections in the writer's asyncpg pool
+    WRITE_BATCH_SIZE = 100  # Flush once this many offers are buffered
+    WRITE_FLUSH_INTERVAL = 2.0  # Flush a partial batch after this many seconds
+    WRITE_QUEUE_SIZE = 1000  # Max buffered offers before page workers wait
+
+    # Offer sink ("postgres": write to the database, "ndjson": stream to a file and load it later with `python -m scout.sink`)
+    SINK = "postgres"  # Overridden by the SCOUT_SINK env var
+    SINK_DIR = "offers-export"  # Directory for NDJSON sink files and their manifests
+    LOAD_BATCH_SIZE = 5000  # Offers per COPY + merge when loading a sink file
+
+    # Raw HTML archive (content-addressed, gzip-compressed; replay with `python -m scout.archive reextract`)
+    ARCHIVE_HTML = False  # Archive every extracted offer page
+    ARCHIVE_DIR = "html-archive"  # Archive root (objects/ and index/ live below it)
+    ARCHIVE_COMPRESS_LEVEL = 6  # gzip level for archived pages
+    REEXTRACT_WORKERS = None  # Parser processes for re-extraction (None = CPU count)
+    REEXTRACT_BATCH_SIZE = 500  # Offers parsed and written per re-extraction batch
+
+    # Run journal (crash-safe resume)
+    RESUME_RUNS = True  # Resume the latest unfinished run instead of re-collecting links
+    RESUME_MAX_AGE_HOURS = 12  # Only resume runs started within this many hours
+    JOURNAL_FLUSH_EVERY = 50  # Offer outcomes buffered per checkpoint write
+    JOURNAL_RETENTION_DAYS = 14  # Prune journaled runs older than this
+
+    # Distributed mode: one coordinator collects links, N workers claim URL batches from scrape_queue
+    ROLE = "standalone"  # "standalone", "coordinator" or "worker" (overridden by the SCOUT_ROLE env var)
+    CLAIM_BATCH_SIZE = 10  # Offer URLs a worker claims per round trip
+    HEARTBEAT_INTERVAL = 15  # Seconds between a worker's heartbeats on its claimed URLs
+    CLAIM_TIMEOUT = 90  # Seconds without a heartbeat before a claim is handed to another worker
+    MAX_CLAIM_ATTEMPTS = 3  # Claims per URL before a failing or orphaned URL is marked failed
+    QUEUE_POLL_INTERVAL = 5  # Seconds between queue polls while waiting for work or for workers
+    WORKER_IDLE_TIMEOUT = 300  # A worker exits after this long without claimable URLs (counted once a run is queued)
+    WORKER_START_TIMEOUT = 3600  # A worker exits if no coordinator has queued a run within this many seconds
+    COORDINATOR_WAIT_HOURS = 6  # The coordinator stops waiting for workers after this long
+
+    # Run metrics (JSON report + Prometheus textfile written at the end of each run)
+    METRICS_DIR = "metrics"
+
+    # Stale offers
+    SOFT_DELETE_STALE = False  # Mark delisted offers is_active = false instead of deleting them
+    INACTIVE_RETENTION_DAYS = 7  # Hard-delete soft-deleted offers after this many days
+
+    # Page readiness ("selectors": domcontentloaded + required selectors, "networkidle": legacy)
+    READINESS_MODE = "selectors"
+    READY_FIELDS = ("job_title", "tech_stack")  # Required fields, awaited via their selectors
+    READY_TIMEOUT = 10000  # Initial per-field wait (ms) until enough samples are collected
+    READY_TIMEOUT_MIN = 1500  # Lower bound for learned per-field timeouts (ms)
+    READY_TIMEOUT_MAX = 20000  # Upper bound for learned per-field timeouts (ms)
+    READY_TIMEOUT_FACTOR = 3.0  # Learned timeout = p95 of recent waits x factor
+    READY_MIN_SAMPLES = 10  # Samples needed before timeouts adapt
+    READY_HISTORY = 100  # Recent waits remembered per field
+    NETWORKIDLE_FALLBACK_TIMEOUT = 15000  # Max networkidle wait when required fields are missing (ms)
+
+    # Worker pool (used when CONCURRENCY > 1)
+    CONCURRENCY = 1  # Number of parallel offer workers (browser contexts)
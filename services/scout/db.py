@@ -1,12 +1,15 @@
 # db.py
 
-import asyncpg, logging, os
+import asyncpg, logging, os, time
 from pathlib import Path
 from urllib.parse import quote_plus
 
 import json
 import boto3
 
+from .config import ScrapingConfig
+from .salary import PARSED_SALARY_COLUMNS
+
 def get_database_dsn() -> str:
     """Get database DSN from environment variables for AWS RDS or DATABASE_URL."""
     database_url = os.getenv('DATABASE_URL')
@@ -46,6 +49,49 @@ def get_database_dsn() -> str:
     return f"postgresql://{username_encoded}:{password_encoded}@{aws_endpoint}:5432/{aws_db_name}?sslmode=require"
 
 
+# Scraped offer fields that make up an offer's content hash
+CONTENT_COLUMNS = (
+    "job_title", "category", "company", "location",
+    "salary_any", "salary_b2b", "salary_internship", "salary_mandate",
+    "salary_permanent", "salary_specific_task", "work_schedule", "experience",
+    "employment_type", "operating_mode", "tech_stack", "description",
+)
+
+# Columns written by Scout for each offer (timestamps are left to their defaults);
+# the parsed salary columns and the structured tech stack derive from hashed
+# text columns, so they are not hashed themselves
+OFFER_COLUMNS = ("job_url",) + CONTENT_COLUMNS + ("content_hash", "listing_hash") + PARSED_SALARY_COLUMNS + ("tech_stack_items",)
+
+# Upsert clause: rewrite an existing offer only when its content (or listing) hash changed
+OFFER_CONFLICT_SQL = f"""
+    ON CONFLICT (job_url) DO UPDATE SET
+        {", ".join(f"{column} = EXCLUDED.{column}" for column in OFFER_COLUMNS[1:])},
+        last_seen_at = CURRENT_TIMESTAMP
+    WHERE offers.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+       OR offers.listing_hash IS DISTINCT FROM EXCLUDED.listing_hash
+"""
+
+# Single-offer upsert; parameters follow OFFER_COLUMNS order
+UPSERT_OFFER_SQL = f"""
+    INSERT INTO offers ({", ".join(OFFER_COLUMNS)})
+    VALUES ({", ".join(f"${i}" for i in range(1, len(OFFER_COLUMNS) + 1))})
+    {OFFER_CONFLICT_SQL}
+"""
+
+
+async def ensure_schema(conn: asyncpg.Connection):
+    """Ensure Scout's tables (offers, the run journal and the work queue) exist."""
+    project_root = Path(__file__).resolve().parent.parent.parent
+    for table in ("offers.sql", "scrape_runs.sql", "scrape_queue.sql"):
+        schema_path = project_root / "backend" / "sql" / "tables" / table
+        if schema_path.exists():
+            ddl = schema_path.read_text()
+            await conn.execute(ddl)
+        else:
+            logging.warning(f"⚠️ Schema file not found: {schema_path}")
+    logging.info("✅ Database schema initialized")
+
+
 async def init_db_connection() -> asyncpg.Connection:
     """
     Initializes and returns an asyncpg database connection to AWS RDS.
@@ -73,17 +119,29 @@ async def init_db_connection() -> asyncpg.Connection:
         raise Exception(f"❌ Failed to connect to database: {e}")
 
     # Ensure the offers table exists
-    project_root = Path(__file__).resolve().parent.parent.parent
-    schema_path = project_root / "backend" / "sql" / "tables" / "offers.sql"
-    if schema_path.exists():
-        ddl = schema_path.read_text()
-        await conn.execute(ddl)
-        logging.info("✅ Database schema initialized")
-    else:
-        logging.warning(f"⚠️ Schema file not found: {schema_path}")
+    await ensure_schema(conn)
     
     return conn
 
+async def init_db_pool(max_size: int = 4) -> asyncpg.Pool:
+    """
+    Create an asyncpg connection pool for Scout's background writers.
+
+    Args:
+        max_size: Maximum number of pooled connections.
+
+    Returns:
+        asyncpg.Pool: An open connection pool.
+    """
+    dsn = get_database_dsn()
+    try:
+        pool = await asyncpg.create_pool(dsn=dsn, min_size=1, max_size=max_size, command_timeout=60)
+        logging.info(f"✅ Database pool established (max {max_size} connections)")
+    except Exception as e:
+        logging.error(f"❌ Connection pool error: {e}")
+        raise Exception(f"❌ Failed to create database pool: {e}")
+    return pool
+
 async def check_connection(conn: asyncpg.Connection) -> bool:
     """
     Check if the database connection is still alive.
@@ -111,39 +169,133 @@ async def reconnect_db() -> asyncpg.Connection:
     return await init_db_connection()
 
 
-async def purge_stale_offers(conn: asyncpg.Connection, current_urls: set[str]):
+async def mark_offers_seen(conn: asyncpg.Connection, urls: list[str], listing_hashes: list[str | None] | None = None):
+    """
+    Bump last_seen_at for offers still listed on the website.
+
+    Offers that were soft-deleted by `purge_stale_offers` and are listed
+    again are reactivated.
+
+    Listing hashes (when known) are stored for offers that do not have one
+    yet, so the next run has a baseline to detect changes against.
+
+    Args:
+        conn: Database connection.
+        urls: URLs of offers currently listed that already exist in the database.
+        listing_hashes: Listing hash per URL (same order), or None.
+    """
+    if not urls:
+        return
+    if listing_hashes is None:
+        listing_hashes = [None] * len(urls)
+    result = await conn.execute("""
+        UPDATE offers o
+        SET last_seen_at = CURRENT_TIMESTAMP,
+            listing_hash = COALESCE(o.listing_hash, s.listing_hash),
+            is_active = true,
+            deactivated_at = NULL
+        FROM unnest($1::text[], $2::text[]) AS s(job_url, listing_hash)
+        WHERE o.job_url = s.job_url
+    """, urls, listing_hashes)
+    logging.info(f"👀 Marked offers as seen: {result}")
+
+
+async def purge_stale_offers(conn: asyncpg.Connection, current_urls: set[str], soft_delete: bool = None):
     """
-    Remove offers that are no longer present on the website.
+    Remove (or deactivate) offers that are no longer present on the website.
+
+    The current URLs are COPY'd into a temporary staging table with a primary
+    key, and stale offers are found with an anti-join against it, so the cost
+    grows with the table sizes instead of offers x URLs.
 
     Args:
         conn: Database connection.
         current_urls: Set of URLs currently present on the website.
+        soft_delete: Set `is_active = false` instead of deleting, deferring the
+                     cascade into offer_skills to `purge_inactive_offers`
+                     (defaults to ScrapingConfig.SOFT_DELETE_STALE).
     """
     if not current_urls:
         logging.info("🗑️ No current URLs provided, skipping stale offers cleanup")
         return
+    if soft_delete is None:
+        soft_delete = ScrapingConfig.SOFT_DELETE_STALE
 
     # Count offers before deletion
     total_offers_before = await conn.fetchval("SELECT COUNT(*) FROM offers")
-    
-    # Convert set to list for SQL IN clause
-    current_urls_list = list(current_urls)
-    
-    # Use PostgreSQL's ANY operator for better performance
-    delete_query = """
-        DELETE FROM offers 
-        WHERE job_url != ALL($1::text[])
+
+    if soft_delete:
+        purge_query = """
+            UPDATE offers o
+            SET is_active = false,
+                deactivated_at = CURRENT_TIMESTAMP
+            WHERE o.is_active
+              AND NOT EXISTS (SELECT 1 FROM current_offer_urls c WHERE c.job_url = o.job_url)
+        """
+    else:
+        purge_query = """
+            DELETE FROM offers o
+            WHERE NOT EXISTS (SELECT 1 FROM current_offer_urls c WHERE c.job_url = o.job_url)
+        """
+
+    try:
+        started = time.monotonic()
+        async with conn.transaction():
+            await conn.execute("""
+                CREATE TEMP TABLE current_offer_urls (job_url TEXT PRIMARY KEY) ON COMMIT DROP
+            """)
+            await conn.copy_records_to_table("current_offer_urls", records=[(url,) for url in current_urls])
+            # Fresh statistics let the planner choose a hash anti-join
+            await conn.execute("ANALYZE current_offer_urls")
+            staged = time.monotonic()
+            result = await conn.execute(purge_query)
+        finished = time.monotonic()
+
+        # Extract number of affected rows from result string
+        purged_count = int(result.split()[-1]) if result and result.split()[-1].isdigit() else 0
+
+        if soft_delete:
+            logging.info(f"💤 Deactivated {purged_count} stale offers")
+        else:
+            logging.info(f"🗑️ Purged {purged_count} stale offers")
+            logging.info(f"📊 Database sync: {total_offers_before} → {total_offers_before - purged_count} offers")
+        logging.info(
+            f"⏱️ Stale offer purge: staged {len(current_urls)} URLs in {staged - started:.2f}s, "
+            f"anti-join in {finished - staged:.2f}s"
+        )
+    except Exception as e:
+        logging.error(f"❌ Error purging stale offers: {e}")
+        raise
+
+
+async def purge_inactive_offers(conn: asyncpg.Connection, retention_days: int = None):
     """
+    Hard-delete offers soft-deleted more than `retention_days` ago.
+
+    This is where the cascade into offer_skills happens for soft-deleted
+    offers, so it can run off the scrape's critical path.
+
+    Args:
+        conn: Database connection.
+        retention_days: Days to keep inactive offers (defaults to ScrapingConfig.INACTIVE_RETENTION_DAYS).
+    """
+    if retention_days is None:
+        retention_days = ScrapingConfig.INACTIVE_RETENTION_DAYS
 
     try:
-        result = await conn.execute(delete_query, current_urls_list)
-        # Extract number of deleted rows from result string
+        started = time.monotonic()
+        result = await conn.execute("""
+            DELETE FROM offers
+            WHERE NOT is_active
+              AND deactivated_at < CURRENT_TIMESTAMP - make_interval(days => $1)
+        """, retention_days)
         deleted_count = int(result.split()[-1]) if result and result.split()[-1].isdigit() else 0
-        
-        logging.info(f"🗑️ Purged {deleted_count} stale offers")
-        logging.info(f"📊 Database sync: {total_offers_before} → {total_offers_before - deleted_count} offers")
+        logging.info(
+            f"🗑️ Purged {deleted_count} offers inactive for over {retention_days} days "
+            f"in {time.monotonic() - started:.2f}s"
+        )
     except Exception as e:
-        logging.error(f"❌ Error purging stale offers: {e}")
+        logging.error(f"❌ Error purging inactive offers: {e}")
         raise
 
 async def cleanup_empty_offers(conn: asyncpg.Connection):
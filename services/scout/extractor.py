@@ -0,0 +1,275 @@
+# extractor.py
+"""
+Single-round-trip DOM extraction for job offer pages.
+
+The selectors and patterns from `selectors.py` are compiled once into a plain
+JSON config, and a single `page.evaluate` call resolves every field, the tech
+stack and the salary blocks inside the browser. This replaces dozens of
+per-field `locator().count()` / `inner_text()` round trips per offer.
+"""
+import logging
+import re
+import time
+from functools import lru_cache
+from playwright.async_api import Page
+from .selectors import SELECTORS, PATTERNS, SelectorConfig
+from .metrics import EXTRACT_SECONDS
+
+_HAS_TEXT = re.compile(r''':has-text\((?:"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)')\)''')
+_NTH = re.compile(r'\s*>>\s*nth=(-?\d+)\s*$')
+
+
+def compile_selector(selector: str) -> dict | None:
+    """
+    Translate a Playwright selector into a spec the in-page script can resolve.
+
+    Supports plain CSS, `xpath=` expressions, Playwright's `:has-text("...")`
+    pseudo-class and a trailing `>> nth=N`.
+
+    Args:
+        selector: Playwright selector string
+
+    Returns:
+        dict | None: `{"xpath": ...}` or `{"steps": [...], "nth": N}`, or None for an empty selector
+    """
+    if not selector:
+        return None
+
+    if selector.startswith('xpath='):
+        return {"xpath": selector[len('xpath='):]}
+
+    nth = 0
+    nth_match = _NTH.search(selector)
+    if nth_match:
+        nth = int(nth_match.group(1))
+        selector = selector[:nth_match.start()]
+
+    # Each :has-text() filters the compound selector right before it; the CSS
+    # after it continues from the filtered elements via its leading combinator.
+    steps = []
+    position = 0
+    for match in _HAS_TEXT.finditer(selector):
+        text = match.group(1) if match.group(1) is not None else match.group(2)
+        css = selector[position:match.start()].strip() or '*'
+        steps.append({"css": css, "text": re.sub(r'\\(.)', r'\1', text)})
+        position = match.end()
+    rest = selector[position:].strip()
+    if rest or not steps:
+        steps.append({"css": rest, "text": None})
+
+    return {"steps": steps, "nth": nth}
+
+
+def _compile_field(config: SelectorConfig, fallback: SelectorConfig | None = None) -> dict:
+    """Compile a selector config (and optional fallback config) into a field spec."""
+    fallback_selector = fallback.primary if fallback else config.fallback
+    return {
+        "primary": compile_selector(config.primary),
+        "fallback": compile_selector(fallback_selector),
+    }
+
+
+# Simple text fields: innerText of the first element matching primary (or fallback)
+TEXT_FIELDS = {
+    "job_title": _compile_field(SELECTORS.JOB_TITLE),
+    "location": _compile_field(SELECTORS.LOCATION),
+    "company": _compile_field(SELECTORS.COMPANY),
+    "category": _compile_field(SELECTORS.CATEGORY_PILL, fallback=SELECTORS.CATEGORY_BREADCRUMB),
+    "work_schedule": _compile_field(SELECTORS.WORK_SCHEDULE),
+    "employment_type": _compile_field(SELECTORS.EMPLOYMENT_TYPE),
+    "experience": _compile_field(SELECTORS.EXPERIENCE),
+    "operating_mode": _compile_field(SELECTORS.OPERATING_MODE),
+    "description": _compile_field(SELECTORS.JOB_DESCRIPTION),
+}
+
+# Salary columns in match priority order, each with its (case-insensitive) pattern
+SALARY_FIELDS = [
+    ("salary_any", PATTERNS.SALARY_ANY),
+    ("salary_b2b", PATTERNS.SALARY_B2B),
+    ("salary_internship", PATTERNS.SALARY_INTERNSHIP),
+    ("salary_mandate", PATTERNS.SALARY_MANDATE),
+    ("salary_permanent", PATTERNS.SALARY_PERMANENT),
+    ("salary_specific_task", PATTERNS.SALARY_SPECIFIC_TASK),
+]
+
+EXTRACTION_CONFIG = {
+    "fields": TEXT_FIELDS,
+    "techNames": compile_selector(SELECTORS.TECH_NAMES.primary),
+    "techLevels": SELECTORS.TECH_LEVELS.primary,
+    "techContainers": compile_selector(SELECTORS.TECH_CONTAINERS.primary),
+    "salarySpans": compile_selector(SELECTORS.SALARY_SPANS.primary),
+    "salaryPatterns": [[field, pattern] for field, pattern in SALARY_FIELDS],
+}
+
+
+
+@lru_cache(maxsize=32)
+def _subset_config(fields: frozenset) -> dict:
+    """Extraction config limited to `fields` (text fields, salary columns and/or `tech_stack`)."""
+    return {
+        **EXTRACTION_CONFIG,
+        "fields": {name: spec for name, spec in TEXT_FIELDS.items() if name in fields},
+        "techNames": EXTRACTION_CONFIG["techNames"] if "tech_stack" in fields else None,
+        "salaryPatterns": [[field, pattern] for field, pattern in SALARY_FIELDS if field in fields],
+    }
+
+
+def extraction_config(fields=None) -> dict:
+    """
+    Config for `EXTRACTION_SCRIPT`.
+
+    Args:
+        fields: `offers` columns to extract (default: all of them). Sections
+                with no requested field are skipped inside the page.
+    """
+    return EXTRACTION_CONFIG if fields is None else _subset_config(frozenset(fields))
+
+
+EXTRACTION_SCRIPT = r"""
+(config) => {
+    const normalize = (s) => (s || '').replace(/\s+/g, ' ').trim().toLowerCase();
+    const ANCHOR = 'data-scout-anchor';
+
+    const resolveAll = (spec) => {
+        if (!spec) return [];
+        if (spec.xpath) {
+            const snapshot = document.evaluate(spec.xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+            return nodes;
+        }
+        let current = null;
+        for (const step of spec.steps) {
+            let found;
+            if (current === null) {
+                found = Array.from(document.querySelectorAll(step.css));
+            } else {
+                // Continue from the previous step's elements via the step's leading combinator
+                current.forEach((el) => el.setAttribute(ANCHOR, ''));
+                try {
+                    found = Array.from(document.querySelectorAll(`[${ANCHOR}] ${step.css}`));
+                } finally {
+                    current.forEach((el) => el.removeAttribute(ANCHOR));
+                }
+            }
+            if (step.text !== null) {
+                const needle = normalize(step.text);
+                found = found.filter((el) => normalize(el.textContent).includes(needle));
+            }
+            current = found;
+        }
+        return current || [];
+    };
+
+    const resolveFirst = (spec) => {
+        const nodes = resolveAll(spec);
+        if (!spec || spec.xpath) return nodes[0] || null;
+        const index = spec.nth < 0 ? nodes.length + spec.nth : spec.nth;
+        return nodes[index] || null;
+    };
+
+    const textOf = (el) => (el && typeof el.innerText === 'string') ? el.innerText : (el ? el.textContent : null);
+
+    const result = { fields: {}, techStack: [], salaries: {}, errors: {}, timings: {} };
+    let started;
+
+    // 1. Simple fields (primary, then fallback)
+    for (const [name, field] of Object.entries(config.fields)) {
+        started = performance.now();
+        try {
+            let el = resolveFirst(field.primary);
+            if (!el && field.fallback) el = resolveFirst(field.fallback);
+            result.fields[name] = el ? textOf(el) : null;
+        } catch (e) {
+            result.fields[name] = null;
+            result.errors[name] = String(e);
+        }
+        result.timings[name] = performance.now() - started;
+    }
+
+    // 2. Tech stack: name heading + level span sharing a parent
+    started = performance.now();
+    if (config.techNames) try {
+        const stack = new Map();
+        for (const nameEl of resolveAll(config.techNames)) {
+            const name = (textOf(nameEl) || '').trim();
+            if (!name || !nameEl.parentElement) continue;
+            const levelEl = nameEl.parentElement.querySelector(config.techLevels);
+            const level = levelEl ? (textOf(levelEl) || '').trim() : '';
+            if (level) stack.set(name, level);
+        }
+        // Fallback: containers holding both a name heading and a level span
+        if (!stack.size) {
+            const nameCss = config.techNames.steps[0].css;
+            for (const container of resolveAll(config.techContainers).slice(0, 20)) {
+                const nameEl = container.querySelector(nameCss);
+                const levelEl = container.querySelector(config.techLevels);
+                if (!nameEl || !levelEl) continue;
+                const name = textOf(nameEl) || '';
+                const level = textOf(levelEl) || '';
+                if (name.trim() && level.trim() && name.length < 50 && level.length < 20) {
+                    stack.set(name.trim(), level.trim());
+                }
+            }
+        }
+        result.techStack = Array.from(stack.entries());
+    } catch (e) {
+        result.errors.tech_stack = String(e);
+    }
+    if (config.techNames) result.timings.tech_stack = performance.now() - started;
+
+    // 3. Salaries: spans mentioning " per ", classified by pattern, value from the parent block
+    started = performance.now();
+    if (config.salaryPatterns.length) try {
+        const patterns = config.salaryPatterns.map(([field, pattern]) => [field, new RegExp('^(?:' + pattern + ')', 'i')]);
+        for (const span of resolveAll(config.salarySpans)) {
+            const text = (textOf(span) || '').trim();
+            const hit = patterns.find(([, regex]) => regex.test(text));
+            if (hit && span.parentElement) result.salaries[hit[0]] = textOf(span.parentElement);
+        }
+    } catch (e) {
+        result.errors.salary = String(e);
+    }
+    if (config.salaryPatterns.length) result.timings.salary = performance.now() - started;
+
+    return result;
+}
+"""
+
+
+async def extract_offer_data(page: Page, timings: dict | None = None, fields=None) -> dict:
+    """
+    Extract offer fields from the current page in one `page.evaluate` call.
+
+    Args:
+        page: Playwright page object already navigated to an offer
+        timings: If given, filled with the in-page time (ms) spent on each
+                 text field, `tech_stack` and `salary`
+        fields: Only extract these `offers` columns (default: every field)
+
+    Returns:
+        dict: Raw (unsanitized) text per `offers` column, with salary columns
+              and `tech_stack` as a `{name: level}` dict
+    """
+    started = time.monotonic()
+    raw = await page.evaluate(EXTRACTION_SCRIPT, extraction_config(fields))
+    EXTRACT_SECONDS.observe(time.monotonic() - started, group="round_trip")
+
+    field_timings = raw.get("timings", {})
+    EXTRACT_SECONDS.observe(sum(field_timings.get(name, 0) for name in TEXT_FIELDS) / 1000, group="text_fields")
+    for group in ("tech_stack", "salary"):
+        if group in field_timings:
+            EXTRACT_SECONDS.observe(field_timings[group] / 1000, group=group)
+    if timings is not None:
+        timings.update(field_timings)
+
+    for name, error in raw.get("errors", {}).items():
+        logging.error(f"❌ Error in {name.replace('_', ' ')} extraction: {error}")
+
+    data = dict(raw.get("fields", {}))
+    for field, _ in SALARY_FIELDS:
+        data[field] = raw.get("salaries", {}).get(field)
+    data["tech_stack"] = {name: level for name, level in raw.get("techStack", [])}
+    if fields is not None:
+        data = {field: value for field, value in data.items() if field in fields}
+    return data
@@ -0,0 +1,436 @@
+# http_fetch.py
+"""
+HTTP-first fetch tier for offer pages.
+
+Offer pages are server-rendered: the HTML already holds most fields, and the
+page embeds the offer as JSON state for hydration. `HttpOfferFetcher` GETs
+the page over a pooled httpx client and parses it with lexbor (selectolax):
+the extraction config from `extractor.py` is resolved against the static DOM
+the same way `EXTRACTION_SCRIPT` resolves it in the browser, and the embedded
+state fills whatever the markup lacks. Only offers still missing
+`HTTP_REQUIRED_FIELDS` go through Playwright, which costs a full Chromium
+render per offer.
+"""
+import json
+import logging
+import re
+import time
+import httpx
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+from .config import ScrapingConfig
+from .extractor import EXTRACTION_CONFIG, SALARY_FIELDS, extraction_config
+from .listing import listing_offer_to_row
+from .metrics import HTTP_FETCH_SECONDS, HTTP_FETCHES, HTTP_HIT_RATIO
+from .ratelimit import THROTTLE_STATUSES, AdaptiveRateLimiter, ThrottledError, parse_retry_after
+
+ANCHOR = "data-scout-anchor"
+
+# Next.js streams hydration data as self.__next_f.push([1, "<chunk>"]) calls
+_NEXT_F_PUSH = re.compile(r'self\.__next_f\.push\(\[\s*1\s*,\s*("(?:[^"\\]|\\.)*")\s*\]\)')
+# Lines of the decoded stream look like `<hex id>:<json>`
+_FLIGHT_LINE = re.compile(r'[0-9a-f]+:(?=[\[{])')
+
+# Skill levels of the hydration state, as labelled on the offer page
+SKILL_LEVELS = {"1": "Nice To Have", "2": "Junior", "3": "Regular", "4": "Advanced", "5": "Master"}
+
+
+# innerText rendering: block boxes start and end a line (paragraphs leave a blank
+# line), cells are tab-separated, and non-rendered elements contribute nothing
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5",
+    "h6", "header", "hr", "li", "main", "nav", "ol", "pre", "section", "summary",
+    "table", "tr", "ul",
+})
+_PARAGRAPH_TAGS = frozenset({"p"})
+_CELL_TAGS = frozenset({"td", "th"})
+_HIDDEN_TAGS = frozenset({"head", "noscript", "script", "style", "template"})
+_SPACES = re.compile(r"[ \t\n\r\f]+")
+
+
+def _inner_text_items(node: LexborNode, items: list):
+    """Collect text runs and required line break counts (ints) of a node's subtree."""
+    for child in node.iter(include_text=True):
+        tag = child.tag
+        if tag == "-text":
+            items.append(_SPACES.sub(" ", child.text_content or ""))
+        elif tag == "br":
+            items.append("\n")
+        elif tag in _HIDDEN_TAGS:
+            continue
+        else:
+            breaks = 2 if tag in _PARAGRAPH_TAGS else 1 if tag in _BLOCK_TAGS else 0
+            if breaks:
+                items.append(breaks)
+            _inner_text_items(child, items)
+            if breaks:
+                items.append(breaks)
+            elif tag in _CELL_TAGS:
+                items.append("\t")
+
+
+def _text(node: LexborNode | None) -> str | None:
+    """
+    Text of a node as the browser's innerText renders it (the static counterpart of `textOf`).
+
+    Whitespace collapses within a line, block elements and `<br>` break lines
+    and paragraphs are separated by a blank line, so both fetch tiers store
+    (and hash) the same text.
+    """
+    if node is None:
+        return None
+    items = []
+    _inner_text_items(node, items)
+    parts = []
+    pending = 0
+    for item in items:
+        if isinstance(item, int):
+            pending = max(pending, item)
+            continue
+        if pending:
+            if not item.strip(" "):
+                # Whitespace between blocks is not rendered
+                continue
+            if parts:
+                parts.append("\n" * pending)
+            pending = 0
+        parts.append(item)
+    lines = (re.sub(" +", " ", line).strip(" \t") for line in "".join(parts).split("\n"))
+    return "\n".join(lines).strip("\n")
+
+
+def _normalize(text: str | None) -> str:
+    return " ".join((text or "").split()).lower()
+
+
+def resolve_all(tree: LexborHTMLParser, spec: dict | None) -> list[LexborNode]:
+    """Resolve a compiled selector spec (see `extractor.compile_selector`) against a static DOM."""
+    if not spec or "xpath" in spec:
+        # lexbor has no XPath engine; such selectors only work in the browser
+        return []
+    current = None
+    for step in spec["steps"]:
+        if current is None:
+            found = tree.css(step["css"])
+        else:
+            # Continue from the previous step's elements via the step's leading combinator
+            for node in current:
+                node.attrs[ANCHOR] = ""
+            try:
+                found = tree.css(f"[{ANCHOR}] {step['css']}")
+            finally:
+                for node in current:
+                    del node.attrs[ANCHOR]
+        if step["text"] is not None:
+            needle = _normalize(step["text"])
+            found = [node for node in found if needle in _normalize(node.text(deep=True))]
+        current = found
+    return current or []
+
+
+def resolve_first(tree: LexborHTMLParser, spec: dict | None) -> LexborNode | None:
+    nodes = resolve_all(tree, spec)
+    if not nodes:
+        return None
+    index = spec["nth"] if spec["nth"] >= 0 else len(nodes) + spec["nth"]
+    return nodes[index] if 0 <= index < len(nodes) else None
+
+
+def extract_static(tree: LexborHTMLParser, config: dict = EXTRACTION_CONFIG) -> dict:
+    """
+    Run the extraction config against a parsed page.
+
+    Returns:
+        dict: Raw values shaped like `extract_offer_data` output
+    """
+    data = {}
+    for name, field in config["fields"].items():
+        try:
+            node = resolve_first(tree, field["primary"])
+            if node is None and field["fallback"]:
+                node = resolve_first(tree, field["fallback"])
+            data[name] = _text(node)
+        except Exception as e:
+            logging.debug(f"Static extraction of {name} failed: {e}")
+            data[name] = None
+
+    # Tech stack: name heading + level span sharing a parent
+    stack = {}
+    if config["techNames"]:
+        for name_node in resolve_all(tree, config["techNames"]):
+            name = _text(name_node)
+            parent = name_node.parent
+            if not name or parent is None:
+                continue
+            level = _text(parent.css_first(config["techLevels"]))
+            if level:
+                stack[name] = level
+        # Fallback: containers holding both a name heading and a level span
+        if not stack:
+            name_css = config["techNames"]["steps"][0]["css"]
+            for container in resolve_all(tree, config["techContainers"])[:20]:
+                name = _text(container.css_first(name_css)) or ""
+                level = _text(container.css_first(config["techLevels"])) or ""
+                if name and level and len(name) < 50 and len(level) < 20:
+                    stack[name] = level
+    data["tech_stack"] = stack
+
+    # Salaries: spans mentioning " per ", classified by pattern, value from the parent block
+    salaries = {}
+    patterns = [(field, re.compile(f"^(?:{pattern})", re.IGNORECASE)) for field, pattern in config["salaryPatterns"]]
+    if patterns:
+        for span in resolve_all(tree, config["salarySpans"]):
+            text = _text(span) or ""
+            hit = next((field for field, regex in patterns if regex.search(text)), None)
+            if hit and span.parent is not None:
+                salaries[hit] = _text(span.parent)
+    for field, _ in SALARY_FIELDS:
+        data[field] = salaries.get(field)
+    return data
+
+
+def _tech_stack(skills: dict) -> dict:
+    """
+    Embedded skills in the browser's `{name: level}` shape.
+
+    The hydration state stores levels as numbers (or enum strings); they are
+    mapped to the labels the offer page shows, and skills without a level
+    are dropped, as the page lists none for them.
+    """
+    stack = {}
+    for name, level in skills.items():
+        if level is None:
+            continue
+        key = level.strip()
+        try:
+            key = str(int(float(key)))
+        except ValueError:
+            pass
+        label = SKILL_LEVELS.get(key) or level.replace("_", " ").strip().title()
+        if name and label:
+            stack[name] = label
+    return stack
+
+
+def _find_offer(payload, slug: str, depth: int = 0) -> dict | None:
+    """Depth-first search for the offer object (the dict whose slug matches) in hydration state."""
+    if depth > 40:
+        return None
+    if isinstance(payload, dict):
+        if payload.get("slug") == slug and payload.get("title"):
+            return payload
+        children = payload.values()
+    elif isinstance(payload, list):
+        children = payload
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_offer(child, slug, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+
+def _state_payloads(tree: LexborHTMLParser):
+    """Yield the JSON documents embedded in the page (`__NEXT_DATA__` and streamed flight data)."""
+    next_data = tree.css_first("script#__NEXT_DATA__")
+    if next_data is not None:
+        try:
+            yield json.loads(next_data.text())
+        except json.JSONDecodeError:
+            pass
+
+    chunks = []
+    for script in tree.css("script:not([src])"):
+        source = script.text()
+        if "__next_f" in source:
+            chunks.extend(json.loads(chunk) for chunk in _NEXT_F_PUSH.findall(source))
+    for line in "".join(chunks).split("\n"):
+        match = _FLIGHT_LINE.match(line)
+        if not match:
+            continue
+        try:
+            yield json.loads(line[match.end():])
+        except json.JSONDecodeError:
+            continue
+
+
+def extract_embedded(tree: LexborHTMLParser, url: str) -> dict | None:
+    """
+    Offer fields from the page's embedded hydration state.
+
+    The offer object has the same shape as the listing API items, so it is
+    mapped with `listing_offer_to_row`; the description is rendered HTML.
+
+    Returns:
+        dict | None: Raw values shaped like `extract_offer_data` output, or None if no state was found
+    """
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    for payload in _state_payloads(tree):
+        offer = _find_offer(payload, slug)
+        if offer is None:
+            continue
+        row = listing_offer_to_row(offer) or {}
+        row.pop("job_url", None)
+        row.pop("listing_hash", None)
+        row["tech_stack"] = _tech_stack(row.get("tech_stack") or {})
+        body = offer.get("body") or offer.get("description")
+        if isinstance(body, str) and body.strip():
+            row["description"] = _text(LexborHTMLParser(body).body)
+        return row
+    return None
+
+
+def parse_offer_page(html: str, url: str, fields=None) -> dict:
+    """
+    Extract offer fields from a server-rendered offer page.
+
+    Values from the markup win (they match what the browser path extracts);
+    the embedded state fills fields the markup lacks.
+
+    Args:
+        html: Page HTML
+        url: Offer URL (its slug identifies the offer in the embedded state)
+        fields: Only extract these `offers` columns (default: every field)
+
+    Returns:
+        dict: Raw values shaped like `extract_offer_data` output
+    """
+    tree = LexborHTMLParser(html)
+    data = extract_static(tree, extraction_config(fields))
+
+    wanted = set(data) if fields is None else set(fields)
+    if any(not data.get(field) for field in wanted):
+        embedded = extract_embedded(tree, url) or {}
+        for field in wanted:
+            if not data.get(field) and embedded.get(field):
+                data[field] = embedded[field]
+    if fields is not None:
+        data = {field: value for field, value in data.items() if field in fields}
+    return data
+
+
+class HttpOfferFetcher:
+    """
+    Fetch and parse offer pages without a browser.
+
+    Usage:
+        fetcher = HttpOfferFetcher()
+        extracted = await fetcher.fetch(url, limiter)   # None -> use Playwright
+        fetcher.log_summary()
+        await fetcher.close()
+
+    Args:
+        required: Fields that must be present for a page to count as a hit
+                  (defaults to `HTTP_REQUIRED_FIELDS`)
+        max_connections: Connection pool size (defaults to `HTTP_MAX_CONNECTIONS`)
+        on_page: Async callable awaited with `(url, html)` for every page served
+                 over HTTP (e.g. `HtmlArchive.put`)
+    """
+
+    def __init__(self, required=None, max_connections: int = None, on_page=None):
+        self.required = tuple(required or ScrapingConfig.HTTP_REQUIRED_FIELDS)
+        self.on_page = on_page
+        max_connections = max_connections or ScrapingConfig.HTTP_MAX_CONNECTIONS
+        self.client = httpx.AsyncClient(
+            headers={
+                "User-Agent": ScrapingConfig.HTTP_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "pl-PL,pl;q=0.9,en;q=0.8",
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(ScrapingConfig.HTTP_TIMEOUT),
+            follow_redirects=True,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.missing: dict[str, int] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        attempts = self.hits + self.misses + self.errors
+        return self.hits / attempts if attempts else 0.0
+
+    def _count(self, result: str):
+        HTTP_FETCHES.inc(result=result)
+        HTTP_HIT_RATIO.set(round(self.hit_rate, 4))
+
+    async def fetch(self, url: str, limiter: AdaptiveRateLimiter | None = None, fields=None) -> dict | None:
+        """
+        GET an offer page and extract its fields.
+
+        Args:
+            url: Offer URL
+            limiter: Rate limiter that receives the response status and latency
+            fields: Only extract these columns, e.g. for a backfill; of them only
+                    the ones in `required` must be present
+
+        Returns:
+            dict | None: Raw values shaped like `extract_offer_data` output, or
+                         None if the page could not be fetched or lacks required
+                         fields (the caller falls back to the browser)
+
+        Raises:
+            ThrottledError: The page answered 429 or 5xx
+        """
+        started = time.monotonic()
+        try:
+            with HTTP_FETCH_SECONDS.time():
+                response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            if limiter is not None:
+                limiter.record(None, time.monotonic() - started)
+            logging.debug(f"HTTP fetch of {url} failed: {e}")
+            self.errors += 1
+            self._count("error")
+            return None
+
+        if limiter is not None:
+            limiter.record(response.status_code, time.monotonic() - started, parse_retry_after(response.headers.get("retry-after")))
+        if response.status_code in THROTTLE_STATUSES or response.status_code >= 500:
+            raise ThrottledError(url, response.status_code)
+        if response.status_code != 200 or "html" not in response.headers.get("content-type", ""):
+            self.errors += 1
+            self._count("error")
+            return None
+
+        try:
+            data = parse_offer_page(response.text, url, fields)
+        except Exception as e:
+            logging.debug(f"Parsing {url} failed: {e}")
+            self.errors += 1
+            self._count("error")
+            return None
+
+        # A backfill only needs the required fields it asked for; the others may legitimately be empty
+        required = self.required if fields is None else [field for field in self.required if field in fields]
+        missing = [field for field in required if not data.get(field)]
+        if missing:
+            for field in missing:
+                self.missing[field] = self.missing.get(field, 0) + 1
+            self.misses += 1
+            self._count("miss")
+            return None
+        self.hits += 1
+        self._count("hit")
+        if self.on_page is not None:
+            await self.on_page(url, response.text)
+        return data
+
+    def log_summary(self):
+        """Log the HTTP hit rate and which required fields sent offers to the browser."""
+        attempts = self.hits + self.misses + self.errors
+        if not attempts:
+            return
+        logging.info(
+            f"🌐 HTTP-first fetch: {self.hits}/{attempts} offers served without a browser ({self.hit_rate:.1%}), "
+            f"{self.misses} missing fields, {self.errors} errors"
+        )
+        if self.missing:
+            top = ", ".join(f"{field}: {count}" for field, count in sorted(self.missing.items(), key=lambda item: -item[1]))
+            logging.info(f"🌐 Fields that sent offers to the browser: {top}")
+
+    async def close(self):
+        await self.client.aclose()
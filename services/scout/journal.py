@@ -0,0 +1,171 @@
+# journal.py
+"""
+Durable run journal for crash-safe scraping.
+
+Each run records the collected offer URLs (and, in listing mode, their
+listing rows) in `scrape_run_urls`, and every URL's state moves from
+`pending` to `done` or `failed` as workers finish it. If the task dies
+midway, the next run resumes the latest unfinished run: it skips link
+collection and only visits URLs that are not done yet.
+"""
+import asyncio
+import json
+import logging
+import asyncpg
+from .config import ScrapingConfig
+
+
+class RunJournal:
+    """
+    Record a scrape run's URLs and per-URL progress in the database.
+
+    Usage:
+        journal = RunJournal(pool)
+        if not await journal.resume():
+            urls = ...                      # collect links
+            await journal.start(urls, listing_rows)
+        await journal.record(url, True)     # as offers finish
+        await journal.finish()
+
+    Args:
+        pool: asyncpg pool (state updates must not share a busy connection)
+        flush_every: Buffered state updates written per round trip
+    """
+
+    def __init__(self, pool: asyncpg.Pool, flush_every: int = None):
+        self.pool = pool
+        self.flush_every = flush_every or ScrapingConfig.JOURNAL_FLUSH_EVERY
+        self.run_id: int | None = None
+        self.resumed = False
+        self.urls: list[str] = []
+        self.listing_rows: dict[str, dict] | None = None
+        self.done: set[str] = set()
+        self._pending: dict[str, str] = {}
+        self._lock = asyncio.Lock()
+
+    async def resume(self, max_age_hours: float = None) -> bool:
+        """
+        Load the most recent unfinished run, if one started recently enough.
+
+        Returns:
+            bool: True if a run was resumed (`urls`, `listing_rows` and `done` are loaded)
+        """
+        if max_age_hours is None:
+            max_age_hours = ScrapingConfig.RESUME_MAX_AGE_HOURS
+        async with self.pool.acquire() as conn:
+            run = await conn.fetchrow("""
+                SELECT id, started_at FROM scrape_runs
+                WHERE status = 'running'
+                  AND started_at > CURRENT_TIMESTAMP - make_interval(secs => $1)
+                ORDER BY started_at DESC
+                LIMIT 1
+            """, max_age_hours * 3600)
+            if run is None:
+                return False
+            rows = await conn.fetch(
+                "SELECT job_url, state, listing_row FROM scrape_run_urls WHERE run_id = $1",
+                run["id"],
+            )
+
+        self.run_id = run["id"]
+        self.resumed = True
+        self.urls = [row["job_url"] for row in rows]
+        self.done = {row["job_url"] for row in rows if row["state"] == "done"}
+        listing_rows = {row["job_url"]: json.loads(row["listing_row"]) for row in rows if row["listing_row"]}
+        self.listing_rows = listing_rows or None
+        logging.info(
+            f"📒 Resuming run {self.run_id} from {run['started_at']}: "
+            f"{len(self.done)}/{len(self.urls)} offers already done"
+        )
+        return True
+
+    async def start(self, urls: list[str], listing_rows: dict[str, dict] | None = None):
+        """
+        Open a new run and checkpoint its collected URLs.
+
+        Older unfinished runs are marked `abandoned` so they are never resumed,
+        and runs older than `JOURNAL_RETENTION_DAYS` are pruned.
+        """
+        self.urls = list(urls)
+        self.listing_rows = listing_rows
+        records = [
+            (url, json.dumps(listing_rows[url], default=str) if listing_rows and url in listing_rows else None)
+            for url in self.urls
+        ]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await self.abandon_running(conn)
+                await conn.execute(
+                    "DELETE FROM scrape_runs WHERE started_at < CURRENT_TIMESTAMP - make_interval(days => $1)",
+                    ScrapingConfig.JOURNAL_RETENTION_DAYS,
+                )
+                self.run_id = await conn.fetchval(
+                    "INSERT INTO scrape_runs (url_count) VALUES ($1) RETURNING id", len(self.urls)
+                )
+                await conn.copy_records_to_table(
+                    "scrape_run_urls",
+                    records=[(self.run_id, url, listing_row) for url, listing_row in records],
+                    columns=["run_id", "job_url", "listing_row"],
+                )
+        logging.info(f"📒 Started run {self.run_id} with {len(self.urls)} offers checkpointed")
+
+    async def abandon_running(self, conn=None):
+        """
+        Mark unfinished runs `abandoned` so they are never resumed.
+
+        A coordinator that does not resume calls this before collecting links,
+        so workers never pick up the previous run's leftover queue.
+        """
+        query = "UPDATE scrape_runs SET status = 'abandoned' WHERE status = 'running'"
+        if conn is not None:
+            await conn.execute(query)
+            return
+        async with self.pool.acquire() as conn:
+            await conn.execute(query)
+
+    async def record(self, url: str, ok: bool):
+        """Buffer an offer's outcome; written once `flush_every` outcomes are buffered."""
+        if self.run_id is None:
+            return
+        self._pending[url] = "done" if ok else "failed"
+        if ok:
+            self.done.add(url)
+        if len(self._pending) >= self.flush_every:
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered outcomes in one set-based UPDATE."""
+        async with self._lock:
+            if not self._pending or self.run_id is None:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.execute("""
+                        UPDATE scrape_run_urls r
+                        SET state = s.state, updated_at = CURRENT_TIMESTAMP
+                        FROM unnest($2::text[], $3::text[]) AS s(job_url, state)
+                        WHERE r.run_id = $1 AND r.job_url = s.job_url
+                    """, self.run_id, list(pending), list(pending.values()))
+            except Exception as e:
+                # Losing a checkpoint only means re-checking those offers on resume
+                logging.warning(f"⚠️ Could not checkpoint {len(pending)} offers: {e}")
+
+    async def finish(self, status: str = "completed"):
+        """Flush outstanding outcomes and close the run."""
+        if self.run_id is None:
+            return
+        await self.flush()
+        async with self.pool.acquire() as conn:
+            counts = await conn.fetchrow("""
+                UPDATE scrape_runs
+                SET status = $2, finished_at = CURRENT_TIMESTAMP,
+                    done_count = (SELECT COUNT(*) FROM scrape_run_urls WHERE run_id = $1 AND state = 'done'),
+                    failed_count = (SELECT COUNT(*) FROM scrape_run_urls WHERE run_id = $1 AND state = 'failed')
+                WHERE id = $1
+                RETURNING done_count, failed_count
+            """, self.run_id, status)
+        logging.info(
+            f"📒 Run {self.run_id} {status}: {counts['done_count']} offers done, "
+            f"{counts['failed_count']} failed"
+        )
@@ -0,0 +1,209 @@
+# listing.py
+"""
+Fast ingest from the listing API responses justjoin.it's frontend fetches.
+
+While `collect_offer_links` scrolls the listing, the site loads offer data as
+JSON. `ListingCapture` intercepts those responses and turns each offer into
+an `offers` row (title, company, location, salaries, skills, mode, ...), so
+detail pages only need to be visited for fields the payload lacks.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from playwright.async_api import Page, Response
+from .config import ScrapingConfig
+
+OFFER_URL_PREFIX = "https://justjoin.it/job-offer/"
+
+# Listing employment type -> (offers salary column, label used on offer pages)
+EMPLOYMENT_TYPES = {
+    "b2b": ("salary_b2b", "B2B"),
+    "permanent": ("salary_permanent", "Permanent"),
+    "mandate_contract": ("salary_mandate", "Mandate"),
+    "mandate": ("salary_mandate", "Mandate"),
+    "internship": ("salary_internship", "Internship"),
+    "specific_task_contract": ("salary_specific_task", "Specific-task"),
+    "specific_task": ("salary_specific_task", "Specific-task"),
+    "any": ("salary_any", "Any"),
+}
+
+WORKING_TIMES = {
+    "full_time": "Full-time",
+    "part_time": "Part-time",
+    "practice_internship": "Internship",
+    "freelance": "Freelance",
+}
+
+
+def _first(item: dict, *keys):
+    """Return the first non-empty value among `keys`."""
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _humanize(value) -> str | None:
+    """Turn an API enum like "full_time" into "Full time"."""
+    if not isinstance(value, str) or not value:
+        return None
+    return value.replace("_", " ").strip().capitalize()
+
+
+def _format_amount(value) -> str:
+    """Format a salary amount like the offer page does ("15 000")."""
+    try:
+        return f"{int(float(value)):,}".replace(",", " ")
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _salary_text(salary: dict, label: str) -> str | None:
+    """Build salary text in the offer page format: "15 000 - 20 000 PLN Net per month - B2B"."""
+    low = _first(salary, "from", "min")
+    high = _first(salary, "to", "max")
+    currency = _first(salary, "currency", "currencyCode")
+    if low is None and high is None:
+        return None
+    amount = _format_amount(low if low is not None else high)
+    if low is not None and high is not None and high != low:
+        amount = f"{_format_amount(low)} - {_format_amount(high)}"
+    gross = salary.get("gross")
+    kind = "Gross" if gross is True else "Net" if gross is False else None
+    unit = _first(salary, "unit", "period") or "month"
+    parts = [amount, str(currency or "").upper(), kind, "per", str(unit).lower(), "-", label]
+    return " ".join(part for part in parts if part)
+
+
+def _skills(item: dict) -> dict:
+    """Required skills as {name: level}; level is None when the listing has none."""
+    skills = {}
+    for skill in _first(item, "requiredSkills", "skills") or []:
+        if isinstance(skill, str):
+            skills[skill.strip()] = None
+        elif isinstance(skill, dict) and skill.get("name"):
+            level = skill.get("level")
+            skills[str(skill["name"]).strip()] = str(level) if level is not None else None
+    return skills
+
+
+def listing_offer_to_row(item: dict) -> dict | None:
+    """
+    Map one listing API offer to raw `offers` values.
+
+    Args:
+        item: Offer object from the listing payload
+
+    Returns:
+        dict | None: Raw values keyed like `extract_offer_data` output, or None if the item has no slug
+    """
+    slug = _first(item, "slug", "id")
+    if not isinstance(slug, str):
+        return None
+
+    row = {
+        "job_url": f"{OFFER_URL_PREFIX}{slug}",
+        # Cheap change signal: any edit to the listing payload changes this hash
+        "listing_hash": hashlib.sha256(json.dumps(item, sort_keys=True, default=str).encode("utf-8")).hexdigest(),
+        "job_title": _first(item, "title"),
+        "company": _first(item, "companyName", "company_name"),
+        "location": _first(item, "city", "location"),
+        "category": _first(item, "category", "categoryName", "marker_icon"),
+        "experience": _humanize(_first(item, "experienceLevel", "experience_level")),
+        "operating_mode": _humanize(_first(item, "workplaceType", "workplace_type")),
+        "description": None,
+    }
+
+    working_time = _first(item, "workingTime", "working_time")
+    row["work_schedule"] = WORKING_TIMES.get(working_time, _humanize(working_time))
+
+    employment_labels = []
+    for salary in _first(item, "employmentTypes", "employment_types") or []:
+        if not isinstance(salary, dict):
+            continue
+        column, label = EMPLOYMENT_TYPES.get(str(salary.get("type", "")).lower(), (None, _humanize(salary.get("type"))))
+        if label and label not in employment_labels:
+            employment_labels.append(label)
+        if column and not row.get(column):
+            row[column] = _salary_text(salary, label)
+    row["employment_type"] = ", ".join(employment_labels) or None
+
+    row["tech_stack"] = _skills(item)
+    return row
+
+
+def _offer_items(payload) -> list[dict]:
+    """Find the list of offer objects in a listing payload."""
+    if isinstance(payload, list):
+        return [item for item in payload if isinstance(item, dict)]
+    if isinstance(payload, dict):
+        for key in ("data", "offers", "items", "results"):
+            if isinstance(payload.get(key), list):
+                return [item for item in payload[key] if isinstance(item, dict)]
+    return []
+
+
+class ListingCapture:
+    """
+    Collect offer rows from listing API responses seen by a page.
+
+    Usage:
+        capture = ListingCapture()
+        capture.attach(page)   # before navigating to the listing
+        ...                    # scroll / collect links
+        await capture.drain()
+        capture.rows           # {job_url: raw row}
+    """
+
+    def __init__(self, url_pattern: str = None):
+        self.url_pattern = re.compile(url_pattern or ScrapingConfig.LISTING_API_PATTERN)
+        self.rows: dict[str, dict] = {}
+        self.responses = 0
+        self._pending: set[asyncio.Task] = set()
+
+    def attach(self, page: Page):
+        """Start listening to the page's responses."""
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response):
+        if response.request.resource_type not in ("fetch", "xhr"):
+            return
+        if not self.url_pattern.search(response.url):
+            return
+        task = asyncio.create_task(self._parse(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _parse(self, response: Response):
+        try:
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            payload = await response.json()
+        except Exception as e:
+            logging.debug(f"Skipping listing response {response.url}: {e}")
+            return
+
+        items = _offer_items(payload)
+        if not items:
+            return
+        self.responses += 1
+        for item in items:
+            row = listing_offer_to_row(item)
+            if row:
+                self.rows[row["job_url"]] = row
+
+    async def drain(self):
+        """Wait for responses that are still being parsed."""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        logging.info(f"📦 Captured {len(self.rows)} offers from {self.responses} listing responses")
+
+
+def needs_detail_page(row: dict | None) -> bool:
+    """Whether an offer must still be visited to fill `LISTING_DETAIL_FIELDS`."""
+    if row is None:
+        return True
+    return any(not row.get(field) for field in ScrapingConfig.LISTING_DETAIL_FIELDS)
@@ -0,0 +1,140 @@
+# memory.py
+"""
+Memory watchdog for browser recycling.
+
+Instead of restarting Chromium every N offers, Scout samples the resident
+memory of its browser process tree (every process descended from this
+Python process: the Playwright driver and all Chromium processes) and the
+JS heap of the current page, and recycles a context or the whole browser
+only when a threshold is crossed. Peaks and recycle counts are kept for
+the run summary.
+"""
+import logging
+import os
+from pathlib import Path
+from playwright.async_api import Page
+from .config import ScrapingConfig
+
+_PROC = Path("/proc")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+HEAP_SCRIPT = "() => performance.memory ? performance.memory.usedJSHeapSize : null"
+
+
+def _process_tree() -> dict[int, int]:
+    """Map pid -> parent pid for every process visible in /proc."""
+    parents = {}
+    for entry in _PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after ")" are fixed
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(entry.name)] = int(fields[1])
+    return parents
+
+
+def browser_rss_mb(root_pid: int = None) -> float | None:
+    """
+    Resident memory (MB) of all processes descended from `root_pid`.
+
+    RSS counts shared pages once per process, so this overstates real usage
+    somewhat; it is meant for thresholds, not exact accounting.
+
+    Returns:
+        float | None: Summed RSS, or None where /proc is unavailable
+    """
+    if not _PROC.is_dir():
+        return None
+    root_pid = root_pid or os.getpid()
+    try:
+        parents = _process_tree()
+    except OSError:
+        return None
+
+    children: dict[int, list[int]] = {}
+    for pid, ppid in parents.items():
+        children.setdefault(ppid, []).append(pid)
+
+    total_pages = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            total_pages += int((_PROC / str(pid) / "statm").read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    return total_pages * _PAGE_SIZE / 1024 / 1024
+
+
+async def js_heap_mb(page: Page) -> float | None:
+    """Used JS heap (MB) of a page via Chromium's `performance.memory`, or None."""
+    try:
+        used = await page.evaluate(HEAP_SCRIPT)
+    except Exception:
+        return None
+    return used / 1024 / 1024 if used else None
+
+
+class MemoryWatchdog:
+    """
+    Decide when to recycle browser contexts or the browser from sampled memory.
+
+    Args:
+        rss_limit_mb: Recycle when the browser process tree's RSS exceeds this
+        heap_limit_mb: Recycle a context when a page's used JS heap exceeds this
+        check_every: Sample memory every N offers (per caller)
+    """
+
+    def __init__(self, rss_limit_mb: float = None, heap_limit_mb: float = None, check_every: int = None):
+        self.rss_limit_mb = rss_limit_mb or ScrapingConfig.BROWSER_RSS_LIMIT_MB
+        self.heap_limit_mb = heap_limit_mb or ScrapingConfig.JS_HEAP_LIMIT_MB
+        self.check_every = check_every or ScrapingConfig.MEMORY_CHECK_EVERY
+        self.samples = 0
+        self.peak_rss_mb = 0.0
+        self.peak_heap_mb = 0.0
+        self.context_recycles = 0
+        self.browser_restarts = 0
+
+    async def check(self, page: Page, handled: int) -> str | None:
+        """
+        Sample memory (every `check_every` offers) and decide what to recycle.
+
+        Args:
+            page: Page whose JS heap is sampled
+            handled: Offers handled so far on this page's context
+
+        Returns:
+            str | None: "browser" when RSS is over the limit, "context" when the
+                        JS heap is, or None
+        """
+        if not handled or handled % self.check_every:
+            return None
+
+        self.samples += 1
+        rss = browser_rss_mb()
+        heap = await js_heap_mb(page)
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if heap is not None:
+            self.peak_heap_mb = max(self.peak_heap_mb, heap)
+
+        if rss is not None and rss > self.rss_limit_mb:
+            logging.info(f"🧠 Browser RSS {rss:.0f} MB over {self.rss_limit_mb} MB limit")
+            return "browser"
+        if heap is not None and heap > self.heap_limit_mb:
+            logging.info(f"🧠 JS heap {heap:.0f} MB over {self.heap_limit_mb} MB limit")
+            return "context"
+        return None
+
+    def log_summary(self):
+        """Log peak memory and how often contexts and the browser were recycled."""
+        logging.info(
+            f"🧠 Memory: peak browser RSS {self.peak_rss_mb:.0f} MB, peak JS heap {self.peak_heap_mb:.0f} MB "
+            f"over {self.samples} samples; {self.context_recycles} context recycles, "
+            f"{self.browser_restarts} browser restarts"
+        )
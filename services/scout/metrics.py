@@ -0,0 +1,225 @@
+# metrics.py
+"""
+Structured run instrumentation for Scout.
+
+Histograms, counters and gauges live in one process-wide registry. The
+scraping code records into the module-level metrics below, and at the end
+of a run `write_reports` writes a JSON report (with percentiles) and a
+Prometheus textfile (for node_exporter's textfile collector or a pushgateway),
+so runs can be compared to see where time goes and to catch regressions.
+"""
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from .config import ScrapingConfig
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100)
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _label_text(key: tuple, extra: dict = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def report(self) -> dict:
+        return {_label_text(key) or "total": value for key, value in self.values.items()}
+
+    def prometheus(self) -> list[str]:
+        return [f"{self.name}{_label_text(key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """Last set value per label set."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[_key(labels)] = value
+
+
+class Histogram:
+    """Bucketed observations per label set; raw samples are kept for percentiles in the JSON report."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.samples: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels):
+        self.samples.setdefault(_key(labels), []).append(value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a `with` block (also across awaits)."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def report(self) -> dict:
+        report = {}
+        for key, values in self.samples.items():
+            ordered = sorted(values)
+
+            def pct(q):
+                return round(ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))], 4)
+
+            report[_label_text(key) or "all"] = {
+                "count": len(ordered),
+                "sum": round(sum(ordered), 4),
+                "p50": pct(0.5),
+                "p95": pct(0.95),
+                "max": round(ordered[-1], 4),
+            }
+        return report
+
+    def prometheus(self) -> list[str]:
+        lines = []
+        for key, values in self.samples.items():
+            for bound in self.buckets:
+                count = sum(1 for value in values if value <= bound)
+                lines.append(f"{self.name}_bucket{_label_text(key, {'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{_label_text(key, {'le': '+Inf'})} {len(values)}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {sum(values)}")
+            lines.append(f"{self.name}_count{_label_text(key)} {len(values)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of named metrics."""
+
+    def __init__(self):
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self.started_at = datetime.now(timezone.utc)
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, help, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets=SECONDS_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def report(self) -> dict:
+        """All metrics as a JSON-serializable dict (histograms as count/sum/p50/p95/max)."""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "metrics": {name: report for name, metric in self.metrics.items() if (report := metric.report())},
+        }
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in self.metrics.items():
+            samples = metric.prometheus()
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Scraping
+NAVIGATION_SECONDS = REGISTRY.histogram("scout_navigation_seconds", "Offer page navigation time (page.goto)")
+READY_WAIT_SECONDS = REGISTRY.histogram("scout_ready_wait_seconds", "Wait for required selectors after navigation")
+EXTRACT_SECONDS = REGISTRY.histogram("scout_extract_seconds", "In-page extraction time per field group")
+OFFER_SECONDS = REGISTRY.histogram("scout_offer_seconds", "Total time to scrape one offer page")
+PAGES = REGISTRY.counter("scout_pages_total", "Offer pages processed by result")
+FAILURES = REGISTRY.counter("scout_failures_total", "Failures by stage and error type")
+HTTP_FETCHES = REGISTRY.counter("scout_http_fetches_total", "HTTP-first offer fetches by result (hit, miss, error)")
+HTTP_FETCH_SECONDS = REGISTRY.histogram("scout_http_fetch_seconds", "HTTP-first offer page GET time")
+HTTP_HIT_RATIO = REGISTRY.gauge("scout_http_hit_ratio", "Share of offers served without a browser")
+
+# Link collection
+IDLE_SCROLLS = REGISTRY.histogram("scout_idle_scroll_streak", "Consecutive scrolls without new links before progress or stop", buckets=COUNT_BUCKETS)
+LINKS = REGISTRY.gauge("scout_links_collected", "Offer links collected from the listing")
+FACET_LINKS = REGISTRY.gauge("scout_facet_links_collected", "Offer links collected per listing facet")
+
+# Browser and database
+BROWSER_RECYCLE_SECONDS = REGISTRY.histogram("scout_browser_recycle_seconds", "Time spent recycling a context or restarting the browser")
+DB_WRITE_SECONDS = REGISTRY.histogram("scout_db_write_seconds", "Database write time per batch or single offer")
+DB_ROWS = REGISTRY.counter("scout_db_rows_total", "Offers written to or failed in the database")
+
+# Run
+PHASE_SECONDS = REGISTRY.gauge("scout_phase_seconds", "Wall time of each run phase")
+RUN_SECONDS = REGISTRY.gauge("scout_run_seconds", "Wall time of the whole run")
+
+
+@contextmanager
+def phase(name: str):
+    """Record the wall time of a run phase (collect_links, process_offers, ...)."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS.set(round(time.monotonic() - started, 3), phase=name)
+
+
+def record_failure(stage: str, error: BaseException | str):
+    """Count a failure by stage and error type (exception class name or a short reason)."""
+    FAILURES.inc(stage=stage, type=error if isinstance(error, str) else type(error).__name__)
+
+
+def write_reports(directory: str | Path = None, registry: MetricsRegistry = REGISTRY) -> tuple[Path, Path]:
+    """
+    Write the run's JSON report and Prometheus textfile.
+
+    Files are written to a temporary name and renamed, so a textfile
+    collector never reads a partial file.
+
+    Args:
+        directory: Output directory (defaults to ScrapingConfig.METRICS_DIR)
+        registry: Metrics to write
+
+    Returns:
+        tuple[Path, Path]: Paths of the JSON report and the Prometheus textfile
+    """
+    directory = Path(directory or ScrapingConfig.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path = directory / "scout-run.json"
+    prom_path = directory / "scout.prom"
+    for path, content in ((json_path, json.dumps(registry.report(), indent=2)), (prom_path, registry.prometheus_text())):
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
+    logging.info(f"📈 Run metrics written to {json_path} and {prom_path}")
+    return json_path, prom_path
@@ -0,0 +1,122 @@
+# network.py
+"""
+Lean browser profile: request routing that blocks non-essential resources.
+
+A single `ResourceBlocker` is attached to every browser context when lean
+mode is enabled. It aborts requests for blocked resource types and for hosts
+outside the allow-list, and keeps per-page and per-run request/byte counters
+so lean and default runs can be compared.
+"""
+import logging
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+from .config import ScrapingConfig
+
+
+@dataclass
+class NetworkStats:
+    """Request and byte counters for a page (or a whole run)."""
+    requests_allowed: int = 0
+    requests_blocked: int = 0
+    bytes_loaded: int = 0
+    blocked_by_reason: dict = field(default_factory=dict)
+
+    def add(self, other: "NetworkStats"):
+        self.requests_allowed += other.requests_allowed
+        self.requests_blocked += other.requests_blocked
+        self.bytes_loaded += other.bytes_loaded
+        for reason, count in other.blocked_by_reason.items():
+            self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + count
+
+
+class ResourceBlocker:
+    """
+    Route handler that blocks non-essential requests in every attached context.
+
+    Args:
+        blocked_types: Playwright resource types to abort (e.g. "image", "font")
+        allowed_hosts: Hosts (and their subdomains) allowed to serve any request;
+                       requests to other hosts are treated as third-party and aborted
+    """
+
+    def __init__(self, blocked_types=None, allowed_hosts=None):
+        self.blocked_types = set(blocked_types if blocked_types is not None else ScrapingConfig.BLOCKED_RESOURCE_TYPES)
+        self.allowed_hosts = tuple(allowed_hosts if allowed_hosts is not None else ScrapingConfig.ALLOWED_HOSTS)
+        self.totals = NetworkStats()
+        self.pages_seen = 0
+        self._pages: dict = {}
+        self._watched: set = set()  # Pages with a close handler, until they close
+
+    async def attach(self, context):
+        """Install request routing and response accounting on a browser context."""
+        await context.route("**/*", self._handle_route)
+        context.on("response", self._on_response)
+
+    def block_reason(self, url: str, resource_type: str) -> str | None:
+        """Return why a request should be blocked, or None if it is allowed."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        host = (parts.hostname or "").lower()
+        if not any(host == allowed or host.endswith(f".{allowed}") for allowed in self.allowed_hosts):
+            return "third-party"
+        return None
+
+    async def _handle_route(self, route):
+        request = route.request
+        stats = self._stats_for(request)
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            stats.requests_allowed += 1
+            await route.continue_()
+            return
+        stats.requests_blocked += 1
+        stats.blocked_by_reason[reason] = stats.blocked_by_reason.get(reason, 0) + 1
+        await route.abort()
+
+    def _on_response(self, response):
+        # Content-Length is an approximation (absent for chunked responses)
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except (TypeError, ValueError):
+            size = 0
+        self._stats_for(response.request).bytes_loaded += size
+
+    def _stats_for(self, request) -> NetworkStats:
+        try:
+            page = request.frame.page
+        except Exception:
+            page = None
+        stats = self._pages.get(page)
+        if stats is None:
+            stats = self._pages[page] = NetworkStats()
+            if page is not None and page not in self._watched:
+                # Pages whose stats are never popped (listing, facet pages) must not outlive their close
+                self._watched.add(page)
+                page.on("close", self._on_page_close)
+        return stats
+
+    def _on_page_close(self, page):
+        self._watched.discard(page)
+        stats = self._pages.pop(page, None)
+        if stats is not None:
+            self.totals.add(stats)
+
+    def pop_page_stats(self, page) -> NetworkStats:
+        """Return and reset the counters collected for a page since the last call."""
+        stats = self._pages.pop(page, NetworkStats())
+        self.totals.add(stats)
+        self.pages_seen += 1
+        return stats
+
+    def log_summary(self):
+        """Log request and byte totals for the run."""
+        totals = self.totals
+        per_page = totals.requests_blocked / self.pages_seen if self.pages_seen else 0.0
+        logging.info(
+            f"🪶 Lean mode: blocked {totals.requests_blocked} requests ({per_page:.1f}/page), "
+            f"allowed {totals.requests_allowed}, loaded {totals.bytes_loaded / 1024 / 1024:.1f} MB "
+            f"over {self.pages_seen} pages; blocked by reason: {totals.blocked_by_reason}"
+        )
@@ -0,0 +1,143 @@
+# ratelimit.py
+"""
+Adaptive request pacing shared by all offer workers.
+
+A token bucket hands out request slots; its refill rate follows AIMD:
+every fast successful response raises the rate a little, while throttling
+(429/503) or a spike of errors halves it and pauses all workers with an
+exponential, jittered backoff (or the server's Retry-After). Scout thus
+goes as fast as the site allows and no faster.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from .config import ScrapingConfig
+from .metrics import REGISTRY
+
+RATE = REGISTRY.gauge("scout_request_rate", "Current adaptive request rate (requests/sec)")
+BACKOFFS = REGISTRY.counter("scout_backoffs_total", "Limiter backoffs by reason")
+
+THROTTLE_STATUSES = (429, 503)
+
+
+class ThrottledError(Exception):
+    """An offer page answered with a throttling or server error status."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"{url} returned HTTP {status}")
+        self.url = url
+        self.status = status
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an AIMD-controlled refill rate.
+
+    Every caller awaits `acquire()` before a request and reports the outcome
+    with `record()`; waiters are served in order, so concurrent workers
+    together never exceed the current rate.
+
+    Args:
+        rate: Initial requests per second
+        min_rate: Lower bound for the rate
+        max_rate: Upper bound for the rate (a politeness ceiling)
+        burst: Bucket capacity (requests that may go out back to back)
+    """
+
+    def __init__(self, rate: float = None, min_rate: float = None, max_rate: float = None, burst: float = None):
+        self.min_rate = min_rate or ScrapingConfig.MIN_REQUESTS_PER_SECOND
+        self.max_rate = max_rate or ScrapingConfig.MAX_REQUESTS_PER_SECOND
+        self.rate = min(self.max_rate, max(self.min_rate, rate or ScrapingConfig.INITIAL_REQUESTS_PER_SECOND))
+        self.burst = burst or ScrapingConfig.RATE_BURST
+        self.tokens = 1.0
+        self.backoffs = 0
+        self.peak_rate = self.rate
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_backoffs = 0
+        self._recent = deque(maxlen=ScrapingConfig.ERROR_WINDOW)
+        self._lock = asyncio.Lock()
+        RATE.set(round(self.rate, 3))
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a request slot (and for any backoff pause to end)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def record(self, status: int | None, latency: float, retry_after: float | None = None):
+        """
+        Feed back the outcome of a request.
+
+        Args:
+            status: HTTP status of the response, or None if the request failed outright
+            latency: Seconds the request took
+            retry_after: Server-requested delay in seconds (Retry-After), if any
+        """
+        if status in THROTTLE_STATUSES:
+            self._recent.append(True)
+            self._back_off(f"HTTP {status}", retry_after)
+            return
+
+        failed = status is None or status >= 500
+        self._recent.append(failed)
+        if failed:
+            errors = sum(self._recent)
+            if len(self._recent) >= ScrapingConfig.ERROR_WINDOW // 2 and errors / len(self._recent) >= ScrapingConfig.ERROR_SPIKE_RATIO:
+                self._back_off(f"{errors}/{len(self._recent)} recent requests failed")
+                self._recent.clear()
+            return
+
+        self._consecutive_backoffs = 0
+        if latency <= ScrapingConfig.SLOW_RESPONSE_SECONDS:
+            # Additive increase: roughly +RATE_INCREASE_STEP req/s per second of fast responses
+            self._set_rate(self.rate + ScrapingConfig.RATE_INCREASE_STEP / max(self.rate, 1.0))
+        else:
+            self._set_rate(self.rate * ScrapingConfig.SLOW_RESPONSE_FACTOR)
+
+    def _back_off(self, reason: str, retry_after: float | None = None):
+        """Multiplicative decrease plus an exponential, jittered pause for all workers."""
+        self._set_rate(self.rate * ScrapingConfig.RATE_DECREASE_FACTOR)
+        delay = ScrapingConfig.BACKOFF_BASE * (2 ** self._consecutive_backoffs)
+        delay = min(ScrapingConfig.BACKOFF_MAX, delay) * random.uniform(0.5, 1.0)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, ScrapingConfig.BACKOFF_MAX))
+        self._consecutive_backoffs += 1
+        self.backoffs += 1
+        self.tokens = 0.0
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        BACKOFFS.inc(reason="throttled" if reason.startswith("HTTP") else "errors")
+        logging.warning(f"🐢 Backing off {delay:.1f}s ({reason}); rate now {self.rate:.2f} req/s")
+
+    def _set_rate(self, rate: float):
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.peak_rate = max(self.peak_rate, self.rate)
+        RATE.set(round(self.rate, 3))
+
+    def log_summary(self):
+        """Log the final and peak rate and how often the limiter backed off."""
+        logging.info(
+            f"🚦 Rate limiter: {self.rate:.2f} req/s now (peak {self.peak_rate:.2f}), {self.backoffs} backoffs"
+        )
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds from a Retry-After header given in seconds (HTTP-date values are ignored)."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
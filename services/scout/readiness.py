@@ -0,0 +1,146 @@
+# readiness.py
+"""
+Page readiness strategy for offer pages.
+
+Instead of `wait_until='networkidle'` (which long-polling widgets can hold
+open for many seconds), pages are opened with `domcontentloaded` and then
+the selectors the extractor needs are awaited directly. Each field's wait
+timeout adapts to how long that selector took on recent pages, and a
+networkidle wait is used only as a fallback when required fields are missing.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from playwright.async_api import Page
+from .config import ScrapingConfig
+from .selectors import SELECTORS, get_selector
+from .metrics import NAVIGATION_SECONDS, READY_WAIT_SECONDS, record_failure
+from .ratelimit import THROTTLE_STATUSES, AdaptiveRateLimiter, ThrottledError, parse_retry_after
+
+# Extractor fields that must be present, and the selector that signals each one
+READY_SELECTORS = {
+    "job_title": get_selector(SELECTORS.JOB_TITLE),
+    "tech_stack": get_selector(SELECTORS.TECH_NAMES),
+}
+
+
+class ReadinessStrategy:
+    """
+    Navigate to offer pages and wait only for what the extractor needs.
+
+    Args:
+        fields: Names of required fields (keys of `READY_SELECTORS`)
+        mode: "selectors" (default) or "networkidle" for the legacy behaviour
+    """
+
+    def __init__(self, fields=None, mode: str = None):
+        self.mode = mode or ScrapingConfig.READINESS_MODE
+        self.fields = tuple(fields if fields is not None else ScrapingConfig.READY_FIELDS)
+        self._samples = {field: deque(maxlen=ScrapingConfig.READY_HISTORY) for field in self.fields}
+        self.pages = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+    def percentile(self, field: str, q: float) -> float | None:
+        """Wait time (ms) at percentile `q` (0-100) of recent samples for a field, or None."""
+        samples = self._samples.get(field)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+    def timeout_for(self, field: str) -> int:
+        """
+        Current wait timeout for a field in ms.
+
+        Until enough samples are collected the configured initial timeout is used;
+        afterwards it is the p95 of recent wait times scaled by a safety factor,
+        clamped to [READY_TIMEOUT_MIN, READY_TIMEOUT_MAX].
+        """
+        samples = self._samples.get(field)
+        if not samples or len(samples) < ScrapingConfig.READY_MIN_SAMPLES:
+            return ScrapingConfig.READY_TIMEOUT
+        timeout = int(self.percentile(field, 95) * ScrapingConfig.READY_TIMEOUT_FACTOR)
+        return max(ScrapingConfig.READY_TIMEOUT_MIN, min(ScrapingConfig.READY_TIMEOUT_MAX, timeout))
+
+    async def goto(self, page: Page, url: str, limiter: AdaptiveRateLimiter | None = None) -> set[str]:
+        """
+        Navigate to a URL and wait for the required selectors.
+
+        Args:
+            page: Playwright page object
+            url: Offer URL
+            limiter: Rate limiter to feed the response status and latency back to
+
+        Returns:
+            set[str]: Required fields whose selector did not appear in time
+
+        Raises:
+            ThrottledError: The page answered 429 or 5xx (selectors are not awaited)
+        """
+        self.pages += 1
+        wait_until = 'networkidle' if self.mode == "networkidle" else 'domcontentloaded'
+        started = time.monotonic()
+        try:
+            with NAVIGATION_SECONDS.time(wait_until=wait_until):
+                response = await page.goto(url, wait_until=wait_until, timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
+        except Exception:
+            if limiter is not None:
+                limiter.record(None, time.monotonic() - started)
+            raise
+
+        # No response means a same-document navigation, which cannot be throttled
+        status = response.status if response is not None else 200
+        if limiter is not None:
+            retry_after = parse_retry_after(response.headers.get("retry-after")) if response is not None else None
+            limiter.record(status, time.monotonic() - started, retry_after)
+        if status in THROTTLE_STATUSES or status >= 500:
+            raise ThrottledError(url, status)
+
+        if self.mode == "networkidle":
+            return set()
+
+        started = time.monotonic()
+
+        async def wait_for(field: str) -> bool:
+            try:
+                await page.wait_for_selector(READY_SELECTORS[field], state='attached', timeout=self.timeout_for(field))
+            except Exception:
+                self.timeouts += 1
+                record_failure("ready_timeout", field)
+                return False
+            self._samples[field].append((time.monotonic() - started) * 1000)
+            return True
+
+        # Fields are awaited concurrently so each sample measures its own selector
+        ready = await asyncio.gather(*(wait_for(field) for field in self.fields))
+        READY_WAIT_SECONDS.observe(time.monotonic() - started)
+        return {field for field, ok in zip(self.fields, ready) if not ok}
+
+    def missing_fields(self, extracted: dict) -> set[str]:
+        """Return required fields that are empty in an extraction result."""
+        return {field for field in self.fields if not extracted.get(field)}
+
+    def needs_fallback(self, extracted: dict) -> bool:
+        """Whether a networkidle wait and re-extraction could still fill required fields."""
+        return self.mode != "networkidle" and bool(self.missing_fields(extracted))
+
+    async def settle(self, page: Page):
+        """Fallback: wait for the network to go idle (bounded) before re-extracting."""
+        self.fallbacks += 1
+        try:
+            await page.wait_for_load_state('networkidle', timeout=ScrapingConfig.NETWORKIDLE_FALLBACK_TIMEOUT)
+        except Exception as e:
+            logging.warning(f"⚠️ Network did not go idle: {e}")
+
+    def log_summary(self):
+        """Log fallback counts and the learned per-field timeouts."""
+        if self.mode == "networkidle":
+            return
+        learned = ", ".join(f"{field}={self.timeout_for(field)}ms" for field in self.fields)
+        logging.info(
+            f"⏳ Readiness: {self.pages} pages, {self.timeouts} selector timeouts, "
+            f"{self.fallbacks} networkidle fallbacks; timeouts now {learned}"
+        )
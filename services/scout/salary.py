@@ -0,0 +1,110 @@
+# salary.py
+"""
+Salary parsing at ingest.
+
+Offer pages and listing rows give salaries as text per contract type, e.g.
+"18 000 - 25 000 PLN Net per month - B2B". Each text is parsed once when the
+offer is built: the per-contract results are stored in the `salaries` JSONB
+column (read by the `offers_parsed` view), and the headline salary (the
+contract the API shows) goes into typed, indexed `salary_*` columns so the
+API can filter and sort on it cheaply.
+"""
+import json
+import re
+from decimal import Decimal, InvalidOperation
+
+# Same shape the offers_parsed view used to match with regexp_match; Gross/Net is optional
+SALARY_RE = re.compile(
+    r"(\d[\d\s,.]*?)(?:\s*-\s*(\d[\d\s,.]*))?\s*([A-Z]{3})\s*(?:(Gross|Net)\s*)?per\s*(\w+)",
+    re.IGNORECASE,
+)
+
+# Raw salary column -> contract key in `salaries`
+SALARY_CONTRACTS = {
+    "salary_any": "any",
+    "salary_b2b": "b2b",
+    "salary_internship": "internship",
+    "salary_mandate": "mandate",
+    "salary_permanent": "permanent",
+    "salary_specific_task": "specific_task",
+}
+
+# Which contract's salary is the headline one (same order the API has always used)
+HEADLINE_ORDER = ("salary_b2b", "salary_permanent", "salary_any", "salary_mandate", "salary_specific_task", "salary_internship")
+
+# Typed columns filled from the headline salary (plus the per-contract JSONB)
+PARSED_SALARY_COLUMNS = (
+    "salary_min", "salary_max", "salary_currency", "salary_is_gross",
+    "salary_period", "salary_contract", "salaries",
+)
+
+
+def _amount(text: str | None) -> Decimal | None:
+    """Parse "18 000" / "18,000" / "150.50" into a Decimal."""
+    if not text:
+        return None
+    cleaned = re.sub(r"[\s,]", "", text).rstrip(".")
+    try:
+        return Decimal(cleaned) if cleaned else None
+    except InvalidOperation:
+        return None
+
+
+def parse_salary(text: str | None) -> dict | None:
+    """
+    Parse one salary text.
+
+    Args:
+        text: e.g. "18 000 - 25 000 PLN Net per month - B2B"
+
+    Returns:
+        dict | None: `min`, `max` (Decimal), `currency`, `is_gross` (None if
+        not stated) and `period` ("month", "hour", ...), or None if unparseable
+    """
+    if not text:
+        return None
+    match = SALARY_RE.search(text)
+    if not match:
+        return None
+    low = _amount(match.group(1))
+    high = _amount(match.group(2)) or low
+    if low is None:
+        return None
+    kind = match.group(4)
+    return {
+        "min": low,
+        "max": high,
+        "currency": match.group(3).upper(),
+        "is_gross": kind.lower() == "gross" if kind else None,
+        "period": match.group(5).lower(),
+    }
+
+
+def parse_salaries(offer_data: dict) -> dict:
+    """
+    Parse every raw salary column of an offer.
+
+    Args:
+        offer_data: Offer row with raw `salary_*` text columns
+
+    Returns:
+        dict: Values for `PARSED_SALARY_COLUMNS`; `salaries` is a JSON string
+              (or None when no salary could be parsed)
+    """
+    parsed = {column: parse_salary(offer_data.get(column)) for column in SALARY_CONTRACTS}
+    headline_column = next((column for column in HEADLINE_ORDER if parsed[column]), None)
+    headline = parsed[headline_column] if headline_column else {}
+
+    salaries = {
+        SALARY_CONTRACTS[column]: {**salary, "min": float(salary["min"]), "max": float(salary["max"])}
+        for column, salary in parsed.items() if salary
+    }
+    return {
+        "salary_min": headline.get("min"),
+        "salary_max": headline.get("max"),
+        "salary_currency": headline.get("currency"),
+        "salary_is_gross": headline.get("is_gross"),
+        "salary_period": headline.get("period"),
+        "salary_contract": SALARY_CONTRACTS[headline_column] if headline_column else None,
+        "salaries": json.dumps(salaries, sort_keys=True) if salaries else None,
+    }
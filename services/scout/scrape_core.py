@@ -1,11 +1,27 @@
 # scrape_core.py
 import asyncio
+import hashlib
+import json
 import re
-from typing import Optional
+import time
 from playwright.async_api import async_playwright, Page
 import logging
-from .selectors import SELECTORS, PATTERNS, get_selector
+from .selectors import PATTERNS, SELECTORS, get_selector
 from .config import ScrapingConfig
+from .ratelimit import AdaptiveRateLimiter, ThrottledError
+from .extractor import extract_offer_data
+from .network import ResourceBlocker
+from .http_fetch import HttpOfferFetcher
+from .archive import HtmlArchive
+from .readiness import ReadinessStrategy
+from .listing import ListingCapture, needs_detail_page
+from .salary import parse_salaries
+from .writer import OfferWriter
+from .journal import RunJournal
+from .scrape_queue import ScrapeQueue
+from .memory import MemoryWatchdog
+from .metrics import BROWSER_RECYCLE_SECONDS, DB_WRITE_SECONDS, FACET_LINKS, IDLE_SCROLLS, LINKS, OFFER_SECONDS, PAGES, record_failure
+from .db import CONTENT_COLUMNS, OFFER_COLUMNS, UPSERT_OFFER_SQL, mark_offers_seen
 
 def sanitize_string(value, max_length=None):
     """Simple string sanitization without validation."""
@@ -17,99 +33,444 @@ def sanitize_string(value, max_length=None):
         cleaned = cleaned[:max_length]
     return cleaned if cleaned else None
 
-async def extract_element_text(page: Page, selector: str, fallback_selector: str = None, name: str = "element") -> Optional[str]:
-    """Helper to safely extract text from a Playwright locator with optional fallback."""
-    try:
-        element = page.locator(selector).first
-        if await element.count() > 0:
-            return await element.inner_text()
-            
-        if fallback_selector:
-            fallback = page.locator(fallback_selector).first
-            if await fallback.count() > 0:
-                return await fallback.inner_text()
-    except Exception as e:
-        logging.error(f"❌ Error in {name} extraction: {e}")
-    return None
-
 SCROLL_PAUSE = ScrapingConfig.SCROLL_PAUSE_TIME
 
-async def init_browser(headless: bool = True):
+# Shared request blocker, set by init_browser when lean mode is enabled
+_resource_blocker: ResourceBlocker | None = None
+
+# Shared readiness strategy; learns per-field wait timeouts across all workers
+_readiness = ReadinessStrategy()
+
+# Shared memory watchdog; decides when contexts or the browser get recycled
+_memory = MemoryWatchdog()
+
+# Shared HTTP-first fetcher, set by init_browser when HTTP_FIRST is enabled
+_http_fetcher: HttpOfferFetcher | None = None
+
+# Shared raw HTML archive, set by init_browser when ARCHIVE_HTML is enabled
+_archive: HtmlArchive | None = None
+
+async def init_browser(headless: bool = True, lean: bool = ScrapingConfig.LEAN_MODE, http_first: bool = ScrapingConfig.HTTP_FIRST, archive_html: bool = ScrapingConfig.ARCHIVE_HTML):
+    """
+    Launch Chromium and open a page in a fresh context.
+
+    Args:
+        headless: Run the browser without a window
+        lean: Block non-essential resource types and third-party hosts in
+              every context created by Scout (see `network.ResourceBlocker`)
+        http_first: Try a plain HTTP GET for each offer before rendering it
+                    (see `http_fetch.HttpOfferFetcher`); close with `close_http_fetcher`
+        archive_html: Store the HTML of every extracted offer page in the
+                      content-addressed archive (see `archive.HtmlArchive`)
+    """
+    global _resource_blocker, _http_fetcher, _archive
+    _resource_blocker = ResourceBlocker() if lean else None
+    if _resource_blocker is not None:
+        logging.info(f"🪶 Lean mode enabled: blocking {sorted(_resource_blocker.blocked_types)} and hosts outside {list(_resource_blocker.allowed_hosts)}")
+    _archive = HtmlArchive() if archive_html else None
+    if _archive is not None:
+        logging.info(f"🗄️ Archiving offer page HTML to {_archive.root}")
+    on_page = None if _archive is None else (lambda url, html: _archive.put(url, html, "http"))
+    _http_fetcher = HttpOfferFetcher(on_page=on_page) if http_first else None
+    if _http_fetcher is not None:
+        logging.info(f"🌐 HTTP-first fetch enabled: browser fallback when {', '.join(_http_fetcher.required)} are missing")
+
     playwright = await async_playwright().start()
     browser = await playwright.chromium.launch(headless=headless)
-    context = await browser.new_context(locale='pl-PL')
+    context = await new_context(browser)
     page = await context.new_page()
     return playwright, browser, page
 
-async def collect_offer_links(page: Page) -> list[str]:
+async def close_http_fetcher():
+    """Close the HTTP-first fetcher's connection pool (if one was started)."""
+    global _http_fetcher
+    if _http_fetcher is not None:
+        await _http_fetcher.close()
+        _http_fetcher = None
+
+async def new_context(browser):
+    """Create a browser context with Scout's locale and (in lean mode) request blocking."""
+    context = await browser.new_context(locale='pl-PL')
+    if _resource_blocker is not None:
+        await _resource_blocker.attach(context)
+    return context
+
+# Installs a MutationObserver that reports each newly seen offer href once
+LINK_HARVESTER_SCRIPT = """
+([selector, binding]) => {
+    const seen = new Set();
+    const report = (elements) => {
+        const fresh = [];
+        for (const el of elements) {
+            const href = el.getAttribute('href');
+            if (href && !seen.has(href)) {
+                seen.add(href);
+                fresh.push(href);
+            }
+        }
+        if (fresh.length) window[binding](fresh);
+    };
+
+    report(document.querySelectorAll(selector));
+
+    new MutationObserver((mutations) => {
+        const found = [];
+        for (const mutation of mutations) {
+            if (mutation.type === 'attributes') {
+                if (mutation.target.matches(selector)) found.push(mutation.target);
+                continue;
+            }
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType !== Node.ELEMENT_NODE) continue;
+                if (node.matches(selector)) found.push(node);
+                found.push(...node.querySelectorAll(selector));
+            }
+        }
+        report(found);
+    }).observe(document.body, { childList: true, subtree: true, attributes: true, attributeFilter: ['href'] });
+}
+"""
+
+LINK_BINDING = "__scoutReportLinks"
+
+async def collect_offer_links(page: Page, label: str | None = None) -> list[str]:
     """
     Collects job offer links from JustJoin.it by scrolling through the page.
+
+    A MutationObserver in the page pushes only newly added offer hrefs to
+    Python through an exposed binding, so each scroll costs one round trip
+    regardless of how many links were already collected. Collection ends
+    once the page is scrolled to the bottom and neither new links nor page
+    growth have appeared for `END_OF_LIST_SETTLE` seconds (with
+    `MAX_IDLE_SCROLLS` as a safety cap).
+
+    Must be called at most once per page (the binding is page-scoped).
     
     Args:
         page: Playwright page object
+        label: Prefix for progress logs (e.g. the facet being scrolled)
     
     Returns:
         list[str]: List of job offer URLs
     """
     unique_urls: set[str] = set()
+    prefix = f"[{label}] " if label else ""
     idle_count = 0
     max_idle = ScrapingConfig.MAX_IDLE_SCROLLS
+
+    def on_links(source, hrefs):
+        for href in hrefs:
+            if href and '/job-offer/' in href:
+                if href.startswith('/'):
+                    href = f"https://justjoin.it{href}"
+                unique_urls.add(href)
     
-    logging.info("🔄 Starting to collect job offer links...")
+    logging.info(f"{prefix}🔄 Starting to collect job offer links...")
     
     # Wait for page to load initially
     await asyncio.sleep(3)
+
+    await page.expose_binding(LINK_BINDING, on_links)
+    await page.evaluate(LINK_HARVESTER_SCRIPT, [get_selector(SELECTORS.JOB_OFFER_LINKS), LINK_BINDING])
+
+    last_count = -1
+    last_height = 0
+    last_progress = time.monotonic()
     
     while True:
-        
-        # Get current links and extract URLs
-        try:            
-            current_links = await page.locator(get_selector(SELECTORS.JOB_OFFER_LINKS)).all()
-            current_urls = set()
-            
-            for link in current_links:
-                try:
-                    href = await link.get_attribute('href', timeout=ScrapingConfig.LINK_TIMEOUT)
-                    if href and '/job-offer/' in href:
-                        if href.startswith('/'):
-                            href = f"https://justjoin.it{href}"
-                        current_urls.add(href)
-                except Exception as e:
-                    # Skip this link and continue
-                    continue
-                    
+        # Scroll down and read the scroll position in the same round trip
+        try:
+            position, height = await page.evaluate(
+                "() => { window.scrollBy(0, window.innerHeight); "
+                "return [window.scrollY + window.innerHeight, document.documentElement.scrollHeight]; }"
+            )
         except Exception as e:
-            logging.warning(f"⚠️ Error getting links: {e}")
-            current_urls = set()
-        
-        # Add new URLs to our collection
-        new_urls = current_urls - unique_urls
-        unique_urls.update(current_urls)
-        
-        logging.info(f"📊 Collected {len(unique_urls)} unique links.")
-        
-        if new_urls:
-            idle_count = 0
-        else:
-            idle_count += 1
-            logging.info(f"⏸️ No new links found (idle {idle_count}/{max_idle})")
-            
-            if idle_count >= max_idle:
-                logging.info("🛑 Stopping - no new links found for 3 consecutive scrolls")
-                break
-        
-            
-        # Scroll down
-        await page.evaluate("window.scrollBy(0, window.innerHeight)")
+            logging.warning(f"⚠️ Error scrolling: {e}")
+            position, height = 0, last_height
         await asyncio.sleep(SCROLL_PAUSE)
+
+        if len(unique_urls) != last_count or height != last_height:
+            if idle_count:
+                IDLE_SCROLLS.observe(idle_count)
+            if len(unique_urls) != last_count:
+                logging.info(f"{prefix}📊 Collected {len(unique_urls)} unique links.")
+            last_count = len(unique_urls)
+            last_height = height
+            last_progress = time.monotonic()
+            idle_count = 0
+            continue
+
+        idle_count += 1
+        at_bottom = position >= height - 2
+        settled = time.monotonic() - last_progress >= ScrapingConfig.END_OF_LIST_SETTLE
+
+        if at_bottom and settled:
+            logging.info(f"{prefix}🛑 Stopping - reached the end of the list (no new links for {ScrapingConfig.END_OF_LIST_SETTLE}s)")
+            break
+        if idle_count >= max_idle:
+            logging.info(f"{prefix}🛑 Stopping - no new links found for {max_idle} consecutive scrolls")
+            break
     
+    IDLE_SCROLLS.observe(idle_count)
+    offer_urls = list(unique_urls)
+    LINKS.set(len(offer_urls))
+    logging.info(f"{prefix}✅ Collected {len(offer_urls)} unique job offer links")
+    return offer_urls
+
+async def read_offer_count(page: Page) -> int | None:
+    """Read the total offer count shown above a listing page, or None if it is not displayed."""
+    try:
+        text = await page.locator(get_selector(SELECTORS.OFFER_COUNT)).first.inner_text(timeout=5000)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not read the listing's offer count: {e}")
+        return None
+    match = re.search(PATTERNS.OFFER_COUNT, text, re.IGNORECASE)
+    return int(re.sub(r"\D", "", match.group(1))) if match else None
+
+async def collect_offer_links_faceted(page: Page, facets=None, concurrency: int = None, capture: ListingCapture | None = None) -> list[str]:
+    """
+    Collect job offer links by scrolling listing facets in parallel.
+
+    Each facet path (e.g. "all-locations/python") is opened in its own page
+    of `page`'s context, at most `concurrency` at a time, and scrolled with
+    `collect_offer_links`; the URL sets are merged and deduplicated. The
+    total is cross-checked against the offer count shown on the unfaceted
+    listing `page` is on: if any facet failed, or the facets cover less than
+    `FACET_MIN_COVERAGE` of that count, the unfaceted page is scrolled too so
+    offers outside every facet are not lost.
+
+    Args:
+        page: Playwright page already on the unfaceted listing
+        facets: Facet paths under `LISTING_URL` (defaults to `LINK_FACETS`)
+        concurrency: Facet pages scrolled at once (defaults to `FACET_CONCURRENCY`)
+        capture: Listing capture to attach to every facet page (listing mode;
+                 attaching it to `page` is up to the caller)
+
+    Returns:
+        list[str]: List of job offer URLs
+    """
+    facets = tuple(facets or ScrapingConfig.LINK_FACETS)
+    semaphore = asyncio.Semaphore(concurrency or ScrapingConfig.FACET_CONCURRENCY)
+    expected = await read_offer_count(page)
+    logging.info(f"🧩 Collecting links from {len(facets)} facets ({expected if expected is not None else 'unknown number of'} offers listed in total)")
+
+    async def collect(facet: str) -> list[str] | None:
+        async with semaphore:
+            facet_page = await page.context.new_page()
+            if capture is not None:
+                capture.attach(facet_page)
+            try:
+                await facet_page.goto(f"{ScrapingConfig.LISTING_URL}/{facet}", timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
+                links = await collect_offer_links(facet_page, label=facet)
+            except Exception as e:
+                record_failure("collect_facet", e)
+                logging.warning(f"⚠️ Facet {facet} failed: {e}")
+                return None
+            finally:
+                await facet_page.close()
+            FACET_LINKS.set(len(links), facet=facet)
+            return links
+
+    results = await asyncio.gather(*(collect(facet) for facet in facets))
+    unique_urls = {url for links in results if links for url in links}
+    failed = [facet for facet, links in zip(facets, results) if links is None]
+    total = sum(len(links) for links in results if links)
+    logging.info(f"🧩 Facets yielded {total} links, {len(unique_urls)} unique ({total - len(unique_urls)} listed under several facets)")
+
+    # Cross-check against the unfaceted listing; offers outside every facet would otherwise be missed
+    coverage = len(unique_urls) / expected if expected else None
+    if failed or coverage is None or coverage < ScrapingConfig.FACET_MIN_COVERAGE:
+        if failed:
+            reason = f"{len(failed)} facets failed ({', '.join(failed)})"
+        elif coverage is None:
+            reason = "the unfaceted offer count is unknown"
+        else:
+            reason = f"facets cover only {coverage:.1%} of {expected} listed offers"
+        logging.warning(f"⚠️ {reason}; scrolling the unfaceted listing as well")
+        unique_urls |= set(await collect_offer_links(page, label="all"))
+    else:
+        logging.info(f"✅ Facets cover {coverage:.1%} of the {expected} listed offers")
+
     offer_urls = list(unique_urls)
-    logging.info(f"✅ Collected {len(offer_urls)} unique job offer links")
+    LINKS.set(len(offer_urls))
+    logging.info(f"✅ Collected {len(offer_urls)} unique job offer links from {len(facets)} facets")
     return offer_urls
 
-async def process_offers(page: Page, conn, offer_urls: list[str], browser=None, playwright=None) -> tuple[int, Page]:
+async def scrape_offer(page: Page, href: str, base: dict | None = None, timings: dict | None = None, limiter: AdaptiveRateLimiter | None = None, fields=None) -> dict:
+    """
+    Navigate to a single job offer and extract its fields.
+
+    Args:
+        page: Playwright page object
+        href: Job offer URL
+        base: Raw values already known for this offer (e.g. from the listing
+              payload); they fill any field the detail page did not yield
+        timings: If given, filled with per-field in-page extraction times (ms)
+        limiter: Rate limiter that receives the response status and latency
+        fields: Only extract these text columns (e.g. for a backfill); the
+                result then holds just these fields, sanitized
+
+    Returns:
+        dict: Sanitized offer data keyed by `offers` column name
+
+    Raises:
+        ThrottledError: The offer page answered 429 or 5xx
+    """
+    with OFFER_SECONDS.time():
+        # Plain HTTP GET + static parse first; the browser only renders offers it could not serve
+        extracted = None
+        if _http_fetcher is not None:
+            extracted = await _http_fetcher.fetch(href, limiter, fields)
+            if extracted is None and limiter is not None:
+                # The browser navigation is another request to the site
+                await limiter.acquire()
+        if extracted is None:
+            extracted = await _browser_extract(page, href, timings, limiter, fields)
+            if _archive is not None:
+                await _archive.put(href, await page.content(), "browser")
+
+    if fields is not None:
+        return {field: sanitize_string(extracted.get(field)) for field in fields}
+
+    if base:
+        extracted = {**base, **{field: value for field, value in extracted.items() if value}}
+
+    return build_offer_data(href, extracted)
+
+async def _browser_extract(page: Page, href: str, timings: dict | None, limiter: AdaptiveRateLimiter | None, fields=None) -> dict:
+    """Render an offer in the browser and extract its fields (see `scrape_offer`)."""
+    # The readiness fields are always extracted so the networkidle fallback can judge the page
+    wanted = None if fields is None else set(fields) | set(_readiness.fields)
+
+    # Navigate to the offer page and wait for the selectors the extractor needs
+    await _readiness.goto(page, href, limiter)
+
+    # Extract every (wanted) field, the tech stack and salaries in a single round trip
+    extracted = await extract_offer_data(page, timings, wanted)
+
+    # Fall back to networkidle only when required fields are still missing
+    if _readiness.needs_fallback(extracted):
+        await _readiness.settle(page)
+        extracted = await extract_offer_data(page, timings, wanted)
+
+    if _resource_blocker is not None:
+        stats = _resource_blocker.pop_page_stats(page)
+        logging.info(f"🪶 Blocked {stats.requests_blocked} requests, loaded {stats.requests_allowed} ({stats.bytes_loaded / 1024:.0f} KB)")
+    return extracted
+
+def build_offer_data(job_url: str, extracted: dict) -> dict:
+    """
+    Turn raw extracted values into a sanitized row for the `offers` table.
+
+    Args:
+        job_url: Job offer URL
+        extracted: Raw values as returned by `extract_offer_data`
+
+    Returns:
+        dict: Sanitized offer data keyed by `offers` column name
+    """
+    tech_stack = extracted.get("tech_stack") or {}
+    tech_stack_formatted = "; ".join(
+        f"{name}: {level}" if level else name for name, level in tech_stack.items()
+    )
+
+    offer_data = {
+        "job_url": sanitize_string(job_url),
+        "job_title": sanitize_string(extracted.get("job_title")),
+        "category": sanitize_string(extracted.get("category")),
+        "company": sanitize_string(extracted.get("company")),
+        "location": sanitize_string(extracted.get("location")),
+        "salary_any": sanitize_string(extracted.get("salary_any")),
+        "salary_b2b": sanitize_string(extracted.get("salary_b2b")),
+        "salary_internship": sanitize_string(extracted.get("salary_internship")),
+        "salary_mandate": sanitize_string(extracted.get("salary_mandate")),
+        "salary_permanent": sanitize_string(extracted.get("salary_permanent")),
+        "salary_specific_task": sanitize_string(extracted.get("salary_specific_task")),
+        "work_schedule": sanitize_string(extracted.get("work_schedule")),
+        "experience": sanitize_string(extracted.get("experience")),
+        "employment_type": sanitize_string(extracted.get("employment_type")),
+        "operating_mode": sanitize_string(extracted.get("operating_mode")),
+        "tech_stack": sanitize_string(tech_stack_formatted),
+        "tech_stack_items": tech_stack_items_json(tech_stack),
+        "description": sanitize_string(extracted.get("description")),
+        "listing_hash": extracted.get("listing_hash"),
+    }
+    offer_data["content_hash"] = offer_content_hash(offer_data)
+    offer_data.update(parse_salaries(offer_data))
+    return offer_data
+
+def tech_stack_items_json(tech_stack: dict) -> str | None:
+    """
+    Structured tech stack for the `tech_stack_items` JSONB column.
+
+    Returns:
+        str | None: JSON array of {"name", "level"} objects in page order
+                    (level is null when the offer gives none), or None if empty
+    """
+    items = [
+        {"name": name, "level": sanitize_string(level)}
+        for name, level in ((sanitize_string(name), level) for name, level in tech_stack.items())
+        if name
+    ]
+    return json.dumps(items, ensure_ascii=False) if items else None
+
+def offer_content_hash(offer_data: dict) -> str:
+    """
+    Stable hash of an offer's scraped fields, used to skip writes of unchanged offers.
+
+    Whitespace is collapsed before hashing, so layout-dependent line breaks
+    (browser innerText vs. the static HTTP extraction) do not count as changes.
+    """
+    values = [offer_data.get(column) for column in CONTENT_COLUMNS]
+    values = [" ".join(value.split()) if isinstance(value, str) else value for value in values]
+    payload = json.dumps(values, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def save_offer(conn, offer_data: dict) -> bool:
+    """
+    Upsert a single extracted offer into the database.
+
+    An existing offer is only rewritten when its content or listing hash changed.
+    Connection errors are re-raised so the caller can abort or reconnect;
+    any other database error is logged and the offer is skipped.
+
+    Returns:
+        bool: True if the offer was inserted or updated
+    """
+    try:
+        with DB_WRITE_SECONDS.time(mode="single"):
+            result = await conn.execute(UPSERT_OFFER_SQL, *(offer_data.get(column) for column in OFFER_COLUMNS))
+        return bool(result) and result.endswith(" 1")
+    except Exception as db_error:
+        record_failure("db_write", db_error)
+        logging.error(f"Database error saving offer {offer_data['job_url']}: {db_error}")
+        # If it's a connection error, we'll let the caller handle reconnection
+        if "connection is closed" in str(db_error).lower():
+            raise db_error
+        return False
+
+async def process_offers(page: Page, conn, offer_urls: list[str], browser=None, playwright=None, listing_rows: dict | None = None, writer: OfferWriter | None = None, journal: RunJournal | None = None, queue: ScrapeQueue | None = None) -> tuple[int, Page]:
     """
     Process job offers and save them to the database.
+
+    With `ScrapingConfig.CONCURRENCY` > 1 (and a browser available) offers are
+    scraped by a pool of workers, each with its own browser context; otherwise
+    they are processed sequentially on the given page.
+
+    In listing mode, offers whose listing row already has every field in
+    `ScrapingConfig.LISTING_DETAIL_FIELDS` are saved without visiting their
+    detail page; the rest are scraped and merged with their listing row.
+
+    When a `writer` is given, finished offers are handed to it and written in
+    batches in the background; otherwise each offer is inserted on `conn`.
+
+    When a `journal` is given, each offer's outcome is checkpointed, and
+    offers already done in a resumed run are skipped. With a `writer`, the
+    journal must be its `on_written` callback: offers are only marked done
+    once they have actually been written.
+
+    When a `queue` is given (coordinator role), offers that need a detail
+    page are enqueued for worker tasks instead of being scraped here.
     
     Args:
         page: Playwright page object
@@ -117,210 +478,470 @@ async def process_offers(page: Page, conn, offer_urls: list[str], browser=None,
         offer_urls: List of job offer URLs to process
         browser: Playwright browser object (optional, for memory cleanup)
         playwright: Playwright instance (optional, for memory cleanup)
+        listing_rows: Raw offer rows captured from listing API responses, keyed by URL
+        writer: Background batch writer (optional)
+        journal: Run journal recording per-offer outcomes (optional)
+        queue: Shared work queue to hand detail visits to (optional, requires `journal`)
     
     Returns:
         tuple[int, Page]: Number of offers processed and the current page object
     """
     
-    # Memory management: restart browser every N offers to prevent memory leaks
-    can_restart = browser is not None and playwright is not None
-    
-    # Get existing URLs to avoid duplicates
-    existing_urls = set()
+    # Get existing URLs (and their listing hashes) to avoid duplicates
+    existing_hashes: dict[str, str | None] = {}
     try:
-        existing_records = await conn.fetch("SELECT job_url FROM offers")
-        existing_urls = {record['job_url'] for record in existing_records}
-        logging.info(f"📊 Found {len(existing_urls)} existing offers in database")
+        existing_records = await conn.fetch("SELECT job_url, listing_hash FROM offers")
+        existing_hashes = {record['job_url']: record['listing_hash'] for record in existing_records}
+        logging.info(f"📊 Found {len(existing_hashes)} existing offers in database")
     except Exception as e:
         logging.warning(f"⚠️ Could not fetch existing URLs: {e}")
     
     # Filter out existing URLs before processing
-    new_offer_urls = [url for url in offer_urls if url not in existing_urls]
-    skipped_count = len(offer_urls) - len(new_offer_urls)
+    new_offer_urls = [url for url in offer_urls if url not in existing_hashes]
+    seen_urls = [url for url in offer_urls if url in existing_hashes]
+
+    # Existing offers whose listing payload changed since it was last stored get re-scraped
+    changed_urls = [
+        url for url in seen_urls
+        if listing_rows and url in listing_rows and existing_hashes[url]
+        and listing_rows[url].get("listing_hash") != existing_hashes[url]
+    ]
+
+    # A resumed run skips offers it already finished before the interruption
+    if journal is not None and journal.done:
+        resumed_skip = len([url for url in new_offer_urls + changed_urls if url in journal.done])
+        new_offer_urls = [url for url in new_offer_urls if url not in journal.done]
+        changed_urls = [url for url in changed_urls if url not in journal.done]
+        logging.info(f"📒 Skipping {resumed_skip} offers already done in the resumed run")
+
+    try:
+        await mark_offers_seen(conn, seen_urls, [(listing_rows or {}).get(url, {}).get("listing_hash") for url in seen_urls])
+    except Exception as e:
+        logging.warning(f"⚠️ Could not update last_seen_at: {e}")
     
     logging.info(f"📊 Total collected: {len(offer_urls)} offers")
-    logging.info(f"⏭️ Already in database: {skipped_count} offers")
+    logging.info(f"⏭️ Already in database: {len(seen_urls) - len(changed_urls)} unchanged offers")
+    logging.info(f"🔁 Changed offers to refresh: {len(changed_urls)} offers")
     logging.info(f"🆕 New offers to process: {len(new_offer_urls)} offers")
     
-    if not new_offer_urls:
-        logging.info("✅ No new offers to process - all offers already exist in database")
+    if not new_offer_urls and not changed_urls:
+        logging.info("✅ No new or changed offers to process - all offers already exist in database")
         return 0, page
     
     processed_count = 0
-    
+    store = _offer_store(conn, writer)
+    written_before = writer.written if writer is not None else 0
+
+    if listing_rows:
+        listing_only = [url for url in new_offer_urls if not needs_detail_page(listing_rows.get(url))]
+        for url in listing_only:
+            saved = await store(build_offer_data(url, listing_rows[url]))
+            if saved:
+                processed_count += 1
+            if journal is not None and saved is not None:
+                await journal.record(url, saved)
+        new_offer_urls = [url for url in new_offer_urls if needs_detail_page(listing_rows.get(url))]
+        logging.info(f"📦 Saved {processed_count} offers from listing data; {len(new_offer_urls)} need detail pages")
+
+    # Changed offers always get a full detail visit so no scraped field is lost
+    new_offer_urls += changed_urls
+
+    if new_offer_urls and queue is not None:
+        await queue.enqueue(journal.run_id, new_offer_urls, listing_rows)
+    elif new_offer_urls:
+        started_at = time.monotonic()
+        limiter = AdaptiveRateLimiter()
+        scraped_count, page = await scrape_offers(page, store, new_offer_urls, listing_rows, browser, playwright, journal, limiter)
+        processed_count += scraped_count
+        log_throughput(len(new_offer_urls), started_at)
+        limiter.log_summary()
+
+    if journal is not None:
+        await journal.flush()
+
+    # With a background writer, count what actually reached the database
+    if writer is not None:
+        await writer.drain()
+        processed_count = writer.written - written_before
+
+    logging.info(f"✅ Processed {processed_count} new offers")
+    return processed_count, page
+
+async def scrape_offers(page: Page, store, offer_urls: list[str], listing_rows: dict | None, browser, playwright, journal=None, limiter: AdaptiveRateLimiter | None = None) -> tuple[int, Page]:
+    """
+    Scrape offer detail pages and hand each result to `store`.
+
+    Uses the worker pool when `ScrapingConfig.CONCURRENCY` > 1 (and a browser
+    is available), otherwise the given page.
+
+    Returns:
+        tuple[int, Page]: Number of offers stored and the current page object
+    """
+    if browser is not None and ScrapingConfig.CONCURRENCY > 1:
+        stored, current = await process_offers_concurrently(browser, store, offer_urls, listing_rows, journal, limiter, playwright)
+        if current is not browser:
+            # The restart closed the caller's page along with the old browser
+            page = await (await new_context(current)).new_page()
+        return stored, page
+    return await _process_offers_sequentially(page, store, offer_urls, listing_rows, browser, playwright, journal, limiter)
+
+async def work_queue(page: Page, queue: ScrapeQueue, writer: OfferWriter, browser=None, playwright=None) -> tuple[int, Page]:
+    """
+    Worker role: wait for a queued run, then claim its offer batches until it runs dry.
+
+    Each batch is scraped, written, and only then marked done in the queue,
+    so a worker that dies mid-batch leaves its claims to be reclaimed rather
+    than losing offers. The `writer` must report to the queue
+    (`OfferWriter(pool, on_written=queue.record)`), so offers whose write
+    failed go back to `pending` instead of being marked done.
+
+    The worker first waits up to `WORKER_START_TIMEOUT` seconds for a
+    coordinator to finish enqueueing a run (link collection can take a
+    while), and only claims URLs of that run. It exits once the run has no
+    pending or claimed URLs left, when the run is no longer running, or
+    after `WORKER_IDLE_TIMEOUT` seconds without work counted from then.
+
+    Args:
+        page: Playwright page object
+        queue: Shared work queue
+        writer: Background batch writer
+        browser: Playwright browser object (optional, for memory cleanup)
+        playwright: Playwright instance (optional, for memory cleanup)
+
+    Returns:
+        tuple[int, Page]: Number of offers written and the current page object
+    """
+    store = _offer_store(None, writer)
+    limiter = AdaptiveRateLimiter()
+    written_before = writer.written
+    logging.info(f"👷 Worker {queue.worker_id} waiting for a coordinator to queue a run")
+    if await queue.wait_for_run() is None:
+        return 0, page
+    started_at = time.monotonic()
+    idle_since = time.monotonic()
+
+    queue.start_heartbeat()
+    try:
+        while True:
+            await queue.reclaim_stale()
+            batch = await queue.claim()
+            if batch:
+                logging.info(f"📮 Claimed {len(batch)} offers ({queue.claimed} so far)")
+                listing_rows = {url: row for url, row in batch.items() if row} or None
+                _, page = await scrape_offers(page, store, list(batch), listing_rows, browser, playwright, queue, limiter)
+                # The memory watchdog may have relaunched the browser during the batch
+                browser = page.context.browser or browser
+                await writer.drain()
+                await queue.flush()
+                idle_since = time.monotonic()
+                continue
+
+            counts = await queue.counts()
+            if not counts.get("pending") and not counts.get("claimed"):
+                logging.info(f"📮 Queue of run {queue.run_id} drained")
+                break
+            if not await queue.run_is_open():
+                logging.info(f"📮 Run {queue.run_id} is no longer running, stopping")
+                break
+            if time.monotonic() - idle_since >= ScrapingConfig.WORKER_IDLE_TIMEOUT:
+                logging.info(f"📮 No claimable offers for {ScrapingConfig.WORKER_IDLE_TIMEOUT}s, stopping")
+                break
+            await asyncio.sleep(ScrapingConfig.QUEUE_POLL_INTERVAL)
+    finally:
+        await queue.stop_heartbeat()
+        await queue.release()
+
+    if queue.claimed:
+        log_throughput(queue.claimed, started_at)
+    limiter.log_summary()
+    processed_count = writer.written - written_before
+    logging.info(f"✅ Worker {queue.worker_id} processed {processed_count} offers ({len(queue.done)} done)")
+    return processed_count, page
+
+def _offer_store(conn, writer: OfferWriter | None):
+    """
+    Return an async callable that persists one offer and reports success.
+
+    Offers go to the background writer when one is given; the callable then
+    returns None, because the outcome is only known once the writer has
+    flushed the offer and is reported through its `on_written` callback.
+    Otherwise offers are inserted directly on the shared connection, one at a
+    time, and the callable returns whether the insert succeeded.
+    """
+    if writer is not None:
+        async def enqueue(offer_data: dict) -> None:
+            await writer.put(offer_data)
+        return enqueue
+
+    lock = asyncio.Lock()
+
+    async def insert(offer_data: dict) -> bool:
+        async with lock:
+            return await save_offer(conn, offer_data)
+    return insert
+
+async def _recycle_context(page: Page, browser) -> Page:
+    """
+    Close a page's browser context and return a page in a fresh one.
+
+    The page's own browser wins over `browser`, which may be one a restart
+    already replaced; a disconnected browser raises before anything is closed.
+    """
+    browser = page.context.browser or browser
+    if browser is None or not browser.is_connected():
+        raise RuntimeError("browser is no longer connected")
+    with BROWSER_RECYCLE_SECONDS.time(kind="context"):
+        try:
+            await page.context.close()
+        except Exception as e:
+            logging.warning(f"⚠️  Closing browser context failed: {e}")
+        context = await new_context(browser)
+        _memory.context_recycles += 1
+        return await context.new_page()
+
+async def reopen_page(page: Page, browser) -> tuple[Page, object]:
+    """
+    Best-effort replacement for a worker page whose context could not be recycled.
+
+    Opens a page in a fresh context if possible, else a new page in the old
+    context; returns (page, context).
+    """
+    browser = page.context.browser or browser
+    try:
+        context = await new_context(browser)
+        return await context.new_page(), context
+    except Exception as e:
+        logging.warning(f"⚠️  Opening a fresh context failed ({e}), reusing the old one")
+    try:
+        return await page.context.new_page(), page.context
+    except Exception as e:
+        logging.warning(f"⚠️  Opening a page failed ({e}), keeping the current page")
+        return page, page.context
+
+async def _relaunch_browser(browser, playwright):
+    """Close the browser and launch a new one."""
+    await browser.close()
+    browser = await playwright.chromium.launch(headless=ScrapingConfig.HEADLESS)
+    _memory.browser_restarts += 1
+    return browser
+
+async def _restart_browser(page: Page, browser, playwright):
+    """Close the page's context and the browser, then relaunch; returns (browser, page)."""
+    browser = page.context.browser or browser
+    with BROWSER_RECYCLE_SECONDS.time(kind="browser"):
+        try:
+            await page.context.close()
+        except Exception as e:
+            logging.warning(f"⚠️  Closing browser context failed: {e}")
+        browser = await _relaunch_browser(browser, playwright)
+        context = await new_context(browser)
+        return browser, await context.new_page()
+
+async def scrape_offer_with_retry(page: Page, href: str, limiter: AdaptiveRateLimiter, base: dict | None = None, fields=None) -> dict:
+    """
+    Wait for a rate limiter slot and scrape an offer, retrying throttled responses.
+
+    On 429/503 (or an error spike) the limiter has already backed off, so the
+    retry's `acquire()` waits out the pause before navigating again.
+    """
+    for attempt in range(ScrapingConfig.THROTTLE_RETRIES + 1):
+        await limiter.acquire()
+        try:
+            return await scrape_offer(page, href, base=base, limiter=limiter, fields=fields)
+        except ThrottledError as e:
+            if attempt == ScrapingConfig.THROTTLE_RETRIES:
+                raise
+            logging.warning(f"⏳ HTTP {e.status} for {href}, retrying after backoff ({attempt + 1}/{ScrapingConfig.THROTTLE_RETRIES})")
+
+async def _process_offers_sequentially(page: Page, store, new_offer_urls: list[str], listing_rows, browser, playwright, journal=None, limiter: AdaptiveRateLimiter | None = None) -> tuple[int, Page]:
+    """Scrape offers one at a time on a single page, recycling its context or the browser when memory runs high."""
+    processed_count = 0
+    limiter = limiter or AdaptiveRateLimiter()
+
+    # Memory management: the watchdog decides when to recycle (see memory.py)
+    can_restart = browser is not None and playwright is not None
+    handled = 0  # Offers handled on the current context
+
     for i, href in enumerate(new_offer_urls, 1):
         try:
-            # Memory cleanup: restart browser every N offers (from config)
-            if can_restart and i > 1 and (i - 1) % ScrapingConfig.RESTART_BROWSER_EVERY == 0:
+            action = await _memory.check(page, handled)
+            if action == "browser" and can_restart:
                 logging.info(f"♻️  Restarting browser for memory cleanup (processed {i-1}/{len(new_offer_urls)} offers)")
                 try:
-                    await page.close()
-                    await browser.close()
-                    browser = await playwright.chromium.launch(headless=True)
-                    context = await browser.new_context(locale='pl-PL')
-                    page = await context.new_page()
+                    browser, page = await _restart_browser(page, browser, playwright)
                     logging.info("✅ Browser restarted successfully")
                 except Exception as e:
+                    record_failure("browser_restart", e)
                     logging.warning(f"⚠️  Browser restart failed: {e}, continuing with existing browser")
+                handled = 0
+            elif action:
+                logging.info(f"♻️  Recycling browser context for memory cleanup (processed {i-1}/{len(new_offer_urls)} offers)")
+                page = await _recycle_context(page, browser)
+                handled = 0
+        except Exception as e:
+            logging.warning(f"⚠️  Memory check or context recycle failed ({e}), reopening the page")
+            record_failure("context_recycle", e)
+            page, _ = await reopen_page(page, browser)
+            handled = 0
+
+        try:
+            handled += 1
             
             logging.info(f"🔄 Processing new offer {i}/{len(new_offer_urls)}: {href}")
             
-            # Navigate to the offer page
-            await page.goto(href, wait_until='networkidle', timeout=ScrapingConfig.PAGE_LOAD_TIMEOUT)
-            
-            # Extract job details
-            job_url = href
-            
-            # Extract simple fields with helper
-            job_title = await extract_element_text(page, get_selector(SELECTORS.JOB_TITLE), name="job title")
-            location = await extract_element_text(page, get_selector(SELECTORS.LOCATION), fallback_selector=SELECTORS.LOCATION.fallback, name="location")
-            company = await extract_element_text(page, get_selector(SELECTORS.COMPANY), name="company")
-            category = await extract_element_text(page, get_selector(SELECTORS.CATEGORY_PILL), fallback_selector=get_selector(SELECTORS.CATEGORY_BREADCRUMB), name="category")
-            work_schedule = await extract_element_text(page, get_selector(SELECTORS.WORK_SCHEDULE), name="work schedule")
-            employment_type = await extract_element_text(page, get_selector(SELECTORS.EMPLOYMENT_TYPE), name="employment type")
-            experience = await extract_element_text(page, get_selector(SELECTORS.EXPERIENCE), name="experience")
-            operating_mode = await extract_element_text(page, get_selector(SELECTORS.OPERATING_MODE), name="operating mode")
-            description = await extract_element_text(page, get_selector(SELECTORS.JOB_DESCRIPTION), fallback_selector=SELECTORS.JOB_DESCRIPTION.fallback, name="description")
-            
-            # Tech stack - try multiple approaches to find tech items
-            tech_stack = {}
-            try:
-                # Approach 1: Look for h4 elements that might be tech names
-                tech_names = await page.locator(get_selector(SELECTORS.TECH_NAMES)).all()
-                for name_elem in tech_names:
-                    try:
-                        name_text = await name_elem.inner_text()
-                        if name_text and name_text.strip():
-                            # Look for span element in the same parent
-                            parent = name_elem.locator('..')
-                            span_elem = parent.locator(get_selector(SELECTORS.TECH_LEVELS)).first
-                            if await span_elem.count() > 0:
-                                level_text = await span_elem.inner_text()
-                                if level_text and level_text.strip():
-                                    tech_stack[name_text.strip()] = level_text.strip()
-                    except:
-                        continue
-                        
-                # If no tech found, try approach 2: look for specific patterns
-                if not tech_stack:
-                    # Look for elements that contain both h4 and span
-                    tech_containers = await page.locator(get_selector(SELECTORS.TECH_CONTAINERS)).all()
-                    for container in tech_containers[:20]:  # Limit to first 20
-                        try:
-                            h4_elem = container.locator(get_selector(SELECTORS.TECH_NAMES)).first
-                            span_elem = container.locator(get_selector(SELECTORS.TECH_LEVELS)).first
-                            
-                            if await h4_elem.count() > 0 and await span_elem.count() > 0:
-                                name = await h4_elem.inner_text()
-                                level = await span_elem.inner_text()
-                                
-                                if name and level and name.strip() and level.strip():
-                                    # Skip if it looks like a tech stack item
-                                    if len(name) < 50 and len(level) < 20:
-                                        tech_stack[name.strip()] = level.strip()
-                        except:
-                            continue
-            except Exception as e:
-                logging.error(f"❌ Error in tech stack extraction: {e}")
-                pass
-            
-            # Prepare offer data
-            tech_stack_formatted = "; ".join(
-                f"{name}: {level}" for name, level in tech_stack.items()
-            )
-            
-            # Initialize all salary variables
-            salary_any = None
-            salary_b2b = None
-            salary_internship = None
-            salary_mandate = None
-            salary_permanent = None
-            salary_specific_task = None
-            
-            # Salary extraction - check all spans with " per "
-            try:
-                spans = await page.locator(get_selector(SELECTORS.SALARY_SPANS)).all()
-                any_pattern = PATTERNS.SALARY_ANY
-                b2b_pattern = PATTERNS.SALARY_B2B
-                internship_pattern = PATTERNS.SALARY_INTERNSHIP
-                mandate_pattern = PATTERNS.SALARY_MANDATE
-                permanent_pattern = PATTERNS.SALARY_PERMANENT
-                specific_task_pattern = PATTERNS.SALARY_SPECIFIC_TASK
-                
-                for span in spans:
-                    try:
-                        span_text = await span.inner_text()
-                        if re.match(any_pattern, span_text.strip(), re.IGNORECASE):
-                            parent_div = span.locator('xpath=..')
-                            salary_any = await parent_div.inner_text()
-                        elif re.match(b2b_pattern, span_text.strip(), re.IGNORECASE):
-                            parent_div = span.locator('xpath=..')
-                            salary_b2b = await parent_div.inner_text()
-                        elif re.match(internship_pattern, span_text.strip(), re.IGNORECASE):
-                            parent_div = span.locator('xpath=..')
-                            salary_internship = await parent_div.inner_text()
-                        elif re.match(mandate_pattern, span_text.strip(), re.IGNORECASE):
-                            parent_div = span.locator('xpath=..')
-                            salary_mandate = await parent_div.inner_text()
-                        elif re.match(permanent_pattern, span_text.strip(), re.IGNORECASE):
-                            parent_div = span.locator('xpath=..')
-                            salary_permanent = await parent_div.inner_text()
-                        elif re.match(specific_task_pattern, span_text.strip(), re.IGNORECASE):
-                            parent_div = span.locator('xpath=..')
-                            salary_specific_task = await parent_div.inner_text()
-                    except Exception as span_error:
-                        continue
-            except Exception as e:
-                logging.error(f"❌ Error in salary extraction: {e}")
-                pass
-
-            # Sanitize and prepare offer data
-            offer_data = {
-                "job_url": sanitize_string(job_url),
-                "job_title": sanitize_string(job_title),
-                "category": sanitize_string(category),
-                "company": sanitize_string(company),
-                "location": sanitize_string(location),
-                "salary_any": sanitize_string(salary_any),
-                "salary_b2b": sanitize_string(salary_b2b),
-                "salary_internship": sanitize_string(salary_internship),
-                "salary_mandate": sanitize_string(salary_mandate),
-                "salary_permanent": sanitize_string(salary_permanent),
-                "salary_specific_task": sanitize_string(salary_specific_task),
-                "work_schedule": sanitize_string(work_schedule),
-                "experience": sanitize_string(experience),
-                "employment_type": sanitize_string(employment_type),
-                "operating_mode": sanitize_string(operating_mode),
-                "tech_stack": sanitize_string(tech_stack_formatted),
-                "description": sanitize_string(description)
-            }
+            offer_data = await scrape_offer_with_retry(page, href, limiter, base=(listing_rows or {}).get(href))
             
             # Save to database (we already filtered out existing offers at the start)
-            try:
-                await conn.execute(
-                    """
-                    INSERT INTO offers (job_url, job_title, category, company, location, salary_any, salary_b2b, salary_internship, salary_mandate, salary_permanent, salary_specific_task, work_schedule, experience, employment_type, operating_mode, tech_stack, description, created_at)
-                    VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14,$15,$16,$17, CURRENT_TIMESTAMP)
-                    """,
-                    offer_data["job_url"], offer_data["job_title"], offer_data["category"], 
-                    offer_data["company"], offer_data["location"], offer_data["salary_any"], 
-                    offer_data["salary_b2b"], offer_data["salary_internship"], offer_data["salary_mandate"], 
-                    offer_data["salary_permanent"], offer_data["salary_specific_task"], offer_data["work_schedule"], 
-                    offer_data["experience"], offer_data["employment_type"], offer_data["operating_mode"], 
-                    offer_data["tech_stack"], offer_data["description"]
-                )
+            saved = await store(offer_data)
+            if saved:
                 processed_count += 1
-            except Exception as db_error:
-                logging.error(f"Database error saving offer {job_url}: {db_error}")
-                # If it's a connection error, we'll let the caller handle reconnection
-                if "connection is closed" in str(db_error).lower():
-                    raise db_error
+            PAGES.inc(result="ok")
+            if journal is not None and saved is not None:
+                await journal.record(href, saved)
                         
         except Exception as e:
             logging.error(f"Error processing job offer {href}: {e}")
-        finally:
-            # Small delay between requests to be respectful
-            await asyncio.sleep(ScrapingConfig.REQUEST_DELAY)
+            PAGES.inc(result="failed")
+            record_failure("scrape", e)
+            if journal is not None:
+                await journal.record(href, False)
     
-    logging.info(f"✅ Processed {processed_count} new offers")
-    return processed_count, page
\ No newline at end of file
+    return processed_count, page
+
+async def process_offers_concurrently(browser, store, offer_urls: list[str], listing_rows: dict | None = None, journal: RunJournal | None = None, limiter: AdaptiveRateLimiter | None = None, playwright=None) -> tuple[int, object]:
+    """
+    Scrape offers with a bounded pool of workers sharing one URL queue.
+
+    Each worker owns a browser context and page, recycles its context when the
+    memory watchdog reports its page's JS heap over the limit, and waits on
+    the shared adaptive rate limiter before each navigation.
+
+    The browser is shared, so when its RSS is over the limit the workers are
+    drained (each finishes its current offer) and the browser is restarted
+    once, with `playwright`; without it, the reporting worker recycles its own
+    context. If the RSS is still over the limit on a worker's first sample
+    after such a recycle, the limit cannot be met and is ignored for the rest
+    of the call instead of recycling over and over.
+
+    Args:
+        browser: Playwright browser object used to create worker contexts
+        store: Async callable persisting one offer (see `_offer_store`)
+        offer_urls: List of new job offer URLs to process
+        listing_rows: Raw offer rows captured from listing API responses, keyed by URL
+        journal: Run journal recording per-offer outcomes (optional)
+        limiter: Adaptive rate limiter shared by all workers (optional)
+        playwright: Playwright instance (optional, for browser restarts)
+
+    Returns:
+        tuple[int, object]: Number of offers handed to `store` successfully,
+                            and the browser (a new one if it was restarted)
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, href in enumerate(offer_urls, 1):
+        queue.put_nowait((i, href))
+
+    worker_count = min(ScrapingConfig.CONCURRENCY, len(offer_urls))
+    limiter = limiter or AdaptiveRateLimiter()
+    saved = [0] * worker_count
+    can_restart = playwright is not None
+    restart = asyncio.Event()
+    rss_limit = {"ignored": False}
+
+    logging.info(f"👷 Starting {worker_count} offer workers ({limiter.rate:.1f} req/s, max {limiter.max_rate})")
+
+    async def worker(worker_id: int, after_restart: bool):
+        context = await new_context(browser)
+        page = await context.new_page()
+        handled = 0
+        # Set after freeing memory for the RSS limit, until the next sample
+        rss_recycled = after_restart
+        try:
+            while not restart.is_set():
+                try:
+                    i, href = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    samples = _memory.samples
+                    action = await _memory.check(page, handled)
+                    if _memory.samples != samples:
+                        if action == "browser" and rss_recycled and not rss_limit["ignored"]:
+                            rss_limit["ignored"] = True
+                            logging.warning(
+                                f"⚠️  Browser RSS is still over {_memory.rss_limit_mb} MB right after recycling; ignoring the limit "
+                                f"for the remaining offers (raise BROWSER_RSS_LIMIT_MB or lower CONCURRENCY)"
+                            )
+                        rss_recycled = False
+                    if action == "browser" and rss_limit["ignored"]:
+                        action = None
+                    if action == "browser" and can_restart:
+                        # Hand the offer back; the browser restarts once every worker has stopped
+                        queue.put_nowait((i, href))
+                        restart.set()
+                        return
+                    if action:
+                        logging.info(f"♻️  Worker {worker_id}: recycling browser context after {handled} offers")
+                        page = await _recycle_context(page, browser)
+                        context = page.context
+                        handled = 0
+                        rss_recycled = action == "browser"
+                except Exception as e:
+                    logging.warning(f"⚠️  Worker {worker_id}: context recycle failed ({e}), reopening its page")
+                    record_failure("context_recycle", e)
+                    page, context = await reopen_page(page, browser)
+                    handled = 0
+
+                handled += 1
+                logging.info(f"🔄 [w{worker_id}] Processing new offer {i}/{len(offer_urls)}: {href}")
+                try:
+                    offer_data = await scrape_offer_with_retry(page, href, limiter, base=(listing_rows or {}).get(href))
+                    ok = await store(offer_data)
+                    if ok:
+                        saved[worker_id] += 1
+                    PAGES.inc(result="ok")
+                except Exception as e:
+                    logging.error(f"Error processing job offer {href}: {e}")
+                    PAGES.inc(result="failed")
+                    record_failure("scrape", e)
+                    ok = False
+                if journal is not None and ok is not None:
+                    await journal.record(href, ok)
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    after_restart = False
+    while True:
+        restart.clear()
+        await asyncio.gather(*(worker(w, after_restart) for w in range(min(worker_count, queue.qsize()))))
+        if not restart.is_set() or queue.empty():
+            break
+        logging.info(f"♻️  Restarting browser for memory cleanup ({len(offer_urls) - queue.qsize()}/{len(offer_urls)} offers handed out)")
+        try:
+            with BROWSER_RECYCLE_SECONDS.time(kind="browser"):
+                browser = await _relaunch_browser(browser, playwright)
+            logging.info("✅ Browser restarted successfully")
+        except Exception as e:
+            record_failure("browser_restart", e)
+            logging.warning(f"⚠️  Browser restart failed: {e}, workers recycle their own contexts from now on")
+            can_restart = False
+        after_restart = True
+
+    return sum(saved), browser
+
+def log_throughput(page_count: int, started_at: float):
+    """Log how many offer pages per second the run achieved."""
+    elapsed = time.monotonic() - started_at
+    rate = page_count / elapsed if elapsed > 0 else 0.0
+    logging.info(f"⏱️ Visited {page_count} offer pages in {elapsed:.1f}s ({rate:.2f} pages/sec)")
+    _readiness.log_summary()
+    _memory.log_summary()
+    if _http_fetcher is not None:
+        _http_fetcher.log_summary()
+    if _archive is not None:
+        _archive.log_summary()
+    if _resource_blocker is not None:
+        _resource_blocker.log_summary()
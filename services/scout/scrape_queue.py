@@ -0,0 +1,337 @@
+# scrape_queue.py
+"""
+Shared work queue for distributed Scout runs.
+
+In distributed mode a coordinator collects the offer links, decides which
+offers need a detail visit and enqueues them in `scrape_queue`. Any number
+of worker tasks (Fargate tasks or local processes) then claim batches with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so no two workers ever get the same
+URL. Workers heartbeat their claims while scraping; a claim whose heartbeat
+stops (crashed or killed worker) is put back to `pending` by whoever polls
+the queue next, until `MAX_CLAIM_ATTEMPTS` is reached.
+
+Workers may start long before the coordinator has collected the links, so
+they first wait for a running run whose queue is complete (`queued_at` set
+by `enqueue`) and then only claim URLs of that run.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import asyncpg
+from .config import ScrapingConfig
+from .metrics import REGISTRY
+
+CLAIMS = REGISTRY.counter("scout_queue_claims_total", "Offer URLs claimed from the shared queue")
+RECLAIMS = REGISTRY.counter("scout_queue_reclaims_total", "Stale claims put back or failed by result")
+
+
+def default_worker_id() -> str:
+    """Identify this process in `claimed_by` (hostname and PID)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ScrapeQueue:
+    """
+    Coordinator and worker side of the `scrape_queue` table.
+
+    Coordinator:
+        queue = ScrapeQueue(pool)
+        await queue.enqueue(run_id, urls, listing_rows)
+        await queue.wait_until_drained(run_id)
+        await queue.sync_journal(run_id)
+
+    Worker:
+        queue = ScrapeQueue(pool)
+        await queue.wait_for_run()           # run_id of the queued run, or None
+        queue.start_heartbeat()
+        batch = await queue.claim()          # {url: listing_row or None}
+        await queue.record(url, ok)          # as offers finish
+        await queue.flush()                  # once the batch is written
+        await queue.stop_heartbeat()
+
+    Workers record outcomes through the same `record(url, ok)` interface as
+    `RunJournal`, so the scraping loops can report to either one.
+
+    Args:
+        pool: asyncpg pool
+        worker_id: Value stored in `claimed_by` (defaults to hostname:pid)
+    """
+
+    def __init__(self, pool: asyncpg.Pool, worker_id: str = None):
+        self.pool = pool
+        self.worker_id = worker_id or default_worker_id()
+        self.run_id: int | None = None
+        self.claimed = 0
+        self.done: set[str] = set()
+        self._ids: dict[str, int] = {}
+        self._pending: dict[str, bool] = {}
+        self._heartbeat: asyncio.Task | None = None
+
+    async def enqueue(self, run_id: int, urls: list[str], listing_rows: dict[str, dict] | None = None) -> int:
+        """
+        Queue offer URLs for a run, dropping the queue of any older run.
+
+        Re-enqueueing a run (a resumed coordinator) keeps the state of URLs
+        that are already queued. The run's `queued_at` is set in the same
+        transaction, which releases waiting workers.
+
+        Returns:
+            int: Number of URLs newly added to the queue
+        """
+        listing = [
+            json.dumps(listing_rows[url], default=str) if listing_rows and url in listing_rows else None
+            for url in urls
+        ]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM scrape_queue WHERE run_id <> $1", run_id)
+                result = await conn.execute("""
+                    INSERT INTO scrape_queue (run_id, job_url, listing_row)
+                    SELECT $1, s.job_url, s.listing_row::jsonb
+                    FROM unnest($2::text[], $3::text[]) AS s(job_url, listing_row)
+                    ON CONFLICT (run_id, job_url) DO NOTHING
+                """, run_id, list(urls), listing)
+                await conn.execute("UPDATE scrape_runs SET queued_at = CURRENT_TIMESTAMP WHERE id = $1", run_id)
+        self.run_id = run_id
+        added = int(result.split()[-1])
+        logging.info(f"📮 Queued {added} offers for distributed workers (run {run_id}, {len(urls) - added} already queued)")
+        return added
+
+    async def wait_for_run(self, max_seconds: float = None, poll_interval: float = None) -> int | None:
+        """
+        Worker: wait until a coordinator has queued a run, and attach to it.
+
+        Only runs still `running` and started within `RESUME_MAX_AGE_HOURS`
+        count (older ones would not be resumed by a coordinator either).
+
+        Returns:
+            int | None: The run's id (also stored in `run_id`), or None if no run
+                        was queued within `max_seconds` (default `WORKER_START_TIMEOUT`)
+        """
+        max_seconds = max_seconds or ScrapingConfig.WORKER_START_TIMEOUT
+        poll_interval = poll_interval or ScrapingConfig.QUEUE_POLL_INTERVAL
+        deadline = time.monotonic() + max_seconds
+        while True:
+            async with self.pool.acquire() as conn:
+                run_id = await conn.fetchval("""
+                    SELECT id FROM scrape_runs
+                    WHERE status = 'running' AND queued_at IS NOT NULL
+                      AND started_at > CURRENT_TIMESTAMP - make_interval(secs => $1)
+                    ORDER BY queued_at DESC
+                    LIMIT 1
+                """, ScrapingConfig.RESUME_MAX_AGE_HOURS * 3600)
+            if run_id is not None:
+                self.run_id = run_id
+                logging.info(f"📮 Attached to queued run {run_id}")
+                return run_id
+            if time.monotonic() >= deadline:
+                logging.info(f"📮 No run was queued within {max_seconds}s")
+                return None
+            await asyncio.sleep(poll_interval)
+
+    async def run_is_open(self) -> bool:
+        """Whether the attached run is still `running` (its coordinator has not finished or given it up)."""
+        async with self.pool.acquire() as conn:
+            status = await conn.fetchval("SELECT status FROM scrape_runs WHERE id = $1", self.run_id)
+        return status == "running"
+
+    async def claim(self, size: int = None) -> dict[str, dict | None]:
+        """
+        Claim the next batch of pending URLs of the attached run for this worker.
+
+        Rows locked by a concurrent claim are skipped rather than waited on,
+        so workers never block each other.
+
+        Returns:
+            dict: Claimed URLs mapped to their listing row (or None)
+        """
+        size = size or ScrapingConfig.CLAIM_BATCH_SIZE
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                WITH batch AS (
+                    SELECT id FROM scrape_queue
+                    WHERE state = 'pending' AND run_id = $3
+                    ORDER BY id
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE scrape_queue q
+                SET state = 'claimed', claimed_by = $1, attempts = q.attempts + 1,
+                    claimed_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM batch
+                WHERE q.id = batch.id
+                RETURNING q.id, q.job_url, q.listing_row
+            """, self.worker_id, size, self.run_id)
+        batch = {}
+        for row in sorted(rows, key=lambda row: row["id"]):
+            self._ids[row["job_url"]] = row["id"]
+            batch[row["job_url"]] = json.loads(row["listing_row"]) if row["listing_row"] else None
+        if batch:
+            self.claimed += len(batch)
+            CLAIMS.inc(len(batch))
+        return batch
+
+    async def record(self, url: str, ok: bool):
+        """Buffer a claimed offer's outcome until `flush()`."""
+        if url in self._ids:
+            self._pending[url] = ok
+
+    async def flush(self):
+        """
+        Write buffered outcomes.
+
+        Done offers are closed; failed ones go back to `pending` for another
+        worker until they have been claimed `MAX_CLAIM_ATTEMPTS` times.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        ids = [self._ids.pop(url) for url in pending]
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE scrape_queue q
+                SET state = CASE WHEN s.ok THEN 'done'
+                                 WHEN q.attempts >= $3 THEN 'failed'
+                                 ELSE 'pending' END,
+                    claimed_by = NULL, updated_at = CURRENT_TIMESTAMP
+                FROM unnest($1::bigint[], $2::boolean[]) AS s(id, ok)
+                WHERE q.id = s.id AND q.claimed_by = $4
+            """, ids, list(pending.values()), ScrapingConfig.MAX_CLAIM_ATTEMPTS, self.worker_id)
+        self.done.update(url for url, ok in pending.items() if ok)
+
+    async def release(self):
+        """Hand this worker's unfinished claims back to `pending` (e.g. on shutdown) without using up an attempt."""
+        if not self._ids:
+            return
+        ids, self._ids = list(self._ids.values()), {}
+        self._pending = {}
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE scrape_queue
+                SET state = 'pending', claimed_by = NULL, attempts = GREATEST(attempts - 1, 0),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY($1::bigint[]) AND claimed_by = $2 AND state = 'claimed'
+            """, ids, self.worker_id)
+        logging.info(f"📮 Released {len(ids)} unfinished claims")
+
+    async def heartbeat(self) -> int:
+        """Refresh `heartbeat_at` on this worker's open claims; returns how many were refreshed."""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute("""
+                UPDATE scrape_queue SET heartbeat_at = CURRENT_TIMESTAMP
+                WHERE claimed_by = $1 AND state = 'claimed'
+            """, self.worker_id)
+        return int(result.split()[-1])
+
+    def start_heartbeat(self, interval: float = None):
+        """Heartbeat in the background every `interval` seconds (default `HEARTBEAT_INTERVAL`)."""
+        interval = interval or ScrapingConfig.HEARTBEAT_INTERVAL
+
+        async def beat():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.heartbeat()
+                except Exception as e:
+                    # A few missed beats are fine; CLAIM_TIMEOUT spans several intervals
+                    logging.warning(f"⚠️ Queue heartbeat failed: {e}")
+
+        self._heartbeat = asyncio.create_task(beat())
+
+    async def stop_heartbeat(self):
+        """Stop the background heartbeat."""
+        if self._heartbeat is None:
+            return
+        self._heartbeat.cancel()
+        try:
+            await self._heartbeat
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat = None
+
+    async def reclaim_stale(self, timeout: float = None) -> int:
+        """
+        Release claims whose worker stopped heartbeating.
+
+        Any worker or the coordinator may call this; URLs go back to `pending`,
+        or to `failed` once they used up `MAX_CLAIM_ATTEMPTS`.
+
+        Returns:
+            int: Number of stale claims released
+        """
+        timeout = timeout or ScrapingConfig.CLAIM_TIMEOUT
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                UPDATE scrape_queue
+                SET state = CASE WHEN attempts >= $2 THEN 'failed' ELSE 'pending' END,
+                    claimed_by = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE state = 'claimed'
+                  AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => $1)
+                RETURNING job_url, state
+            """, float(timeout), ScrapingConfig.MAX_CLAIM_ATTEMPTS)
+        for row in rows:
+            RECLAIMS.inc(result=row["state"])
+        if rows:
+            logging.warning(f"🪝 Reclaimed {len(rows)} stale claims (no heartbeat for {timeout}s)")
+        return len(rows)
+
+    async def counts(self) -> dict[str, int]:
+        """Number of queued URLs per state of the attached run (empty if none is attached)."""
+        if self.run_id is None:
+            return {}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT state, COUNT(*) AS n FROM scrape_queue
+                WHERE run_id = $1
+                GROUP BY state
+            """, self.run_id)
+        return {row["state"]: row["n"] for row in rows}
+
+    async def wait_until_drained(self, run_id: int, max_hours: float = None, poll_interval: float = None) -> bool:
+        """
+        Coordinator: wait until no URL of `run_id` is pending or claimed, reclaiming stale claims meanwhile.
+
+        The run is attached even if this process queued nothing (every offer
+        came from listing data, or a resumed run had nothing left to queue),
+        so leftovers of other runs never hold the coordinator up.
+
+        Returns:
+            bool: True if the queue drained, False if `max_hours` ran out first
+        """
+        self.run_id = run_id
+        max_hours = max_hours or ScrapingConfig.COORDINATOR_WAIT_HOURS
+        poll_interval = poll_interval or ScrapingConfig.QUEUE_POLL_INTERVAL
+        deadline = time.monotonic() + max_hours * 3600
+        last_log = 0.0
+        while True:
+            await self.reclaim_stale()
+            counts = await self.counts()
+            open_count = counts.get("pending", 0) + counts.get("claimed", 0)
+            if not open_count:
+                logging.info(f"📮 Queue drained: {counts.get('done', 0)} done, {counts.get('failed', 0)} failed")
+                return True
+            if time.monotonic() >= deadline:
+                logging.warning(f"⚠️ Gave up waiting for workers after {max_hours}h with {open_count} offers open")
+                return False
+            if time.monotonic() - last_log >= 60:
+                logging.info(
+                    f"📮 Waiting for workers: {counts.get('pending', 0)} pending, {counts.get('claimed', 0)} claimed, "
+                    f"{counts.get('done', 0)} done, {counts.get('failed', 0)} failed"
+                )
+                last_log = time.monotonic()
+            await asyncio.sleep(poll_interval)
+
+    async def sync_journal(self, run_id: int):
+        """Copy finished queue states into the run journal so `RunJournal.finish` counts them."""
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE scrape_run_urls r
+                SET state = q.state, updated_at = q.updated_at
+                FROM scrape_queue q
+                WHERE q.run_id = $1 AND r.run_id = q.run_id AND r.job_url = q.job_url
+                  AND q.state IN ('done', 'failed')
+            """, run_id)
@@ -24,6 +24,11 @@ class JustJoinItSelectors:
         description="Links to individual job offers"
     )
     
+    OFFER_COUNT = SelectorConfig(
+        primary=':text-matches("^[0-9][0-9 ]* +(job )?offers?$", "i")',
+        description="Total number of offers shown above the listing"
+    )
+
     JOB_TITLE = SelectorConfig(
         primary='h1',
         description="Main job title heading"
@@ -113,6 +118,9 @@ class SelectorPatterns:
     SALARY_PERMANENT = r'.*per.*- Permanent$'
     SALARY_SPECIFIC_TASK = r'.*per.*- Specific-task$'
 
+    # Listing header, e.g. "12 345 offers"
+    OFFER_COUNT = r'(\d[\d\s]*)\s+(?:job )?offers?'
+
 
 def get_selector(selector_config: SelectorConfig) -> str:
     """
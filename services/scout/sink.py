@@ -0,0 +1,203 @@
+# sink.py
+"""
+File sink for scraped offers, and the loader that bulk-ingests it.
+
+With `SINK = "ndjson"` (or SCOUT_SINK=ndjson) Scout runs without a database:
+every offer row is streamed to a newline-delimited JSON file in `SINK_DIR`
+as soon as it is scraped, next to a manifest listing every collected URL.
+The file can later be loaded into any database (production or a staging
+copy) with:
+
+    PYTHONPATH=services python -m scout.sink offers-export/offers-20250101T060000.ndjson [--purge-stale]
+
+The loader streams the file in batches of `LOAD_BATCH_SIZE`, `COPY`s each
+batch into a staging table and merges it into `offers` with the same upsert
+the background writer uses.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+from dotenv import load_dotenv
+
+from .config import ScrapingConfig
+from .db import OFFER_COLUMNS, init_db_connection, purge_stale_offers
+from .writer import copy_offers
+
+# Columns whose JSON representation has to be turned back into a Python type for COPY
+_DECIMAL_COLUMNS = ("salary_min", "salary_max")
+
+
+def _open(path: Path, mode: str):
+    """Open a sink file, gzip-compressed when it ends in `.gz`."""
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def manifest_path(path: Path) -> Path:
+    """Manifest written next to a sink file (`offers-....ndjson` -> `offers-....manifest.json`)."""
+    name = path.name.removesuffix(".gz").removesuffix(".ndjson")
+    return path.with_name(f"{name}.manifest.json")
+
+
+class NdjsonSink:
+    """
+    Stream offers to an NDJSON file; a drop-in for `OfferWriter` in file-sink runs.
+
+    Usage:
+        sink = NdjsonSink()
+        sink.start()
+        await sink.put(offer_data)
+        ...
+        sink.write_manifest(collected_urls)
+        await sink.close()
+
+    Args:
+        path: Output file (defaults to `SINK_DIR/offers-<UTC timestamp>.ndjson`)
+    """
+
+    def __init__(self, path: str | Path = None):
+        if path is None:
+            path = Path(ScrapingConfig.SINK_DIR) / f"offers-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}.ndjson"
+        self.path = Path(path)
+        self.written = 0
+        self.failed = 0
+        self._file = None
+
+    def start(self):
+        """Open the output file."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = _open(self.path, "w")
+            logging.info(f"🗃️ Streaming offers to {self.path}")
+
+    async def put(self, offer_data: dict):
+        """Append one offer as a JSON line."""
+        try:
+            line = json.dumps({column: offer_data.get(column) for column in OFFER_COLUMNS}, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            self.failed += 1
+            logging.error(f"Could not serialize offer {offer_data.get('job_url')}: {e}")
+            return
+        self._file.write(line + "\n")
+        self.written += 1
+
+    async def drain(self):
+        """Push buffered lines to the OS."""
+        if self._file is not None:
+            self._file.flush()
+
+    def write_manifest(self, collected_urls):
+        """Record every URL collected in this run, so the loader can purge delisted offers."""
+        manifest = {
+            "file": self.path.name,
+            "collected_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "collected_urls": sorted(collected_urls),
+        }
+        manifest_path(self.path).write_text(json.dumps(manifest, ensure_ascii=False))
+
+    async def close(self):
+        """Flush and close the file."""
+        if self._file is None:
+            return
+        self._file.flush()
+        if hasattr(self._file, "fileno"):
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        logging.info(f"🗃️ Sink: {self.written} offers written to {self.path}, {self.failed} failed")
+
+
+def read_offers(path: str | Path) -> Iterator[dict]:
+    """Yield the offers stored in a sink file."""
+    with _open(Path(path), "r") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.warning(f"⚠️ Skipping malformed line {number} of {path}: {e}")
+
+
+def offer_record(offer: dict) -> tuple:
+    """Turn a stored offer back into a record in `OFFER_COLUMNS` order."""
+    values = dict(offer)
+    for column in _DECIMAL_COLUMNS:
+        if values.get(column) is not None:
+            values[column] = Decimal(str(values[column]))
+    return tuple(values.get(column) for column in OFFER_COLUMNS)
+
+
+async def load_offers(conn, path: str | Path, batch_size: int = None, purge_stale: bool = False) -> int:
+    """
+    Bulk-load a sink file into `offers` with upsert semantics.
+
+    Args:
+        conn: Database connection
+        path: NDJSON sink file (optionally `.gz`)
+        batch_size: Offers per COPY + merge (defaults to `LOAD_BATCH_SIZE`)
+        purge_stale: Afterwards remove (or deactivate) offers missing from the
+                     run's manifest, like a database-backed run does
+
+    Returns:
+        int: Number of offers inserted or updated
+    """
+    path = Path(path)
+    batch_size = batch_size or ScrapingConfig.LOAD_BATCH_SIZE
+    started = time.monotonic()
+    loaded = read = 0
+    batch = []
+    for offer in read_offers(path):
+        batch.append(offer_record(offer))
+        if len(batch) >= batch_size:
+            loaded += await copy_offers(conn, batch)
+            read += len(batch)
+            batch = []
+            logging.info(f"📥 Loaded {read} offers so far")
+    if batch:
+        loaded += await copy_offers(conn, batch)
+        read += len(batch)
+    logging.info(f"✅ Loaded {path}: {read} offers read, {loaded} inserted or updated in {time.monotonic() - started:.1f}s")
+
+    if purge_stale:
+        manifest = manifest_path(path)
+        if not manifest.exists():
+            raise FileNotFoundError(f"--purge-stale needs the run manifest {manifest}")
+        await purge_stale_offers(conn, set(json.loads(manifest.read_text())["collected_urls"]))
+    return loaded
+
+
+async def _load(paths: list[Path], batch_size: int, purge_stale: bool):
+    conn = await init_db_connection()
+    try:
+        for path in paths:
+            await load_offers(conn, path, batch_size, purge_stale)
+    finally:
+        await conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load Scout NDJSON sink files into the offers table.")
+    parser.add_argument("files", type=Path, nargs="+", help="Sink files (.ndjson or .ndjson.gz), loaded in order")
+    parser.add_argument("--batch-size", type=int, help=f"Offers per COPY batch (default {ScrapingConfig.LOAD_BATCH_SIZE})")
+    parser.add_argument("--purge-stale", action="store_true", help="Purge offers missing from each file's run manifest after loading it")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    asyncio.run(_load(args.files, args.batch_size, args.purge_stale))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
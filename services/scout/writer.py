@@ -0,0 +1,214 @@
+# writer.py
+"""
+Batched, pipelined database writer for extracted offers.
+
+Page workers hand finished offers to `OfferWriter.put()` and move on; a
+separate asyncio consumer buffers them and flushes each batch with
+`copy_records_to_table` into a temporary staging table followed by a single
+`INSERT ... SELECT ... ON CONFLICT DO UPDATE` (only when the content hash
+changed), using connections from an asyncpg pool. Database latency therefore no longer blocks page processing.
+
+Because `put()` returns before the offer is written, outcomes are reported
+through the `on_written` callback once each offer's batch has been flushed;
+progress tracking (the run journal, the work queue) hooks in there.
+"""
+import asyncio
+import logging
+import time
+import asyncpg
+from .config import ScrapingConfig
+from .db import OFFER_COLUMNS, OFFER_CONFLICT_SQL, UPSERT_OFFER_SQL
+from .metrics import DB_ROWS, DB_WRITE_SECONDS, record_failure
+
+_COLUMNS_SQL = ", ".join(OFFER_COLUMNS)
+
+# staging_seq numbers the rows in COPY order
+_STAGING_DDL = """
+    CREATE TEMP TABLE offers_staging (LIKE offers INCLUDING DEFAULTS, staging_seq BIGSERIAL) ON COMMIT DROP
+"""
+
+# A URL that appears twice in one batch keeps its last-loaded (newest) record
+_MERGE_SQL = f"""
+    INSERT INTO offers ({_COLUMNS_SQL})
+    SELECT DISTINCT ON (job_url) {_COLUMNS_SQL} FROM offers_staging
+    ORDER BY job_url, staging_seq DESC
+    {OFFER_CONFLICT_SQL}
+"""
+
+_STOP = object()
+
+
+async def copy_offers(conn: asyncpg.Connection, records: list[tuple]) -> int:
+    """
+    Upsert offer records (in `OFFER_COLUMNS` order) in one transaction.
+
+    The records are `COPY`'d into a temporary staging table and merged with a
+    single `INSERT ... SELECT ... ON CONFLICT DO UPDATE`, which only rewrites
+    offers whose content or listing hash changed. When a URL appears more than
+    once, the last record wins.
+
+    Returns:
+        int: Number of offers inserted or updated
+    """
+    async with conn.transaction():
+        await conn.execute(_STAGING_DDL)
+        await conn.copy_records_to_table("offers_staging", records=records, columns=list(OFFER_COLUMNS))
+        result = await conn.execute(_MERGE_SQL)
+    return int(result.split()[-1]) if result and result.split()[-1].isdigit() else len(records)
+
+
+class OfferWriter:
+    """
+    Background consumer that writes offers to the database in batches.
+
+    Args:
+        pool: asyncpg pool used for flushes
+        batch_size: Flush once this many offers are buffered
+        flush_interval: Flush a partial batch after this many seconds
+        queue_size: Bound on buffered offers (back-pressure for producers)
+        on_written: Async callable awaited with `(job_url, ok)` for every offer
+                    once its write was attempted (`ok` is False if it was lost)
+    """
+
+    def __init__(self, pool: asyncpg.Pool, batch_size: int = None, flush_interval: float = None, queue_size: int = None, on_written=None):
+        self.pool = pool
+        self.on_written = on_written
+        self.batch_size = batch_size or ScrapingConfig.WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval or ScrapingConfig.WRITE_FLUSH_INTERVAL
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or ScrapingConfig.WRITE_QUEUE_SIZE)
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Start the consumer task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, offer_data: dict):
+        """Queue an offer for writing (waits only if the buffer is full)."""
+        if self._task is not None and self._task.done():
+            # Surface a crashed consumer instead of blocking forever
+            self._task.result()
+        await self.queue.put(offer_data)
+
+    async def drain(self):
+        """Wait until every queued offer has been flushed."""
+        if self._task is None:
+            return
+        join = asyncio.ensure_future(self.queue.join())
+        await asyncio.wait({join, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not join.done():
+            join.cancel()
+            self._task.result()
+
+    async def close(self):
+        """Flush remaining offers and stop the consumer."""
+        if self._task is None:
+            return
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+        logging.info(
+            f"💾 Writer: {self.written} offers written in {self.batches} batches "
+            f"({self.flush_seconds:.1f}s in flushes), {self.failed} failed"
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self.queue.get()
+            if item is _STOP:
+                self.queue.task_done()
+                break
+            batch.append(item)
+
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    self.queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _flush(self, batch: list[dict]):
+        records = [tuple(offer.get(column) for column in OFFER_COLUMNS) for offer in batch]
+        started = time.monotonic()
+        try:
+            async with self.pool.acquire() as conn:
+                inserted = await copy_offers(conn, records)
+            self.written += inserted
+            DB_ROWS.inc(inserted, result="written")
+            outcomes = {record[0]: True for record in records}
+        except Exception as e:
+            record_failure("db_batch", e)
+            logging.warning(f"⚠️ Batch write of {len(records)} offers failed ({e}), retrying row by row")
+            outcomes = await self._flush_rows(records)
+        finally:
+            self.batches += 1
+            elapsed = time.monotonic() - started
+            self.flush_seconds += elapsed
+            DB_WRITE_SECONDS.observe(elapsed, mode="batch")
+        await self._report(outcomes)
+
+    async def _report(self, outcomes: dict[str, bool]):
+        """Hand each flushed offer's outcome to `on_written`."""
+        if self.on_written is None:
+            return
+        for job_url, ok in outcomes.items():
+            try:
+                await self.on_written(job_url, ok)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not report the write of {job_url}: {e}")
+
+    async def _flush_rows(self, records: list[tuple]) -> dict[str, bool]:
+        """
+        Fallback: insert rows one at a time so a single bad row only loses itself.
+
+        Returns:
+            dict: Whether each offer (by URL) was written
+        """
+        outcomes = {}
+        pending = list(records)
+        try:
+            async with self.pool.acquire() as conn:
+                while pending:
+                    record = pending[0]
+                    try:
+                        result = await conn.execute(UPSERT_OFFER_SQL, *record)
+                        if result and result.endswith(" 1"):
+                            self.written += 1
+                            DB_ROWS.inc(result="written")
+                        outcomes[record[0]] = True
+                    except (asyncpg.exceptions.PostgresError, ValueError, TypeError) as e:
+                        self.failed += 1
+                        DB_ROWS.inc(result="failed")
+                        record_failure("db_write", e)
+                        logging.error(f"Database error saving offer {record[0]}: {e}")
+                        outcomes[record[0]] = False
+                    pending.pop(0)
+        except Exception as e:
+            # Connection-level failure: the remaining rows of this batch are lost
+            self.failed += len(pending)
+            DB_ROWS.inc(len(pending), result="failed")
+            record_failure("db_write", e)
+            logging.error(f"❌ Database unavailable, dropped {len(pending)} offers: {e}")
+            outcomes.update((record[0], False) for record in pending)
+        return outcomes